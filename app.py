@@ -6,25 +6,62 @@ The app is later migrated to use a PostgreSQL database.
 # Standard library imports
 import os
 import logging
+import time
 import dotenv
 # Modules installed via pip or another package manager.(Third-party imports:)
-from flask import Flask, jsonify, Blueprint, request
+from flask import Flask, jsonify, Blueprint, request, Response, stream_with_context
 from flask_migrate import Migrate
 from marshmallow import ValidationError
-from sqlalchemy.exc import SQLAlchemyError
-from apifairy import APIFairy, arguments, authenticate
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from apifairy import APIFairy, arguments, authenticate, body
 from config.database import db, engine, Base
 from config.dependancy import init_db
+from config.sqlite import configure_sqlite, init_sqlite
 from models.model_tables import Character
 from models.base import Base
 from routers.auth import auth_blueprint, auth
+from routers.admin import admin_blueprint
+from routers.batch import batch_blueprint
+from routers.health import health_blueprint
+from services.profiling import init_profiling
+from services.ratelimit import init_rate_limiting
+from services.compression import init_compression
+from services.serialization import encode_rows, make_payload_response
+from services.static_assets import init_static_assets
+from services.events import characters_changed, in_batch_transaction, send_characters_changed
+from services.stats import (
+    StatsCache,
+    sql_character_stats,
+    sql_facet_counts,
+    vectorised_character_stats,
+    vectorised_facet_counts
+)
+from services.snapshot import character_columns, character_sort_key, init_snapshot
+from services.changes import ChangeNotifier, fetch_changes, format_sse, record_change, record_changes
+from services.broker import init_broker
+from services.group_commit import init_group_commit
+from services.warmup import init_warmup
+from services.autocomplete import init_autocomplete
+from services.search import search_matches
+from services.sharding import init_sharding, sort_order
+from services import writes
+from services.writes import check_natural_key, conflicting_fields, upsert_characters
+from schemas.compiled import CompiledSchema
 from schemas.schema import (
     CharacterSchema,
     GetCharacterSchema,
+    MultiGetCharactersQuerySchema,
+    MultiGetCharactersBodySchema,
     FilterCharactersQuerySchema,
     SortRequestSchema,
     UserSchema,
-    UserSchemaDeletion
+    UserSchemaDeletion,
+    ChangesQuerySchema,
+    SubscribeQuerySchema,
+    AutocompleteQuerySchema,
+    CharacterUpsertSchema,
+    UpsertQuerySchema,
+    BulkUpsertSchema
 )
 
 # Initialize Flask app
@@ -44,30 +81,177 @@ migrate = Migrate(app, db)
 # Access environment variables
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['DEBUG'] = True
+# SQLite tuning for single-node deployments: "default" or "tuned" (WAL, separate read/write pools)
+app.config['SQLITE_PROFILE'] = os.getenv('SQLITE_PROFILE', 'default')
+app.config['SQLITE_READ_POOL_SIZE'] = int(os.getenv('SQLITE_READ_POOL_SIZE', 8))
+app.config['DEBUG'] = os.getenv('DEBUG', 'false').lower() == 'true'
+# Optional sharding of the characters table: comma separated database URLs, routed by "id" or "house"
+app.config['SHARD_URLS'] = [url.strip() for url in os.getenv('SHARD_URLS', '').split(',') if url.strip()]
+app.config['SHARD_KEY'] = os.getenv('SHARD_KEY', 'id')
 
 # API Configuration settings
 app.config['APIFAIRY_TITLE'] = 'Game of Thrones Flask API'
 app.config['APIFAIRY_VERSION'] = '1.0'
 app.config['APIFAIRY_UI'] = 'swagger_ui'
 
+# Opt-in request profiling (no hooks are registered unless PROFILING_ENABLED is true)
+app.config['PROFILING_ENABLED'] = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+app.config['PROFILING_MODE'] = os.getenv('PROFILING_MODE', 'cprofile')
+app.config['PROFILING_SAMPLE_RATE'] = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+app.config['PROFILING_SAMPLE_INTERVAL'] = float(os.getenv('PROFILING_SAMPLE_INTERVAL', 0.005))
+app.config['PROFILING_TOKEN'] = os.getenv('PROFILING_TOKEN')
+app.config['PROFILING_DIR'] = os.getenv('PROFILING_DIR', './profiles')
+app.config['PROFILING_MAX_FILES'] = int(os.getenv('PROFILING_MAX_FILES', 50))
+# Optional in-memory snapshot that serves list, filter, sort and stats reads
+app.config['SNAPSHOT_ENABLED'] = os.getenv('SNAPSHOT_ENABLED', 'false').lower() == 'true'
+app.config['SNAPSHOT_REFRESH_INTERVAL'] = float(os.getenv('SNAPSHOT_REFRESH_INTERVAL', 1.0))
+app.config['CHANGES_POLL_INTERVAL'] = float(os.getenv('CHANGES_POLL_INTERVAL', 1.0))
+app.config['CHANGES_HEARTBEAT_INTERVAL'] = float(os.getenv('CHANGES_HEARTBEAT_INTERVAL', 15))
+app.config['BROKER_BACKEND'] = os.getenv('BROKER_BACKEND', 'local')
+app.config['BROKER_MAX_QUEUE'] = int(os.getenv('BROKER_MAX_QUEUE', 1000))
+# Natural key for upserts with key=natural; needs a unique index on these columns (see migrations)
+app.config['UPSERT_NATURAL_KEY'] = tuple(os.getenv('UPSERT_NATURAL_KEY', 'name,house').split(','))
+check_natural_key(app.config['UPSERT_NATURAL_KEY'])
+# Reject updates without an If-Match header (428) instead of applying them unconditionally
+app.config['REQUIRE_IF_MATCH'] = os.getenv('REQUIRE_IF_MATCH', 'false').lower() == 'true'
+# Batch concurrent writes into shared transactions (one commit per batch)
+app.config['GROUP_COMMIT_ENABLED'] = os.getenv('GROUP_COMMIT_ENABLED', 'false').lower() == 'true'
+app.config['GROUP_COMMIT_MAX_BATCH'] = int(os.getenv('GROUP_COMMIT_MAX_BATCH', 64))
+app.config['GROUP_COMMIT_MAX_WAIT'] = float(os.getenv('GROUP_COMMIT_MAX_WAIT', 0.002))
+# Per-worker warm-up before /readyz reports ready, and the cached database check behind it
+app.config['WARMUP_ENABLED'] = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+app.config['WARMUP_CONNECTIONS'] = int(os.getenv('WARMUP_CONNECTIONS', 4))
+app.config['WARMUP_RETRY_INTERVAL'] = float(os.getenv('WARMUP_RETRY_INTERVAL', 5))
+app.config['WARMUP_PATHS'] = os.getenv(
+    'WARMUP_PATHS', '/healthz,/apispec.json,/docs,/characters/list-characters'
+).split(',')
+app.config['HEALTH_DB_PING_TTL'] = float(os.getenv('HEALTH_DB_PING_TTL', 5))
+app.config['AUTOCOMPLETE_REFRESH_INTERVAL'] = float(os.getenv('AUTOCOMPLETE_REFRESH_INTERVAL', 1.0))
+# Rate limits are "<requests>/<seconds>" token buckets per client and budget; "0" disables one
+app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+app.config['RATE_LIMIT_STORE'] = os.getenv('RATE_LIMIT_STORE', 'memory')
+# Number of proxies in front of the app whose X-Forwarded-For entries identify the client (0 = none)
+app.config['RATE_LIMIT_TRUSTED_PROXIES'] = int(os.getenv('RATE_LIMIT_TRUSTED_PROXIES', 0))
+app.config['RATE_LIMIT_DEFAULT'] = os.getenv('RATE_LIMIT_DEFAULT', '100/10')
+app.config['RATE_LIMIT_EXPENSIVE'] = os.getenv('RATE_LIMIT_EXPENSIVE', '10/10')
+app.config['RATE_LIMIT_AUTH'] = os.getenv('RATE_LIMIT_AUTH', '10/60')
+app.config['CONCURRENCY_LIMIT_DEFAULT'] = int(os.getenv('CONCURRENCY_LIMIT_DEFAULT', 0))
+app.config['CONCURRENCY_LIMIT_EXPENSIVE'] = int(os.getenv('CONCURRENCY_LIMIT_EXPENSIVE', 2))
+app.config['CONCURRENCY_LIMIT_AUTH'] = int(os.getenv('CONCURRENCY_LIMIT_AUTH', 2))
+app.config['RATE_LIMIT_EXPENSIVE_ENDPOINTS'] = os.getenv(
+    'RATE_LIMIT_EXPENSIVE_ENDPOINTS',
+    'characters.sort_characters,characters.filter_characters,characters.get_character_stats,batch.run_batch,'
+    'characters.bulk_upsert_characters'
+).split(',')
+app.config['RATE_LIMIT_AUTH_ENDPOINTS'] = os.getenv('RATE_LIMIT_AUTH_ENDPOINTS', 'auth.login,auth.register_user').split(',')
+# Response compression (gzip, plus brotli/zstd when installed); profiles are fast, default or best
+app.config['COMPRESSION_ENABLED'] = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+app.config['COMPRESSION_MIN_SIZE'] = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+app.config['COMPRESSION_PROFILE'] = os.getenv('COMPRESSION_PROFILE', 'default')
+app.config['COMPRESSION_ROUTE_PROFILES'] = dict(
+    item.split('=', 1) for item in os.getenv(
+        'COMPRESSION_ROUTE_PROFILES',
+        'characters.sort_characters=fast,characters.filter_characters=fast,characters.subscribe_characters=fast,'
+        'characters.get_character_changes=fast'
+    ).split(',') if '=' in item
+)
+# Precompiled request validation; marshmallow still handles errors and unsupported schemas
+app.config['FAST_VALIDATION_ENABLED'] = os.getenv('FAST_VALIDATION_ENABLED', 'true').lower() == 'true'
+# Prebuilt OpenAPI spec, docs page and static files with hashed ETags and precompressed variants
+app.config['STATIC_CACHE_ENABLED'] = os.getenv('STATIC_CACHE_ENABLED', 'true').lower() == 'true'
+app.config['STATIC_MAX_AGE'] = int(os.getenv('STATIC_MAX_AGE', 3600))
+app.config['STATS_CACHE_TTL'] = float(os.getenv('STATS_CACHE_TTL', 30))
+app.config['ADMIN_EMAILS'] = [email.strip() for email in os.getenv('ADMIN_EMAILS', '').split(',') if email.strip()]
+
 # Initialize APIFairy for API documentation
 apifairy = APIFairy(app)
 
 # Initialize the database
 init_db(app)
 
-# Initialize database connection with SQLAlchemy
+# Initialize database connection with SQLAlchemy (with the SQLite profile's pools and PRAGMAs)
+configure_sqlite(app)
 db.init_app(app)
+init_sqlite(app, db)
 
 
 # Register the Blueprint for authentication
 app.register_blueprint(auth_blueprint)
 
+# Register the Blueprint for the liveness and readiness checks
+app.register_blueprint(health_blueprint)
+
+# Register the Blueprint for admin endpoints and enable profiling hooks
+app.register_blueprint(admin_blueprint)
+init_profiling(app)
+
+# Per-client rate limits and concurrency caps
+init_rate_limiting(app)
+
+# Negotiated response compression
+init_compression(app)
+
+# Precompiled validation fast path for request schemas
+CompiledSchema.fast_path = app.config['FAST_VALIDATION_ENABLED']
+
 
 # Create a Blueprint with a prefix for characters
 characters_blueprint = Blueprint("characters", __name__, url_prefix="/characters")
 
+# Aggregate statistics are cached until the next character write
+stats_cache = StatsCache(ttl=app.config['STATS_CACHE_TTL'])
+characters_changed.connect(stats_cache.invalidate, weak=False)
+
+# Characters spread across several databases (None unless SHARD_URLS)
+character_shards = init_sharding(app)
+# Character writes go through the shard router when sharding, else straight to the main database
+character_writes = character_shards if character_shards is not None else writes
+
+# In-memory snapshot of the characters table (None unless SNAPSHOT_ENABLED)
+character_snapshot = init_snapshot(app)
+
+
+# Wakes change feed readers when this process commits a character write
+change_notifier = ChangeNotifier()
+characters_changed.connect(change_notifier.notify, weak=False)
+
+# Fan-out broker for streaming subscriptions (local process by default)
+character_broker = init_broker(app)
+
+# Prefix index for the autocomplete endpoint
+autocomplete_index = init_autocomplete(app)
+
+# Background writer sharing commits between concurrent writes (None unless GROUP_COMMIT_ENABLED)
+group_writer = init_group_commit(app)
+
+# Warm-up of connections, caches and code paths, gating /readyz
+warmup = init_warmup(app)
+
+
+def get_snapshot():
+    """Return the loaded snapshot, or None when reads should go to the database."""
+    if character_snapshot is None:
+        return None
+    character_snapshot.ensure_current(db.session)
+    return character_snapshot
+
+
+def not_sharded(feature):
+    """501 for features that need every character in the main database (see services/sharding.py)."""
+    return jsonify({"error": f"{feature} is not available while characters are sharded"}), 501
+
+
+def conflict_response(error):
+    """409 naming the unique key a write collided with."""
+    db.session.rollback()
+    fields = conflicting_fields(error)
+    if fields == ("id",):
+        message = "A character with this id already exists"
+    elif fields is not None:
+        message = f"A character with this {' and '.join(fields)} already exists"
+    else:
+        message = "The character conflicts with the stored data"
+    return jsonify({"error": message}), 409
 
 
 # Error Handlers
@@ -105,12 +289,20 @@ def get_characters(args):
     try:
         limit = args.get("limit", 20)
         skip = args.get("skip", 0)
-        characters = Character.query.offset(skip).limit(limit).all()
-        return jsonify({
-            "total": Character.query.count(),
+        snapshot = get_snapshot()
+        if character_shards is not None:
+            total, characters = character_shards.gather(lambda session: session.query(Character),
+                                                        skip=skip, limit=limit, count=True)
+        elif snapshot is not None:
+            total, characters = snapshot.page(skip, limit)
+        else:
+            characters = Character.query.offset(skip).limit(limit).all()
+            total = Character.query.count()
+        return make_payload_response({
+            "total": total,
             "skip": skip,
             "limit": limit,
-            "data": [character.to_dict() for character in characters]
+            "data": encode_rows(characters)
         })
     except Exception as e:
         return handle_generic_error(e)
@@ -122,17 +314,76 @@ def get_characters(args):
 def get_character_by_id(args, character_id):
     """Retrieve a character by ID, optionally including house and role details."""
     try:
-        character = Character.query.get(character_id)
+        if character_shards is not None:
+            character = character_shards.get(db.session, character_id)
+        else:
+            character = Character.query.get(character_id)
         if not character:
             return jsonify({"error": "Character not found"}), 404
 
-        result = character.to_dict()
-        if args.get("include_house"):
-            result["house"] = character.house
-        if args.get("include_role"):
-            result["role"] = character.role
+        response = with_version_etag(jsonify(character_response(character, args)), character.version)
+        return response.make_conditional(request)
+    except Exception as e:
+        return handle_generic_error(e)
+
+
+def with_version_etag(response, version):
+    """Set the character version as the response's ETag, for use in a later If-Match."""
+    response.set_etag(f"v{version}")
+    return response
+
+
+def if_match_versions():
+    """The versions named by the If-Match header, or None when it is absent or `*`."""
+    if_match = request.if_match
+    if not if_match or if_match.star_tag:
+        return None
+    # Weak or foreign tags can never match, which leaves an empty list: the update is refused.
+    return [int(tag[1:]) for tag in if_match.as_set() if tag[:1] == "v" and tag[1:].isdigit()]
+
+
+def character_response(character, args):
+    """Serialize a character, applying the GetCharacterSchema include flags."""
+    result = character.to_dict()
+    if args.get("include_house"):
+        result["house"] = character.house
+    if args.get("include_role"):
+        result["role"] = character.role
+    return result
+
+
+def get_characters_in_order(args):
+    """Resolve `args["ids"]` with one IN query, preserving request order and marking missing ids."""
+    ids = args["ids"]
+    if character_shards is not None:
+        found = character_shards.get_many(db.session, ids)
+    else:
+        found = {character.id: character for character in Character.query.filter(Character.id.in_(set(ids))).all()}
+    data = [
+        character_response(found[character_id], args) if character_id in found
+        else {"id": character_id, "error": "Character not found"}
+        for character_id in ids
+    ]
+    return jsonify({"total": len(ids), "found": sum(1 for character_id in ids if character_id in found), "data": data})
+
+# Feature 2b: Fetch many characters by ID in one call
+@characters_blueprint.route("/get-characters-ids", methods=["GET"])
+@authenticate(auth)
+@arguments(MultiGetCharactersQuerySchema)
+def get_characters_by_ids(args):
+    """Retrieve many characters by ID (ids=1,2,3) in request order; missing ids are marked as not found."""
+    try:
+        return get_characters_in_order(args)
+    except Exception as e:
+        return handle_generic_error(e)
 
-        return jsonify(result)
+@characters_blueprint.route("/get-characters-ids", methods=["POST"])
+@authenticate(auth)
+@body(MultiGetCharactersBodySchema)
+def post_characters_by_ids(args):
+    """Retrieve many characters by ID from a JSON body, for id lists too long for a query string."""
+    try:
+        return get_characters_in_order(args)
     except Exception as e:
         return handle_generic_error(e)
 
@@ -141,32 +392,79 @@ def get_character_by_id(args, character_id):
 @authenticate(auth)
 @arguments(FilterCharactersQuerySchema)
 def filter_characters(args):
-    """Filter characters based on name, house, role, and age range."""
+    """Filter characters based on name, house, role, and age range, optionally with facet counts or a ranked `q` search."""
     try:
         app.logger.info(f"Filter arguments: {args}")
-        filtered_characters = Character.query
-
-        if args.get('name'):
-            filtered_characters = filtered_characters.filter(Character.name.ilike(f"%{args['name']}%"))
-        if args.get('house'):
-            filtered_characters = filtered_characters.filter(Character.house.ilike(f"%{args['house']}%"))
-        if args.get('role'):
-            filtered_characters = filtered_characters.filter(Character.role.ilike(f"%{args['role']}%"))
-        if args.get('age_min'):
-            filtered_characters = filtered_characters.filter(Character.age >= args['age_min'])
-        if args.get('age_max'):
-            filtered_characters = filtered_characters.filter(Character.age <= args['age_max'])
-
+        if args.get('q'):
+            if character_shards is not None:
+                return not_sharded("Search")
+            return search_characters(args)
+
+        if character_shards is not None:
+            total, filtered_characters = character_shards.gather(
+                lambda session: apply_character_filters(session.query(Character), args))
+            response = {"total": total, "data": encode_rows(filtered_characters)}
+            if args.get('facets'):
+                response["facets"] = vectorised_facet_counts(character_columns(filtered_characters),
+                                                             [character.id for character in filtered_characters])
+            return make_payload_response(response)
+
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            filtered_characters = snapshot.filter(args.get('name'), args.get('house'), args.get('role'),
+                                                  args.get('age_min'), args.get('age_max'))
+            response = {"total": len(filtered_characters), "data": encode_rows(filtered_characters)}
+            if args.get('facets'):
+                response["facets"] = vectorised_facet_counts(snapshot.columns(), [character.id for character in filtered_characters])
+            return make_payload_response(response)
+
+        filtered_characters = apply_character_filters(Character.query, args)
+
+        facets = sql_facet_counts(db.session, filtered_characters) if args.get('facets') else None
         filtered_characters = filtered_characters.all()
 
-        if not filtered_characters:
-            return jsonify({"total": 0, "data": []}), 200
-
-        return jsonify({"total": len(filtered_characters), "data": [character.to_dict() for character in filtered_characters]})
+        response = {"total": len(filtered_characters), "data": encode_rows(filtered_characters)}
+        if facets is not None:
+            response["facets"] = facets
+        return make_payload_response(response)
     except Exception as e:
         return handle_generic_error(e)
 
 
+def apply_character_filters(query, args):
+    """Apply the name, house, role and age range filters of FilterCharactersQuerySchema."""
+    if args.get('name'):
+        query = query.filter(Character.name.ilike(f"%{args['name']}%"))
+    if args.get('house'):
+        query = query.filter(Character.house.ilike(f"%{args['house']}%"))
+    if args.get('role'):
+        query = query.filter(Character.role.ilike(f"%{args['role']}%"))
+    if args.get('age_min'):
+        query = query.filter(Character.age >= args['age_min'])
+    if args.get('age_max'):
+        query = query.filter(Character.age <= args['age_max'])
+    return query
+
+
+def search_characters(args):
+    """Full-text search across all descriptive fields, best matches first, one page at a time."""
+    matches = search_matches(db.session, args['q'])
+    query = apply_character_filters(Character.query.join(matches, Character.id == matches.c.id), args)
+
+    total = query.count()
+    facets = sql_facet_counts(db.session, query) if args.get('facets') else None
+    page = (query.with_entities(Character, matches.c.score)
+            .order_by(matches.c.score.desc(), Character.id)
+            .offset(args['skip']).limit(args['limit']).all())
+
+    data = encode_rows(character for character, _ in page)
+    for row, (_, score) in zip(data, page):
+        row["score"] = round(float(score), 4)
+    response = {"total": total, "skip": args['skip'], "limit": args['limit'], "data": data}
+    if facets is not None:
+        response["facets"] = facets
+    return make_payload_response(response)
+
 # Feature 4: Fetch a sorted character list
 @characters_blueprint.route("/characters-sort", methods=["POST"])
 @authenticate(auth)
@@ -176,26 +474,54 @@ def sort_characters(args):
     try:
         sort_key = args["sort_by"]
         reverse_order = args["sort_order"] == "desc"
-
-        characters = Character.query.all()
-
-        def safe_getattr(character, key):
-            value = getattr(character, key, None)
-            return value.lower() if isinstance(value, str) else (value or "")
-
+        skip, limit = args["skip"], args.get("limit")
+        end = None if limit is None else skip + limit
+
+        if character_shards is not None:
+            total, sorted_characters = character_shards.gather(lambda session: session.query(Character),
+                                                               sort_order(sort_key, descending=reverse_order),
+                                                               skip=skip, limit=limit, count=True)
+            return jsonify({"total": total, "data": [character.to_dict() for character in sorted_characters]})
+
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            sorted_characters = snapshot.sorted_rows(sort_key, descending=reverse_order)
+            return jsonify({
+                "total": len(sorted_characters),
+                "data": [character.to_dict() for character in sorted_characters[skip:end]]
+            })
+
+        characters = Character.query.order_by(Character.id).all()
+
+        # The snapshot's key: comparing None ages with numbers would fail.
         sorted_characters = sorted(
             characters,
-            key=lambda x: safe_getattr(x, sort_key),
+            key=lambda x: character_sort_key(sort_key, x),
             reverse=reverse_order
         )
 
         return jsonify({
             "total": len(sorted_characters),
-            "data": [character.to_dict() for character in sorted_characters]
+            "data": [character.to_dict() for character in sorted_characters[skip:end]]
         })
     except Exception as e:
         return handle_generic_error(e)
 
+def run_write(write):
+    """
+    Run `write(session)`, which only issues statements, commit it and return its result.
+
+    In group-commit mode the write joins the next batch on the writer thread, except inside an
+    atomic batch request, whose writes must stay in that request's own transaction.
+    """
+    if group_writer is None or in_batch_transaction():
+        result = write(db.session)
+        db.session.commit()
+        return result
+    # Return this request's connection to the pool while it waits: the writer thread needs one.
+    db.session.commit()
+    return group_writer.submit(write)
+
 # Feature 5: Add a new character to the list
 @characters_blueprint.route("/add/create-new-characters", methods=["POST"])
 @authenticate(auth)
@@ -203,10 +529,15 @@ def sort_characters(args):
 def create_character(args):
     """Create a new character and save it to the database."""
     try:
-        new_character = Character(**args)
-        db.session.add(new_character)
-        db.session.commit()
-        return jsonify(new_character.to_dict()), 201
+        def write(session):
+            result = character_writes.insert_character(session, args)
+            return result, record_change(session, "create", result)
+
+        result, seq = run_write(write)
+        send_characters_changed(app, operation="create", character=result, seq=seq)
+        return with_version_etag(jsonify(result), result["version"]), 201
+    except IntegrityError as e:
+        return conflict_response(e)
     except SQLAlchemyError as e:
         db.session.rollback()
         return handle_database_error(e)
@@ -218,18 +549,44 @@ def create_character(args):
 @authenticate(auth)
 @arguments(UserSchema)
 def update_character(args, character_id):
-    """Update an existing character's details in the database."""
-    try:
-        character = Character.query.get(character_id)
-        if not character:
-            return jsonify({"error": f"Character with ID {character_id} not found"}), 404
+    """
+    Update an existing character's details in the database.
 
-        for key, value in args.items():
-            if hasattr(character, key):
-                setattr(character, key, value)
-
-        db.session.commit()
-        return jsonify(character.to_dict()), 200
+    With `If-Match: "v<version>"` (the ETag of a previous read) the update only applies if
+    nobody changed the character since; otherwise it fails with 412 and the current ETag.
+    """
+    try:
+        expected_versions = if_match_versions()
+        if expected_versions is None and app.config['REQUIRE_IF_MATCH'] and not request.if_match.star_tag:
+            return jsonify({"error": "This update requires an If-Match header with the character's ETag"}), 428
+
+        values = {key: value for key, value in args.items() if hasattr(Character, key)}
+
+        def write(session):
+            # The previous row is only needed to notify subscribers whose filter the character is leaving.
+            result, previous = character_writes.update_character(session, character_id, values,
+                                                                 with_previous=character_broker.needs_previous,
+                                                                 expected_versions=expected_versions)
+            if result is None:
+                # Tells a version conflict from a missing character.
+                version = (character_writes.current_version(session, character_id)
+                           if expected_versions is not None else None)
+                return None, None, None, version
+            return result, previous, record_change(session, "update", result), result["version"]
+
+        result, previous, seq, version = run_write(write)
+        if result is None:
+            if version is None:
+                return jsonify({"error": f"Character with ID {character_id} not found"}), 404
+            return with_version_etag(jsonify({
+                "error": f"Character with ID {character_id} was modified by another request",
+                "version": version
+            }), version), 412
+
+        send_characters_changed(app, operation="update", character=result, seq=seq, previous=previous)
+        return with_version_etag(jsonify(result), result["version"]), 200
+    except IntegrityError as e:
+        return conflict_response(e)
     except SQLAlchemyError as e:
         db.session.rollback()
         return handle_database_error(e)
@@ -243,12 +600,17 @@ def update_character(args, character_id):
 def delete_character(args, character_id):
     """Delete a character from the database by its ID."""
     try:
-        character = Character.query.get(character_id)
-        if not character:
+        def write(session):
+            deleted = character_writes.delete_character(session, character_id)
+            if deleted is None:
+                return None, None
+            return deleted, record_change(session, "delete", deleted)
+
+        deleted, seq = run_write(write)
+        if deleted is None:
             return jsonify({"error": f"Character with ID {character_id} not found"}), 404
 
-        db.session.delete(character)
-        db.session.commit()
+        send_characters_changed(app, operation="delete", character=deleted, seq=seq)
         return jsonify({"message": f"Character with ID {character_id} deleted successfully"}), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -256,13 +618,197 @@ def delete_character(args, character_id):
     except Exception as e:
         return handle_generic_error(e)
 
-# Register the Blueprint
+# Feature 8: Aggregate statistics
+@characters_blueprint.route("/stats", methods=["GET"])
+@authenticate(auth)
+def get_character_stats():
+    """Counts per house and role, death rate per house and the age distribution."""
+    try:
+        if character_shards is not None:
+            return jsonify(stats_cache.get(lambda: vectorised_character_stats(character_shards.columns())))
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            return jsonify(stats_cache.get(lambda: vectorised_character_stats(snapshot.columns())))
+        return jsonify(stats_cache.get(lambda: sql_character_stats(db.session)))
+    except SQLAlchemyError as e:
+        return handle_database_error(e)
+    except Exception as e:
+        return handle_generic_error(e)
+
+# Feature 9: Change data feed
+@characters_blueprint.route("/changes", methods=["GET"])
+@authenticate(auth)
+@arguments(ChangesQuerySchema)
+def get_character_changes(args):
+    """Incremental feed of character writes after `since`, as long-poll JSON or a Server-Sent Events stream."""
+    try:
+        if args["stream"] or request.accept_mimetypes.best == "text/event-stream":
+            last_event_id = request.headers.get("Last-Event-ID")
+            since = args["since"]
+            if last_event_id is not None:
+                # Sent back by reconnecting clients (and anything in between), so never trusted to be a number.
+                last_event_id = last_event_id.strip()
+                if not (last_event_id.isascii() and last_event_id.isdigit()) or len(last_event_id) > 18:
+                    return jsonify({"error": "Last-Event-ID must be a change sequence number"}), 400
+                since = int(last_event_id)
+            return Response(stream_with_context(stream_changes(since, args["limit"])),
+                            mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        deadline = time.monotonic() + args["wait"]
+        while True:
+            seen = change_notifier.counter
+            changes = fetch_changes(db.session, args["since"], args["limit"])
+            remaining = deadline - time.monotonic()
+            if changes or remaining <= 0:
+                break
+            # End the read transaction so commits from other connections become visible.
+            db.session.rollback()
+            change_notifier.wait(seen, min(remaining, app.config['CHANGES_POLL_INTERVAL']))
+
+        data = [change.to_dict() for change in changes]
+        return jsonify({"since": args["since"], "last_seq": data[-1]["seq"] if data else args["since"], "data": data})
+    except SQLAlchemyError as e:
+        return handle_database_error(e)
+    except Exception as e:
+        return handle_generic_error(e)
+
+
+def stream_changes(since, limit):
+    """Yield outbox changes as SSE messages, with comment heartbeats while idle."""
+    yield f"retry: {int(app.config['CHANGES_POLL_INTERVAL'] * 1000)}\n\n"
+    last_event = time.monotonic()
+    while True:
+        seen = change_notifier.counter
+        changes = [change.to_dict() for change in fetch_changes(db.session, since, limit)]
+        db.session.rollback()
+        for change in changes:
+            since = change["seq"]
+            yield format_sse(change)
+        if changes:
+            last_event = time.monotonic()
+            continue
+        if time.monotonic() - last_event >= app.config['CHANGES_HEARTBEAT_INTERVAL']:
+            last_event = time.monotonic()
+            yield ": keep-alive\n\n"
+        change_notifier.wait(seen, app.config['CHANGES_POLL_INTERVAL'])
+
+# Feature 10: Streaming subscription to character updates
+@characters_blueprint.route("/subscribe", methods=["GET"])
+@authenticate(auth)
+@arguments(SubscribeQuerySchema)
+def subscribe_characters(args):
+    """Server-Sent Events stream of character creates, updates and deletes, optionally filtered by house or role."""
+    subscription = character_broker.subscribe(args.get("house"), args.get("role"))
+
+    def stream():
+        try:
+            yield f"retry: {int(app.config['CHANGES_POLL_INTERVAL'] * 1000)}\n\n"
+            while not subscription.overflowed:
+                event = subscription.get(timeout=app.config['CHANGES_HEARTBEAT_INTERVAL'])
+                yield format_sse(event) if event is not None else ": keep-alive\n\n"
+            # The client fell behind; it should resume from /characters/changes with its last event id.
+            yield "event: overflow\ndata: {}\n\n"
+        finally:
+            character_broker.unsubscribe(subscription)
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Feature 11: Autocomplete suggestions
+@characters_blueprint.route("/autocomplete", methods=["GET"])
+@authenticate(auth)
+@arguments(AutocompleteQuerySchema)
+def autocomplete_characters(args):
+    """Suggest names, houses and nicknames with a word starting with `q`, most common first."""
+    try:
+        if character_shards is not None:
+            return not_sharded("Autocomplete")
+        autocomplete_index.ensure_current(db.session)
+        return jsonify({"query": args["q"],
+                        "suggestions": autocomplete_index.suggest(args["q"], args["search_fields"], args["limit"])})
+    except SQLAlchemyError as e:
+        return handle_database_error(e)
+    except Exception as e:
+        return handle_generic_error(e)
+
+# Feature 12: Idempotent upserts for sync jobs
+def run_upsert(rows, key):
+    """Upsert `rows`, record and announce the writes; returns the per-row (status, row) results."""
+    key_fields = ("id",) if key == "id" else app.config['UPSERT_NATURAL_KEY']
+
+    def write(session):
+        results = upsert_characters(session, rows, key_fields)
+        written = {}
+        for status, row, previous in results:
+            if status != "unchanged":
+                written[row["id"]] = ("create" if status == "created" else "update", row, previous)
+        seqs = record_changes(session, [(operation, row) for operation, row, _ in written.values()])
+        return results, list(zip(written.values(), seqs))
+
+    results, written = run_write(write)
+    for (operation, row, previous), seq in written:
+        send_characters_changed(app, operation=operation, character=row, seq=seq, previous=previous)
+    return [(status, row) for status, row, _ in results]
+
+@characters_blueprint.route("/upsert", methods=["PUT"])
+@authenticate(auth)
+@arguments(UpsertQuerySchema)
+@body(CharacterUpsertSchema)
+def upsert_character(args, character):
+    """Create or fully replace one character matched by id or natural key; unchanged characters are not written."""
+    try:
+        if character_shards is not None:
+            return not_sharded("Upsert")
+        [(status, result)] = run_upsert([character], args["key"])
+        response = with_version_etag(jsonify({"status": status, "character": result}), result["version"])
+        return response, 201 if status == "created" else 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except IntegrityError as e:
+        return conflict_response(e)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return handle_database_error(e)
+    except Exception as e:
+        return handle_generic_error(e)
+
+@characters_blueprint.route("/bulk-upsert", methods=["POST"])
+@authenticate(auth)
+@body(BulkUpsertSchema)
+def bulk_upsert_characters(args):
+    """Create or replace up to 1000 characters in one statement, skipping those that did not change."""
+    try:
+        if character_shards is not None:
+            return not_sharded("Upsert")
+        results = run_upsert(args["characters"], args["key"])
+        counts = {status: 0 for status in ("created", "updated", "unchanged")}
+        for status, _ in results:
+            counts[status] += 1
+        return jsonify({**counts, "results": [{"id": row and row["id"], "status": status} for status, row in results]}), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except IntegrityError as e:
+        return conflict_response(e)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return handle_database_error(e)
+    except Exception as e:
+        return handle_generic_error(e)
+
+# Register the Blueprints
 app.register_blueprint(characters_blueprint)
+app.register_blueprint(batch_blueprint)
+
+# Build the OpenAPI spec and static assets once, now that every route is registered
+init_static_assets(app, apifairy)
 
 
 # Run the app and Initialize the database before starting the app
+# (development server; production runs under gunicorn, see gunicorn.conf.py)
 
 if __name__ == "__main__":
     with app.app_context():
         Base.metadata.create_all(bind=engine)
-    app.run(debug=True, host='0.0.0.0', port=8087)
+    warmup.start()
+    app.run(debug=app.config['DEBUG'], host=os.getenv('HOST', '0.0.0.0'), port=int(os.getenv('PORT', 8087)))
@@ -0,0 +1,5 @@
+"""
+Benchmark suite for the Game of Thrones Flask API.
+Runs every endpoint against a local database seeded with synthetic characters
+and reports throughput and latency percentiles as JSON.
+"""
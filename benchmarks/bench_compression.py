@@ -0,0 +1,71 @@
+"""
+Response compression benchmark.
+
+Builds realistic `/characters` JSON payloads from synthetic rows and measures,
+for every available encoding and compression profile, the bytes saved against
+the CPU time spent compressing. Use it to choose `COMPRESSION_PROFILE` and
+`COMPRESSION_ROUTE_PROFILES`.
+
+Usage:
+    python -m benchmarks.bench_compression --rows 20,200,1000 --output compression.json
+"""
+# Standard library imports
+import argparse
+import json
+import time
+# Local imports
+from benchmarks.datagen import generate_characters
+from services.compression import PROFILES, available_encodings, compress
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Measure compression ratio against CPU time per encoding.")
+    parser.add_argument("--rows", default="20,200,1000",
+                        help="Comma separated page sizes to encode (default: 20,200,1000).")
+    parser.add_argument("--repeat", type=int, default=20, help="Compressions per measurement (default: 20).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data.")
+    parser.add_argument("--output", default=None, help="Optional file to write the JSON results to.")
+    return parser.parse_args(argv)
+
+
+def build_payload(rows, seed):
+    """A list-characters style response body with `rows` characters."""
+    characters = next(generate_characters(rows, seed=seed, batch_size=rows))
+    return json.dumps({"characters": characters, "total": rows, "skip": 0, "limit": rows}).encode("utf-8")
+
+
+def measure(payload, encoding, level, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        compressed = compress(payload, encoding, level)
+    cpu_ms = (time.process_time() - start) * 1000 / repeat
+    return {
+        "compressed_bytes": len(compressed),
+        "ratio": round(len(payload) / len(compressed), 2),
+        "saved_bytes": len(payload) - len(compressed),
+        "cpu_ms": round(cpu_ms, 3),
+        "saved_kb_per_cpu_ms": round((len(payload) - len(compressed)) / 1024 / max(cpu_ms, 1e-6), 1),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for rows in [int(value) for value in args.rows.split(",")]:
+        payload = build_payload(rows, args.seed)
+        for encoding in available_encodings():
+            for profile, levels in PROFILES.items():
+                result = {"rows": rows, "raw_bytes": len(payload), "encoding": encoding, "profile": profile,
+                          "level": levels[encoding], **measure(payload, encoding, levels[encoding], args.repeat)}
+                results.append(result)
+                print(f"{rows:>6} rows {encoding:>5} {profile:>8}: {result['raw_bytes']:>9} -> "
+                      f"{result['compressed_bytes']:>8} bytes (x{result['ratio']}) in {result['cpu_ms']} ms CPU")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
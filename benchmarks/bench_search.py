@@ -0,0 +1,103 @@
+"""
+Full-text search benchmark.
+
+Seeds a SQLite (or local PostgreSQL) database with synthetic characters and
+compares the `q=` full-text search (FTS5 / tsvector, ranked and paginated)
+against `ilike '%term%'` filtering: on `name` alone, as `filter-characters`
+does today, and across every descriptive field, the only alternative for
+fields like nickname, symbol, animal or strength.
+
+Usage:
+    python -m benchmarks.bench_search --rows 100000 --output search.json
+    python -m benchmarks.bench_search --database-url postgresql://localhost/got_bench --rows 1000000
+"""
+# Standard library imports
+import argparse
+import json
+import os
+import tempfile
+import time
+# Third-party imports
+from sqlalchemy import create_engine, func, or_, select
+from sqlalchemy.orm import Session
+# Local imports
+from benchmarks.datagen import generate_characters, write_to_database
+from models.model_tables import Character
+from services.search import SEARCH_FIELDS, search_matches
+
+QUERIES = ["stark", "arya", "direwolf", "queen of", "intelligence", "jon snow", "lann"]
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Compare full-text search against ilike filtering.")
+    parser.add_argument("--database-url", default=None,
+                        help="Local database URL (default: a fresh SQLite file in a temp directory).")
+    parser.add_argument("--rows", type=int, default=100000, help="Characters to seed (default: 100000).")
+    parser.add_argument("--queries", default=",".join(QUERIES), help="Comma separated search strings.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query and method (default: 5).")
+    parser.add_argument("--limit", type=int, default=20, help="Page size (default: 20).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data.")
+    parser.add_argument("--output", default=None, help="Optional file to write the JSON results to.")
+    return parser.parse_args(argv)
+
+
+def full_text(session, text_query, limit):
+    matches = search_matches(session, text_query)
+    query = select(Character, matches.c.score).join(matches, Character.id == matches.c.id)
+    total = session.scalar(select(func.count()).select_from(matches))
+    rows = session.execute(query.order_by(matches.c.score.desc(), Character.id).limit(limit)).all()
+    return total, len(rows)
+
+
+def ilike(session, text_query, limit, fields):
+    conditions = [or_(*[getattr(Character, field).ilike(f"%{term}%") for field in fields])
+                  for term in text_query.lower().split()]
+    total = session.scalar(select(func.count()).select_from(Character).where(*conditions))
+    rows = session.execute(select(Character).where(*conditions).order_by(Character.id).limit(limit)).all()
+    return total, len(rows)
+
+
+def timed(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best * 1000
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'search_bench.db')}"
+    engine = create_engine(database_url)
+    Character.__table__.drop(engine, checkfirst=True)
+    Character.__table__.create(engine)
+    with engine.begin() as connection:
+        write_to_database(connection, Character.__table__, generate_characters(args.rows, seed=args.seed))
+
+    methods = {
+        "full_text": lambda session, q: full_text(session, q, args.limit),
+        "ilike_name": lambda session, q: ilike(session, q, args.limit, ("name",)),
+        "ilike_all_fields": lambda session, q: ilike(session, q, args.limit, SEARCH_FIELDS),
+    }
+    results = []
+    with Session(engine) as session:
+        if engine.dialect.name == "sqlite":
+            # Builds the FTS5 table outside the timed runs.
+            full_text(session, "warmup", 1)
+        for text_query in args.queries.split(","):
+            for method, function in methods.items():
+                (total, returned), best_ms = timed(lambda: function(session, text_query), args.repeat)
+                results.append({"rows": args.rows, "query": text_query, "method": method,
+                                "matches": total, "best_ms": round(best_ms, 3)})
+                print(f"{text_query:>14} {method:>17}: {total:>8} matches in {best_ms:9.3f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
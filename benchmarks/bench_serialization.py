@@ -0,0 +1,70 @@
+"""
+Response format benchmark.
+
+Encodes and decodes `/characters` pages as JSON, MessagePack and CBOR (the
+binary formats only when `msgpack` / `cbor2` are installed) and reports the
+payload size and the CPU time per page for each side.
+
+Usage:
+    python -m benchmarks.bench_serialization --rows 100,1000,10000 --output formats.json
+"""
+# Standard library imports
+import argparse
+import json
+import time
+# Local imports
+from benchmarks.datagen import generate_characters
+from services.serialization import cbor2, msgpack
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Compare JSON, MessagePack and CBOR encode/decode cost.")
+    parser.add_argument("--rows", default="100,1000,10000",
+                        help="Comma separated page sizes (default: 100,1000,10000).")
+    parser.add_argument("--repeat", type=int, default=10, help="Round trips per measurement (default: 10).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data.")
+    parser.add_argument("--output", default=None, help="Optional file to write the JSON results to.")
+    return parser.parse_args(argv)
+
+
+def formats():
+    """(name, encode, decode) for every available format."""
+    available = [("json", lambda payload: json.dumps(payload, separators=(",", ":")).encode("utf-8"), json.loads)]
+    if msgpack is not None:
+        available.append(("msgpack", msgpack.packb, msgpack.unpackb))
+    if cbor2 is not None:
+        available.append(("cbor", cbor2.dumps, cbor2.loads))
+    return available
+
+
+def timed(function, argument, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        result = function(argument)
+    return result, (time.process_time() - start) * 1000 / repeat
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = []
+    for rows in [int(value) for value in args.rows.split(",")]:
+        characters = next(generate_characters(rows, seed=args.seed, batch_size=rows))
+        payload = {"total": rows, "skip": 0, "limit": rows, "data": characters}
+        for name, encode, decode in formats():
+            data, encode_ms = timed(encode, payload, args.repeat)
+            decoded, decode_ms = timed(decode, data, args.repeat)
+            assert decoded == payload, f"{name} did not round-trip"
+            result = {"rows": rows, "format": name, "bytes": len(data),
+                      "encode_ms": round(encode_ms, 3), "decode_ms": round(decode_ms, 3)}
+            results.append(result)
+            print(f"{rows:>7} rows {name:>8}: {len(data):>10} bytes, encode {result['encode_ms']:>9} ms, "
+                  f"decode {result['decode_ms']:>9} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
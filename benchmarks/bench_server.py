@@ -0,0 +1,188 @@
+"""
+HTTP server benchmark: the development server against gunicorn's worker classes.
+
+Seeds a SQLite database, starts each server as a subprocess on a free port and
+drives it over real sockets with concurrent keep-alive clients for a fixed
+time, reporting throughput and latency percentiles per server. "gunicorn" uses
+gunicorn.conf.py as is (gthread workers), "gevent" the same config with
+GUNICORN_WORKER_CLASS=gevent. With `--streams`, that many clients hold
+/characters/subscribe streams open during the load, as SSE subscribers would.
+
+Usage:
+    python -m benchmarks.bench_server --rows 10000 --concurrency 16 --seconds 10
+    python -m benchmarks.bench_server --servers gunicorn,gevent --streams 32
+    python -m benchmarks.bench_server --servers gunicorn --gunicorn-args="--workers 4 --threads 8"
+"""
+# Standard library imports
+import argparse
+import base64
+import http.client
+import json
+import os
+import random
+import shlex
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+# Local imports
+from benchmarks.datagen import generate_characters
+from benchmarks.run_benchmarks import BENCH_EMAIL, BENCH_PASSWORD, summarize
+
+SERVERS = ("dev", "gunicorn", "gevent")
+AUTHORIZATION = "Basic " + base64.b64encode(f"{BENCH_EMAIL}:{BENCH_PASSWORD}".encode()).decode()
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Compare the development server with gunicorn over HTTP.")
+    parser.add_argument("--servers", default=",".join(SERVERS), help="Comma separated servers to run (default: all).")
+    parser.add_argument("--rows", type=int, default=10000, help="Characters to seed (default: 10000).")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent client connections (default: 16).")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Load duration per server (default: 10).")
+    parser.add_argument("--gunicorn-args", default="", help="Extra gunicorn command line options.")
+    parser.add_argument("--streams", type=int, default=0,
+                        help="Subscription streams held open during the load (default: 0).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data.")
+    parser.add_argument("--output", default=None, help="Optional file to write the JSON results to.")
+    return parser.parse_args(argv)
+
+
+def seed_database(path, rows, seed):
+    """Create a SQLite database with `rows` characters and the benchmark user (cheap bcrypt cost)."""
+    from passlib.hash import bcrypt
+    from sqlalchemy import create_engine, insert
+    from config.database import db
+    from models.model_tables import Character
+    from schemas.schema import User
+
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for batch in generate_characters(rows, seed=seed):
+            connection.execute(insert(Character), batch)
+        connection.execute(insert(User), [{"name": "bench", "email": BENCH_EMAIL,
+                                           "password": bcrypt.using(rounds=4).hash(BENCH_PASSWORD)}])
+    engine.dispose()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(server, port, env, gunicorn_args):
+    if server == "dev":
+        command = [sys.executable, "app.py"]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{port}", *shlex.split(gunicorn_args)]
+    if server == "gevent":
+        env = {**env, "GUNICORN_WORKER_CLASS": "gevent"}
+    process = subprocess.Popen(command, env={**env, "PORT": str(port), "HOST": "127.0.0.1"},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return process
+        except OSError:
+            if process.poll() is not None:
+                raise SystemExit(f"{server} server exited with status {process.returncode}")
+            time.sleep(0.2)
+    process.kill()
+    raise SystemExit(f"{server} server did not start listening on port {port}")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def open_streams(port, count):
+    """Open `count` /characters/subscribe streams and return their sockets; they stay open until closed."""
+    sockets = []
+    for _ in range(count):
+        sock = socket.create_connection(("127.0.0.1", port))
+        sock.sendall(f"GET /characters/subscribe HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+                     f"Authorization: {AUTHORIZATION}\r\n\r\n".encode())
+        sockets.append(sock)
+    return sockets
+
+
+def run_load(port, rows, concurrency, seconds, seed):
+    """Issue authenticated get-by-id requests from `concurrency` keep-alive connections."""
+    headers = {"Authorization": AUTHORIZATION}
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(number):
+        rng = random.Random(seed + number)
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        mine, failed = [], 0
+        while time.monotonic() < deadline:
+            before = time.perf_counter()
+            try:
+                connection.request("GET", f"/characters/get-characters-id/{rng.randint(1, rows)}", headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+                if response.will_close:
+                    connection.close()
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+            mine.append(time.perf_counter() - before)
+        connection.close()
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, errors[0])
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    database = os.path.join(tempfile.mkdtemp(), "server_bench.db")
+    seed_database(database, args.rows, args.seed)
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}", "RATE_LIMIT_ENABLED": "false", "DEBUG": "false"}
+
+    results = {}
+    for server in [name.strip() for name in args.servers.split(",") if name.strip()]:
+        if server not in SERVERS:
+            raise SystemExit(f"Unknown server: {server}")
+        port = free_port()
+        process = start_server(server, port, env, args.gunicorn_args)
+        streams = []
+        try:
+            run_load(port, args.rows, args.concurrency, 1.0, args.seed)  # warm up
+            streams = open_streams(port, args.streams)
+            results[server] = run_load(port, args.rows, args.concurrency, args.seconds, args.seed)
+        finally:
+            for sock in streams:
+                sock.close()
+            stop_server(process)
+        print(f"{server:>8}: {json.dumps(results[server])}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "concurrency": args.concurrency, "streams": args.streams,
+                       "results": results}, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
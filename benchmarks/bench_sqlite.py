@@ -0,0 +1,128 @@
+"""
+SQLite profile benchmark: concurrent reads and writes, default settings against the tuned profile.
+
+For each profile, seeds a fresh SQLite file and runs reader threads (point
+lookups by id) alongside writer threads (the update endpoint's statements:
+an UPDATE ... RETURNING plus the outbox insert, then a commit) for a fixed
+time, through the same Flask-SQLAlchemy setup the app uses. Reports
+throughput, latency percentiles and failed operations ("database is
+locked") for each side.
+
+Usage:
+    python -m benchmarks.bench_sqlite --rows 100000 --readers 8 --writers 4 --seconds 10
+"""
+# Standard library imports
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+# Third-party imports
+from flask import Flask
+from sqlalchemy import create_engine, insert, select
+# Local imports
+from benchmarks.datagen import generate_characters
+from benchmarks.run_benchmarks import summarize
+from config.database import db
+from config.sqlite import SQLITE_PROFILES, configure_sqlite, init_sqlite
+from models.model_tables import Character, CharacterChange
+from services.changes import record_change
+from services.writes import update_character
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Compare SQLite profiles under concurrent reads and writes.")
+    parser.add_argument("--profiles", default=",".join(SQLITE_PROFILES), help="Comma separated profiles to run.")
+    parser.add_argument("--rows", type=int, default=100000, help="Characters to seed (default: 100000).")
+    parser.add_argument("--readers", type=int, default=8, help="Reader threads (default: 8).")
+    parser.add_argument("--writers", type=int, default=4, help="Writer threads (default: 4).")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration per profile (default: 10).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data.")
+    parser.add_argument("--output", default=None, help="Optional file to write the JSON results to.")
+    return parser.parse_args(argv)
+
+
+def make_app(path, profile, rows, seed):
+    engine = create_engine(f"sqlite:///{path}")
+    Character.__table__.create(engine)
+    CharacterChange.__table__.create(engine)
+    with engine.begin() as connection:
+        for batch in generate_characters(rows, seed=seed):
+            connection.execute(insert(Character), batch)
+    engine.dispose()
+
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}", SQLITE_PROFILE=profile,
+                      SQLITE_READ_POOL_SIZE=16)
+    configure_sqlite(app)
+    db.init_app(app)
+    init_sqlite(app, db)
+    return app
+
+
+def run_profile(app, args):
+    deadline = time.monotonic() + args.seconds
+    results = {"read": ([], [0]), "write": ([], [0])}
+    lock = threading.Lock()
+
+    def read(rng):
+        db.session.scalar(select(Character).where(Character.id == rng.randint(1, args.rows)))
+        db.session.commit()
+
+    def write(rng):
+        row, _ = update_character(db.session, rng.randint(1, args.rows), {"age": rng.randint(1, 90)})
+        record_change(db.session, "update", row)
+        db.session.commit()
+
+    def worker(kind, operation, number):
+        rng = random.Random(args.seed + number)
+        latencies, errors = [], 0
+        with app.app_context():
+            while time.monotonic() < deadline:
+                before = time.perf_counter()
+                try:
+                    operation(rng)
+                except Exception:
+                    db.session.rollback()
+                    errors += 1
+                latencies.append(time.perf_counter() - before)
+        with lock:
+            results[kind][0].extend(latencies)
+            results[kind][1][0] += errors
+
+    threads = ([threading.Thread(target=worker, args=("read", read, n)) for n in range(args.readers)]
+               + [threading.Thread(target=worker, args=("write", write, 1000 + n)) for n in range(args.writers)])
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {kind: summarize(latencies, elapsed, errors[0]) for kind, (latencies, errors) in results.items()}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    directory = tempfile.mkdtemp()
+    report = {}
+    for profile in [name.strip() for name in args.profiles.split(",") if name.strip()]:
+        app = make_app(os.path.join(directory, f"{profile}.db"), profile, args.rows, args.seed)
+        report[profile] = run_profile(app, args)
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+        for kind, stats in report[profile].items():
+            print(f"{profile:>8} {kind:>5}: {json.dumps(stats)}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "readers": args.readers, "writers": args.writers, "results": report},
+                      f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
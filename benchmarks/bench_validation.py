@@ -0,0 +1,79 @@
+"""
+Request validation benchmark.
+
+Parses typical query strings and JSON bodies exactly as the routes do (through
+APIFairy's webargs parser inside a request context) and reports the
+validation cost per request with the precompiled fast path and with plain
+marshmallow.
+
+Usage:
+    python -m benchmarks.bench_validation --iterations 20000 --output validation.json
+"""
+# Standard library imports
+import argparse
+import json
+import time
+# Third-party imports
+from apifairy.decorators import parser
+from flask import Flask, request
+# Local imports
+from schemas.compiled import CompiledSchema
+from schemas.schema import (CharacterSchema, ChangesQuerySchema, FilterCharactersQuerySchema,
+                            MultiGetCharactersBodySchema, MultiGetCharactersQuerySchema, SortRequestSchema,
+                            UserSchema)
+
+CASES = [
+    ("list-characters", CharacterSchema, "query", "/?limit=50&skip=100", None),
+    ("filter-characters", FilterCharactersQuerySchema, "query",
+     "/?name=arya&house=stark&age_min=10&age_max=40&facets=true", None),
+    ("characters-sort", SortRequestSchema, "query", "/?sort_by=age&sort_order=desc", None),
+    ("create-character", UserSchema, "query", "/?name=Arya&house=Stark&role=Assassin&age=18&strength=Agility", None),
+    ("changes", ChangesQuerySchema, "query", "/?since=1200&limit=100&wait=5", None),
+    ("get-characters-ids (query)", MultiGetCharactersQuerySchema, "query",
+     "/?ids=" + ",".join(str(i) for i in range(1, 101)), None),
+    ("get-characters-ids (body)", MultiGetCharactersBodySchema, "json", "/", {"ids": list(range(1, 101))}),
+]
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    cli = argparse.ArgumentParser(description="Measure request validation overhead per request.")
+    cli.add_argument("--iterations", type=int, default=20000, help="Parses per case and mode (default: 20000).")
+    cli.add_argument("--output", default=None, help="Optional file to write the JSON results to.")
+    return cli.parse_args(argv)
+
+
+def time_parse(schema, location, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parser.parse(schema, request, location=location)
+    return (time.perf_counter() - start) * 1e6 / iterations
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    app = Flask(__name__)
+    results = []
+    for name, schema_class, location, url, body in CASES:
+        schema = schema_class()
+        with app.test_request_context(url, method="POST", json=body):
+            timings = {}
+            for mode, fast_path in (("marshmallow", False), ("compiled", True)):
+                CompiledSchema.fast_path = fast_path
+                time_parse(schema, location, min(1000, args.iterations))  # warm up
+                timings[mode] = time_parse(schema, location, args.iterations)
+        CompiledSchema.fast_path = True
+        result = {"case": name, "marshmallow_us": round(timings["marshmallow"], 2),
+                  "compiled_us": round(timings["compiled"], 2),
+                  "speedup": round(timings["marshmallow"] / timings["compiled"], 2)}
+        results.append(result)
+        print(f"{name:>28}: marshmallow {result['marshmallow_us']:>8} us, compiled {result['compiled_us']:>8} us "
+              f"(x{result['speedup']})")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Synthetic data generator for scale testing the characters and users tables.
+
+Rows are drawn in vectorised batches with NumPy, using distributions modelled on
+`characters.json` (skewed houses and roles, a share of houseless characters,
+ages clustered around adulthood, death recorded as a season number or null).
+Output goes straight into a database with batched executemany inserts, or to
+NDJSON/CSV files.
+
+Usage:
+    python -m benchmarks.datagen --rows 1000000 --database-url sqlite:///./scale.db
+    python -m benchmarks.datagen --rows 1000000 --format ndjson --output characters.ndjson
+    python -m benchmarks.datagen --rows 0 --users 100000 --database-url sqlite:///./scale.db
+"""
+# Standard library imports
+import argparse
+import contextlib
+import csv
+import json
+import sys
+import time
+
+# Third-party imports
+import numpy as np
+
+CHARACTER_COLUMNS = ["id", "name", "house", "animal", "symbol", "nickname", "role", "age", "death", "strength"]
+
+# House name, relative weight, animal, symbol. `None` is the houseless share seen in characters.json.
+HOUSES = [
+    ("Stark", 14, "Direwolf", "Wolf"),
+    ("Lannister", 10, None, "Lion"),
+    ("Baratheon", 9, "Stag", "Stag"),
+    ("Greyjoy", 8, "Kraken", "Kraken"),
+    ("Tyrell", 6, None, "Rose"),
+    ("Targaryen", 5, "Dragon", "Dragon"),
+    ("Martell", 4, "Viper", "Sun"),
+    ("Bolton", 4, None, "Flayed Man"),
+    ("Tully", 4, None, "Trout"),
+    ("Arryn", 3, None, "Falcon"),
+    ("Mormont", 3, "Bear", "Bear"),
+    ("Reed", 2, None, "Lizard-lion"),
+    ("Free Folk", 3, None, None),
+    ("Dothraki", 2, None, "Horse"),
+    (None, 23, "Raven", None),
+]
+ROLES = [
+    ("Knight", 14), ("Lord", 12), ("Lady", 10), ("Warrior", 10), ("Squire", 8), ("Servant", 8),
+    ("Mercenary", 6), ("King", 4), ("Queen", 3), ("Prince", 4), ("Princess", 3), ("Maester", 3),
+    ("Hand of the King", 1), ("Assassin", 2), ("Archer", 4), ("Captain", 3), ("Seer", 1),
+    ("Blacksmith", 2), ("Advisor", 2),
+]
+FIRST_NAMES = [
+    "Jon", "Arya", "Sansa", "Bran", "Robb", "Rickon", "Eddard", "Catelyn", "Tyrion", "Cersei", "Jaime",
+    "Tywin", "Daenerys", "Viserys", "Aegon", "Rhaenys", "Robert", "Stannis", "Renly", "Shireen", "Theon",
+    "Yara", "Euron", "Balon", "Margaery", "Loras", "Olenna", "Oberyn", "Ellaria", "Doran", "Roose",
+    "Ramsay", "Lysa", "Robin", "Jorah", "Lyanna", "Meera", "Jojen", "Brienne", "Samwell", "Gilly",
+    "Bronn", "Sandor", "Gregor", "Davos", "Melisandre", "Tormund", "Ygritte", "Missandei", "Podrick",
+]
+BASTARD_NAMES = {"Stark": "Snow", "Lannister": "Hill", "Baratheon": "Storm", "Greyjoy": "Pyke",
+                 "Tyrell": "Flowers", "Martell": "Sand", "Bolton": "Snow", "Tully": "Rivers", "Arryn": "Stone"}
+EPITHET_PREFIXES = ["The", "Lord of", "Queen of", "King of", "Shield of", "Breaker of", "Hound of"]
+EPITHET_SUFFIXES = ["North", "Imp", "Dragons", "Chains", "Winterfell", "Seven Kingdoms", "Iron Islands",
+                    "Night", "Storm", "Wall", "Rock", "Old Gods", "Narrow Sea"]
+STRENGTHS = [("Cunning", 30), ("Physically strong", 30), ("Intelligence", 20), ("Loyalty", 20)]
+
+USER_PASSWORD = "LoadTest@1"
+
+
+def _weights(pairs):
+    values = [pair[0] for pair in pairs]
+    weights = np.array([pair[1] for pair in pairs], dtype=np.float64)
+    return values, weights / weights.sum()
+
+
+def generate_character_batch(rng, start_id, count):
+    """Generate `count` character rows starting at `start_id` as a list of dictionaries."""
+    house_index = rng.choice(len(HOUSES), size=count, p=_weights(HOUSES)[1])
+    role_names, role_p = _weights(ROLES)
+    role_index = rng.choice(len(role_names), size=count, p=role_p)
+    strength_names, strength_p = _weights(STRENGTHS)
+    strength_index = rng.choice(len(strength_names), size=count, p=strength_p)
+    first_index = rng.integers(0, len(FIRST_NAMES), size=count)
+    # Ages cluster around young adults with a long tail of elders; children are rare.
+    ages = np.clip(rng.gamma(shape=6.0, scale=5.5, size=count), 1, 100).astype(np.int64)
+    missing_age = rng.random(count) < 0.03
+    # Roughly half of the characters are still alive; the rest die in one of eight seasons.
+    deaths = rng.integers(1, 9, size=count)
+    alive = rng.random(count) < 0.55
+    bastard = rng.random(count) < 0.08
+    has_nickname = rng.random(count) < 0.4
+    prefix_index = rng.integers(0, len(EPITHET_PREFIXES), size=count)
+    suffix_index = rng.integers(0, len(EPITHET_SUFFIXES), size=count)
+    ids = np.arange(start_id, start_id + count)
+
+    rows = []
+    for i in range(count):
+        house, _, animal, symbol = HOUSES[house_index[i]]
+        first = FIRST_NAMES[first_index[i]]
+        if house is None:
+            surname = None
+        elif bastard[i] and house in BASTARD_NAMES:
+            surname = BASTARD_NAMES[house]
+        else:
+            surname = house
+        character_id = int(ids[i])
+        rows.append({
+            "id": character_id,
+            # The id suffix keeps names unique so name-based filters stay selective at any scale.
+            "name": f"{first} {surname} {character_id}" if surname else f"{first} {character_id}",
+            "house": house,
+            "animal": animal,
+            "symbol": symbol,
+            "nickname": (f"{EPITHET_PREFIXES[prefix_index[i]]} {EPITHET_SUFFIXES[suffix_index[i]]}"
+                         if has_nickname[i] else None),
+            "role": role_names[role_index[i]],
+            "age": None if missing_age[i] else int(ages[i]),
+            "death": None if alive[i] else int(deaths[i]),
+            "strength": strength_names[strength_index[i]],
+        })
+    return rows
+
+
+def generate_characters(rows, seed=42, batch_size=50000, start_id=1):
+    """Yield batches of synthetic character rows until `rows` have been produced."""
+    rng = np.random.default_rng(seed)
+    produced = 0
+    while produced < rows:
+        count = min(batch_size, rows - produced)
+        yield generate_character_batch(rng, start_id + produced, count)
+        produced += count
+
+
+def generate_users(count, password_hash, batch_size=50000, start_id=1):
+    """Yield batches of user rows that all share one pre-computed password hash."""
+    produced = 0
+    while produced < count:
+        size = min(batch_size, count - produced)
+        yield [
+            {"id": user_id, "name": f"Load Test {user_id}", "email": f"loadtest{user_id}@example.com",
+             "password": password_hash}
+            for user_id in range(start_id + produced, start_id + produced + size)
+        ]
+        produced += size
+
+
+def hash_password(password=USER_PASSWORD, rounds=12):
+    """bcrypt-hash the shared load test password once, so user generation stays fast."""
+    from passlib.hash import bcrypt
+    return bcrypt.using(rounds=rounds).hash(password)
+
+
+def write_to_database(connection, table, batches):
+    """Insert every batch with a single executemany round trip; returns the row count."""
+    total = 0
+    for batch in batches:
+        connection.execute(table.insert(), batch)
+        total += len(batch)
+    return total
+
+
+def write_ndjson(handle, batches):
+    """Write batches as newline delimited JSON; returns the row count."""
+    total = 0
+    for batch in batches:
+        handle.write("".join(json.dumps(row) + "\n" for row in batch))
+        total += len(batch)
+    return total
+
+
+def write_csv(handle, batches, columns):
+    """Write batches as CSV with a header row; returns the row count."""
+    writer = csv.DictWriter(handle, fieldnames=columns)
+    writer.writeheader()
+    total = 0
+    for batch in batches:
+        writer.writerows(batch)
+        total += len(batch)
+    return total
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Generate synthetic characters and users for scale tests.")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of characters to generate.")
+    parser.add_argument("--users", type=int, default=0, help="Number of load test users to generate.")
+    parser.add_argument("--format", choices=["db", "ndjson", "csv"], default="db", help="Output format.")
+    parser.add_argument("--database-url", default="sqlite:///./sqlite_database.db",
+                        help="Target database for --format db.")
+    parser.add_argument("--output", default="-", help="Output file for ndjson/csv ('-' for stdout).")
+    parser.add_argument("--users-output", default=None, help="Output file for users in ndjson/csv format.")
+    parser.add_argument("--truncate", action="store_true", help="Delete existing rows before inserting.")
+    parser.add_argument("--start-id", type=int, default=1, help="First character and user id.")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Rows generated and written per batch.")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12,
+                        help=f"bcrypt cost of the shared user password '{USER_PASSWORD}'.")
+    return parser.parse_args(argv)
+
+
+def _open(path):
+    """Open `path` for writing; "-" is stdout, which is left open for the next writer."""
+    return contextlib.nullcontext(sys.stdout) if path == "-" else open(path, "w", newline="")
+
+
+def main(argv=None):
+    """Generate the requested rows and write them to the chosen destination."""
+    args = parse_args(argv)
+    started = time.perf_counter()
+    characters = generate_characters(args.rows, seed=args.seed, batch_size=args.batch_size,
+                                     start_id=args.start_id)
+    users = (generate_users(args.users, hash_password(rounds=args.bcrypt_rounds),
+                            batch_size=args.batch_size, start_id=args.start_id) if args.users else iter(()))
+
+    if args.format == "db":
+        from sqlalchemy import create_engine
+        from models.model_tables import Character
+        from schemas.schema import User
+
+        engine = create_engine(args.database_url)
+        Character.__table__.create(engine, checkfirst=True)
+        User.__table__.create(engine, checkfirst=True)
+        with engine.begin() as connection:
+            if args.truncate:
+                connection.execute(Character.__table__.delete())
+                if args.users:
+                    connection.execute(User.__table__.delete())
+            written = write_to_database(connection, Character.__table__, characters)
+            written_users = write_to_database(connection, User.__table__, users)
+    else:
+        writer = write_ndjson if args.format == "ndjson" else write_csv
+        extra = () if args.format == "ndjson" else (CHARACTER_COLUMNS,)
+        with _open(args.output) as handle:
+            written = writer(handle, characters, *extra)
+        written_users = 0
+        if args.users:
+            extra = () if args.format == "ndjson" else (["id", "name", "email", "password"],)
+            with _open(args.users_output or "-") as handle:
+                written_users = writer(handle, users, *extra)
+
+    elapsed = time.perf_counter() - started
+    print(f"Generated {written} characters and {written_users} users in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Endpoint benchmark runner.
+
+Seeds a local SQLite (or local PostgreSQL) database with synthetic characters at
+several dataset sizes and measures throughput and p50/p95/p99 latency for every
+API endpoint through the Flask test client. Results are written as JSON so runs
+from different commits can be compared.
+
+Usage:
+    python -m benchmarks.run_benchmarks --sizes 1000,100000,1000000 --output bench.json
+    python -m benchmarks.run_benchmarks --baseline old.json --output new.json
+"""
+# Standard library imports
+import argparse
+import base64
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+# Local imports
+from benchmarks.datagen import HOUSES, ROLES, generate_characters
+
+HOUSE_NAMES = [house[0] for house in HOUSES if house[0]]
+ROLE_NAMES = [role[0] for role in ROLES]
+
+DEFAULT_SIZES = "1000,100000,1000000"
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "Bench@1234"
+ENDPOINTS = ["list", "get", "filter", "sort", "create", "update", "delete", "register", "token"]
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Benchmark every API endpoint against a local database.")
+    parser.add_argument("--database-url", default=None,
+                        help="Local database URL (default: a fresh SQLite file in a temp directory).")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Comma separated dataset sizes (default: {DEFAULT_SIZES}).")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help="Comma separated endpoints to run (default: all).")
+    parser.add_argument("--iterations", type=int, default=200,
+                        help="Maximum requests per endpoint and size (default: 200).")
+    parser.add_argument("--max-seconds", type=float, default=20.0,
+                        help="Time budget per endpoint and size; at least one request always runs.")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4,
+                        help="bcrypt cost for the seeded benchmark user, so HTTP basic auth does not "
+                             "dominate every measurement (default: 4).")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for synthetic data.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--baseline", default=None, help="Previous results file to compare against.")
+    return parser.parse_args(argv)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, elapsed, errors):
+    """Turn raw latencies (seconds) into the reported statistics (milliseconds)."""
+    ordered = sorted(latencies)
+    to_ms = lambda value: round(value * 1000.0, 3) if value is not None else None
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed > 0 else None,
+        "p50_ms": to_ms(percentile(ordered, 50)),
+        "p95_ms": to_ms(percentile(ordered, 95)),
+        "p99_ms": to_ms(percentile(ordered, 99)),
+        "max_ms": to_ms(ordered[-1]) if ordered else None,
+    }
+
+
+def measure(request_factory, iterations, max_seconds, expected_status):
+    """
+    Issue requests until the iteration count or time budget is exhausted.
+
+    Only responses with `expected_status` count towards throughput and latency; others are errors.
+    """
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call = request_factory()
+        before = time.perf_counter()
+        response = call()
+        latency = time.perf_counter() - before
+        if response.status_code == expected_status:
+            latencies.append(latency)
+        else:
+            errors += 1
+        if time.perf_counter() - started >= max_seconds:
+            break
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def seed(db, Character, User, size, args):
+    """Replace the characters table with `size` synthetic rows and ensure the benchmark user exists."""
+    from passlib.hash import bcrypt
+    from sqlalchemy import insert
+
+    db.session.query(Character).delete()
+    db.session.query(User).delete()
+    for batch in generate_characters(size, seed=args.seed):
+        db.session.execute(insert(Character), batch)
+    password_hash = bcrypt.using(rounds=args.bcrypt_rounds).hash(BENCH_PASSWORD)
+    db.session.add(User(name="bench", email=BENCH_EMAIL, password=password_hash))
+    db.session.commit()
+
+
+def run_size(client, size, args, endpoints):
+    """Benchmark the selected endpoints against a dataset of `size` rows."""
+    rng = random.Random(args.seed + size)
+    credentials = base64.b64encode(f"{BENCH_EMAIL}:{BENCH_PASSWORD}".encode()).decode()
+    headers = {"Authorization": f"Basic {credentials}"}
+    created_ids = []
+    counter = itertools.count()
+
+    def create():
+        def call():
+            response = client.post("/characters/add/create-new-characters", headers=headers,
+                                   query_string={"name": f"Bench {next(counter)}", "house": rng.choice(HOUSE_NAMES),
+                                                 "role": rng.choice(ROLE_NAMES), "age": rng.randint(1, 90)})
+            if response.status_code == 201:
+                created_ids.append(response.get_json()["id"])
+            return response
+        return call
+
+    def delete():
+        character_id = created_ids.pop() if created_ids else rng.randint(1, size)
+        return lambda: client.delete(f"/characters/delete-characters/{character_id}", headers=headers,
+                                     query_string={"id": character_id})
+
+    factories = {
+        "list": (lambda: (lambda: client.get("/characters/list-characters", headers=headers,
+                                             query_string={"skip": rng.randint(0, max(size - 20, 0)),
+                                                           "limit": 20})), 200),
+        "get": (lambda: (lambda: client.get(f"/characters/get-characters-id/{rng.randint(1, size)}",
+                                            headers=headers,
+                                            query_string={"include_house": "true", "include_role": "true"})), 200),
+        "filter": (lambda: (lambda: client.get("/characters/filter-characters", headers=headers,
+                                               query_string={"house": rng.choice(HOUSE_NAMES),
+                                                             "role": rng.choice(ROLE_NAMES),
+                                                             "age_min": 30, "age_max": 35})), 200),
+        "sort": (lambda: (lambda: client.post("/characters/characters-sort", headers=headers,
+                                              query_string={"sort_by": rng.choice(["name", "age", "house"]),
+                                                            "sort_order": rng.choice(["asc", "desc"])})), 200),
+        "create": (create, 201),
+        "update": (lambda: (lambda: client.put(f"/characters/update-character/{rng.randint(1, size)}",
+                                               headers=headers,
+                                               query_string={"age": rng.randint(1, 90)})), 200),
+        "delete": (delete, 200),
+        "register": (lambda: (lambda: client.post("/auth/register", query_string={
+            "name": "bench", "email": f"bench{size}_{next(counter)}@example.com",
+            "password": BENCH_PASSWORD, "confirm_password": BENCH_PASSWORD})), 201),
+        "token": (lambda: (lambda: client.post("/auth/token", query_string={
+            "email": BENCH_EMAIL, "password": BENCH_PASSWORD})), 200),
+    }
+
+    results = {}
+    for name in endpoints:
+        factory, expected_status = factories[name]
+        results[name] = measure(factory, args.iterations, args.max_seconds, expected_status)
+        print(f"  {name:<9} {json.dumps(results[name])}", file=sys.stderr)
+    return results
+
+
+def git_commit():
+    """Return the current git commit hash, if available."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current):
+    """Print the relative change in throughput and p95 for every shared measurement."""
+    for size, endpoints in current["results"].items():
+        for name, stats in endpoints.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if not before or not before.get("p95_ms") or not before.get("throughput_rps"):
+                continue
+            p95_delta = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100.0
+            rps_delta = (stats["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] * 100.0
+            print(f"{size:>8} {name:<9} p95 {p95_delta:+7.1f}%  throughput {rps_delta:+7.1f}%")
+
+
+def main(argv=None):
+    """Seed, benchmark every size and write the JSON report."""
+    args = parse_args(argv)
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    if not database_url.startswith(("sqlite", "postgresql")):
+        raise SystemExit("Benchmarks only run against a local SQLite or PostgreSQL database.")
+
+    # The app reads DATABASE_URL at import time, so it must be set before importing it.
+    os.environ["DATABASE_URL"] = database_url
+    # Measure the endpoints themselves, not the rate limiter's 429s.
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    from app import app, db
+    from models.model_tables import Character
+    from schemas.schema import User
+
+    app.config["TESTING"] = True
+    endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        raise SystemExit(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": database_url.split("://", 1)[0],
+        "iterations": args.iterations,
+        "max_seconds": args.max_seconds,
+        "results": {},
+    }
+
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        for size in [int(value) for value in args.sizes.split(",") if value.strip()]:
+            print(f"Seeding {size} characters", file=sys.stderr)
+            started = time.perf_counter()
+            seed(db, Character, User, size, args)
+            print(f"  seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+            report["results"][str(size)] = run_size(client, size, args, endpoints)
+
+    with open(args.output, "w") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            compare(json.load(handle), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ from sqlalchemy.ext.declarative import declarative_base
 from flask_sqlalchemy import SQLAlchemy
 # Standard library imports
 import os
+# Local imports
+from config.sqlite import RoutingSession, apply_sqlite_profile, sqlite_profile
 
 
 
@@ -15,8 +17,11 @@ SQLALCHEMY_DATABASE_URL = 'sqlite:///./sqlite_database.db'  # SQLite URI for moc
 
 # Initialize the SQLAlchemy engine and session maker
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+apply_sqlite_profile(engine, sqlite_profile(os.getenv('SQLITE_PROFILE', 'default')))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-db = SQLAlchemy()
+# Objects stay readable after commit without a reload query; sessions are request scoped anyway.
+# RoutingSession only changes anything when the tuned SQLite profile adds a writer bind (config/sqlite.py).
+db = SQLAlchemy(session_options={"expire_on_commit": False, "class_": RoutingSession})
 
 # Base class for model definitions
 Base = declarative_base()
@@ -0,0 +1,193 @@
+"""
+Tuned SQLite mode for single-node and edge deployments (`SQLITE_PROFILE=tuned`).
+
+SQLite's defaults favour safety on any filesystem over concurrency: a rollback
+journal (readers and the writer block each other), a full fsync per commit, a
+2 MB page cache and no wait when the database is locked. The "tuned" profile
+sets, on every new connection:
+
+- `journal_mode=WAL`: readers never block the writer, nor the writer readers;
+- `synchronous=NORMAL`: in WAL mode, commits no longer fsync (checkpoints
+  still do); a power loss can lose the last commits but never corrupts;
+- `mmap_size` and `cache_size`: reads come from memory-mapped pages and a
+  64 MB page cache instead of read() calls;
+- `busy_timeout`: wait for a lock instead of failing with "database is locked";
+- `temp_store=MEMORY`: sorts and temporary indexes stay in memory.
+
+SQLite allows one writer at a time, so rather than letting every pooled
+connection compete for the write lock, reads and writes get separate pools:
+the default engine serves reads (`SQLITE_READ_POOL_SIZE` connections), and a
+`sqlite_writer` bind holds a single connection that starts its transactions
+with `BEGIN IMMEDIATE`. `RoutingSession` sends a transaction to the writer as
+soon as it writes (a flush, an INSERT/UPDATE/DELETE, or a connection asked for
+with `session.connection(bind_arguments={"writer": True})`). A bare
+`get_bind()`, e.g. to read the dialect name, stays on the read pool.
+`WriterQueue` keeps any writer from waiting much longer than its turn, and a
+write never fails half-way because its transaction began as a read.
+"""
+# Standard library imports
+import threading
+import time
+import weakref
+from collections import deque
+# Third-party imports
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+WRITER_BIND_KEY = "sqlite_writer"
+# Writer engine -> its WriterQueue
+_writer_queues = weakref.WeakKeyDictionary()
+
+SQLITE_PROFILES = {
+    "default": {},
+    "tuned": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,  # 256 MB
+        "cache_size": -65536,  # in KiB: 64 MB
+        "busy_timeout": 5000,  # ms
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def sqlite_profile(name):
+    """The PRAGMA settings of profile `name`."""
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f"SQLITE_PROFILE must be one of {', '.join(SQLITE_PROFILES)}")
+    return SQLITE_PROFILES[name]
+
+
+def is_sqlite_file(url):
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def apply_sqlite_profile(engine, pragmas, begin_immediate=False):
+    """Set `pragmas` on every new connection of `engine`; optionally begin transactions with BEGIN IMMEDIATE."""
+    if not pragmas and not begin_immediate:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+        if begin_immediate:
+            # Let SQLAlchemy emit BEGIN itself (pysqlite would only begin at the first write).
+            dbapi_connection.isolation_level = None
+
+    if begin_immediate:
+        @event.listens_for(engine, "begin")
+        def begin(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+class WriterQueue:
+    """
+    Lock for the writer connection that never lets a writer wait much longer than `patience`.
+
+    The pool alone is not fair: a thread that returns the connection and asks for it again
+    straight away gets it back before a waiting thread wakes up, and can starve it for seconds.
+    Strict turn-taking avoids that but pays a thread wake-up per write, so writers may still
+    cut in line, except once the longest waiter has waited `patience` seconds: then the
+    connection is handed directly to it.
+    """
+
+    def __init__(self, patience=0.5):
+        self.patience = patience
+        self._lock = threading.Lock()
+        self._waiters = deque()  # [since, event, handed over]
+        self._held = False
+
+    def acquire(self):
+        with self._lock:
+            if not self._held:
+                self._held = True
+                return
+            waiter = [time.monotonic(), threading.Event(), False]
+            self._waiters.append(waiter)
+        while True:
+            waiter[1].wait(self.patience)
+            with self._lock:
+                if waiter[2]:
+                    return
+                if not self._held:
+                    self._held = True
+                    self._waiters.remove(waiter)
+                    return
+                waiter[1].clear()
+
+    def release(self):
+        with self._lock:
+            if self._waiters and time.monotonic() - self._waiters[0][0] >= self.patience:
+                waiter = self._waiters.popleft()
+                waiter[2] = True
+                waiter[1].set()
+                return
+            self._held = False
+            if self._waiters:
+                self._waiters[0][1].set()
+
+
+def configure_sqlite(app):
+    """Set up the read pool and the writer bind for the tuned profile. Call before `db.init_app(app)`."""
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    if app.config["SQLITE_PROFILE"] == "default" or not uri or not is_sqlite_file(uri):
+        return
+    sqlite_profile(app.config["SQLITE_PROFILE"])
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+        "pool_size": app.config["SQLITE_READ_POOL_SIZE"],
+    }
+    app.config["SQLALCHEMY_BINDS"] = {
+        **app.config.get("SQLALCHEMY_BINDS", {}),
+        WRITER_BIND_KEY: {"url": uri, "pool_size": 1, "max_overflow": 0, "pool_timeout": 30},
+    }
+
+
+def init_sqlite(app, db):
+    """Apply the profile's PRAGMAs to the app's SQLite engines. Call after `db.init_app(app)`."""
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    if not uri or not is_sqlite_file(uri):
+        return
+    pragmas = sqlite_profile(app.config["SQLITE_PROFILE"])
+    with app.app_context():
+        engines = db.engines
+        apply_sqlite_profile(engines[None], pragmas)
+        if WRITER_BIND_KEY in engines:
+            apply_sqlite_profile(engines[WRITER_BIND_KEY], pragmas, begin_immediate=True)
+            _writer_queues[engines[WRITER_BIND_KEY]] = WriterQueue()
+
+
+def writer_engine(db):
+    """The engine writes should use: the single-connection writer when configured, else the default."""
+    return db.engines.get(WRITER_BIND_KEY) or db.engine
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that moves a transaction to the SQLite writer bind once it writes."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, writer=False, **kwargs):
+        if bind is None:
+            writer_bind = self._db.engines.get(WRITER_BIND_KEY)
+            if writer_bind is not None and (WRITER_BIND_KEY in self.info or self._flushing
+                                            or isinstance(clause, UpdateBase) or writer):
+                if WRITER_BIND_KEY not in self.info:
+                    queue = _writer_queues.get(writer_bind)
+                    if queue is not None:
+                        queue.acquire()
+                    self.info[WRITER_BIND_KEY] = queue
+                return writer_bind
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _leave_writer(session, transaction):
+    if transaction.parent is None and WRITER_BIND_KEY in session.info:
+        queue = session.info.pop(WRITER_BIND_KEY)
+        if queue is not None:
+            queue.release()
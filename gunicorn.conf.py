@@ -0,0 +1,92 @@
+"""
+Gunicorn configuration for production: `gunicorn` (run from the project root) picks it up.
+
+Workers are sized from the CPUs this process may run on; threads per worker are a fixed
+count, since they mostly wait on the database and the worker count already scales with
+the CPUs. Every setting can be overridden from the environment:
+
+- GUNICORN_BIND (default 0.0.0.0:$PORT, PORT default 8087)
+- GUNICORN_WORKER_CLASS: "gthread" (default) or "gevent" (see below)
+- WEB_CONCURRENCY: worker processes (default 2 x CPUs + 1)
+- GUNICORN_THREADS: threads per gthread worker (default 4)
+- GUNICORN_WORKER_CONNECTIONS: concurrent connections per gevent worker (default 1000)
+- GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER: recycle a worker after that many
+  requests (default 1000, +/- up to 100 so workers do not all restart together)
+- GUNICORN_KEEPALIVE: seconds to hold idle keep-alive connections (default 5; keep it above
+  the idle timeout of the load balancer in front)
+- GUNICORN_BACKLOG: pending connections queued by the kernel (default 2048)
+- GUNICORN_TIMEOUT / GUNICORN_GRACEFUL_TIMEOUT (default 30 / 30 seconds)
+
+The app is imported once in the master (`preload_app`) and shared copy-on-write with
+the forked workers. Connections opened while importing are not shared: each worker
+drops its inherited pool, then opens its own while it warms up (services/warmup.py).
+
+Rate limit buckets kept in memory are per worker, which would multiply every limit by the
+number of workers, so unless RATE_LIMIT_STORE is set, more than one worker shares buckets
+in `rate_limits.db` next to the worker heartbeats (services/ratelimit.py).
+
+Under gthread every open stream (/characters/subscribe, long-polled or streamed
+/characters/changes) holds one of the worker's threads until the client leaves. The gevent
+worker runs each connection in a greenlet instead, so thousands of streams fit in one worker.
+It needs `gevent` and `psycogreen` (requirements.txt); both are patched in before the app is
+preloaded, so its locks, queues and PostgreSQL connections cooperate with the event loop.
+"""
+# Standard library imports
+import gc
+import os
+import tempfile
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "gevent":
+    # gunicorn would only patch in each worker, after the preloaded app created its locks and queues.
+    from gevent import monkey
+    monkey.patch_all()
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        return os.cpu_count() or 1
+
+
+wsgi_app = "app:app"
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', 8087)}")
+workers = int(os.getenv("WEB_CONCURRENCY", 2 * _cpu_count() + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+preload_app = True
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+backlog = int(os.getenv("GUNICORN_BACKLOG", 2048))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# Worker heartbeats go to a tmpfs when there is one, so a slow disk cannot stall them.
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+if workers > 1:
+    # Set before gunicorn preloads the app, which reads it in app.py.
+    os.environ.setdefault("RATE_LIMIT_STORE",
+                          f"sqlite:///{os.path.join(worker_tmp_dir or tempfile.gettempdir(), 'rate_limits.db')}")
+accesslog = os.getenv("GUNICORN_ACCESS_LOG")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def pre_fork(server, worker):
+    # Objects allocated by the preloaded app are never collected in the workers, so the garbage
+    # collector does not write to (and copy) the pages they live on.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app import app
+    from config.database import db, engine
+    with app.app_context():
+        db.engine.dispose(close=False)
+    engine.dispose(close=False)
+    if "character_shards" in app.extensions:
+        app.extensions["character_shards"].dispose()
+    # Warm this worker up in the background; /readyz reports 503 until it is done.
+    app.extensions["warmup"].start()
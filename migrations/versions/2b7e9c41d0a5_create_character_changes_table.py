@@ -0,0 +1,33 @@
+"""create character_changes outbox table
+
+Revision ID: 2b7e9c41d0a5
+Revises: 7f7815656a93
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b7e9c41d0a5'
+down_revision = '7f7815656a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('character_changes',
+    sa.Column('seq', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('character_id', sa.Integer(), nullable=False),
+    sa.Column('operation', sa.String(length=10), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+    op.create_index(op.f('ix_character_changes_character_id'), 'character_changes', ['character_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_character_changes_character_id'), table_name='character_changes')
+    op.drop_table('character_changes')
@@ -0,0 +1,58 @@
+"""add full-text search index for characters
+
+Revision ID: 4c1f9a2e7b36
+Revises: 2b7e9c41d0a5
+Create Date: 2026-10-19 14:05:12.530871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c1f9a2e7b36'
+down_revision = '2b7e9c41d0a5'
+branch_labels = None
+depends_on = None
+
+SEARCH_FIELDS = ('name', 'nickname', 'house', 'animal', 'symbol', 'role', 'strength')
+POSTGRES_WEIGHTS = {'name': 'A', 'nickname': 'A', 'house': 'B', 'animal': 'C', 'symbol': 'C', 'role': 'C',
+                    'strength': 'D'}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        vector = ' || '.join(
+            f"setweight(to_tsvector('simple', coalesce({field}, '')), '{POSTGRES_WEIGHTS[field]}')"
+            for field in SEARCH_FIELDS
+        )
+        op.execute(f"ALTER TABLE characters ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED")
+        op.create_index('ix_characters_search_vector', 'characters', ['search_vector'], postgresql_using='gin')
+    elif dialect == 'sqlite':
+        columns = ', '.join(SEARCH_FIELDS)
+        new_values = ', '.join(f'new.{field}' for field in SEARCH_FIELDS)
+        old_values = ', '.join(f'old.{field}' for field in SEARCH_FIELDS)
+        op.execute(f"CREATE VIRTUAL TABLE characters_fts USING fts5({columns}, content='characters', "
+                   f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+        op.execute(f"CREATE TRIGGER characters_fts_insert AFTER INSERT ON characters BEGIN "
+                   f"INSERT INTO characters_fts(rowid, {columns}) VALUES (new.id, {new_values}); END")
+        op.execute(f"CREATE TRIGGER characters_fts_delete AFTER DELETE ON characters BEGIN "
+                   f"INSERT INTO characters_fts(characters_fts, rowid, {columns}) "
+                   f"VALUES ('delete', old.id, {old_values}); END")
+        op.execute(f"CREATE TRIGGER characters_fts_update AFTER UPDATE ON characters BEGIN "
+                   f"INSERT INTO characters_fts(characters_fts, rowid, {columns}) "
+                   f"VALUES ('delete', old.id, {old_values}); "
+                   f"INSERT INTO characters_fts(rowid, {columns}) VALUES (new.id, {new_values}); END")
+        op.execute("INSERT INTO characters_fts(characters_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_characters_search_vector', table_name='characters')
+        op.drop_column('characters', 'search_vector')
+    elif dialect == 'sqlite':
+        for trigger in ('characters_fts_insert', 'characters_fts_delete', 'characters_fts_update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS characters_fts")
@@ -0,0 +1,29 @@
+"""create character_shards directory for sharded characters
+
+Revision ID: 6b1d4e8f2a73
+Revises: e3a7c5d19b82
+Create Date: 2026-10-19 21:04:12.538710
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1d4e8f2a73'
+down_revision = 'e3a7c5d19b82'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'character_shards',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('character_shards')
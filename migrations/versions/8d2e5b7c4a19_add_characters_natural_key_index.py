@@ -0,0 +1,25 @@
+"""add unique natural key index on characters (name, house)
+
+Revision ID: 8d2e5b7c4a19
+Revises: 4c1f9a2e7b36
+Create Date: 2026-10-19 16:41:03.207716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2e5b7c4a19'
+down_revision = '4c1f9a2e7b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fails if (name, house) already has duplicates; resolve those before upgrading.
+    op.create_index('uq_characters_name_house', 'characters', ['name', 'house'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_characters_name_house', table_name='characters')
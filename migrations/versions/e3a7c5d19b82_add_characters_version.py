@@ -0,0 +1,25 @@
+"""add version column to characters for optimistic concurrency
+
+Revision ID: e3a7c5d19b82
+Revises: 8d2e5b7c4a19
+Create Date: 2026-10-19 18:22:47.915382
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a7c5d19b82'
+down_revision = '8d2e5b7c4a19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('characters', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    with op.batch_alter_table('characters') as batch_op:
+        batch_op.drop_column('version')
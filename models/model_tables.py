@@ -1,3 +1,4 @@
+from datetime import datetime
 from sqlalchemy import Column, Integer, String
 from config.database import db
 
@@ -8,6 +9,8 @@ class Character(db.Model):
     Represents a character in the Game of Thrones database.
     """
     __tablename__ = 'characters'  # Explicitly defining table name
+    # Natural key used by upserts (UPSERT_NATURAL_KEY); ON CONFLICT needs a unique index to match on.
+    __table_args__ = (db.Index('uq_characters_name_house', 'name', 'house', unique=True),)
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=True)
@@ -19,6 +22,8 @@ class Character(db.Model):
     age = db.Column(db.Integer, nullable=True)
     death = db.Column(db.Integer, nullable=True)
     strength = db.Column(db.String(100), nullable=True)
+    # Incremented by every write; exposed as the ETag for optimistic concurrency (If-Match).
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     def __repr__(self):
         return f"<Character {self.name} (House: {self.house})>"
@@ -37,5 +42,51 @@ class Character(db.Model):
             "role": self.role,
             "age": self.age,
             "death": self.death,
-            "strength": self.strength
+            "strength": self.strength,
+            "version": self.version
         }
+
+
+class CharacterChange(db.Model):
+    """
+    Append-only outbox of committed character writes, read by change feed consumers.
+    """
+    __tablename__ = 'character_changes'
+
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    character_id = db.Column(db.Integer, nullable=False, index=True)
+    operation = db.Column(db.String(10), nullable=False)  # create, update or delete
+    payload = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CharacterChange {self.seq} {self.operation} {self.character_id}>"
+
+    def to_dict(self):
+        """
+            Converts the change to a dictionary format.
+        """
+        return {
+            "seq": self.seq,
+            "character_id": self.character_id,
+            "operation": self.operation,
+            "character": self.payload,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class CharacterShard(db.Model):
+    """
+    Directory of character ids when the characters table is sharded (SHARD_URLS).
+
+    Allocates ids that are unique across shards and, with SHARD_KEY=house, records which
+    shard holds each character, since an id alone does not tell.
+    """
+    __tablename__ = 'character_shards'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Only set with SHARD_KEY=house; with SHARD_KEY=id the shard is id % number of shards.
+    shard = db.Column(db.Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<CharacterShard {self.id} on {self.shard}>"
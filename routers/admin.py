@@ -0,0 +1,74 @@
+"""
+Administrative endpoints (request profiles, group-commit metrics)
+"""
+
+# Standard library imports
+import io
+import os
+import pstats
+# Flask imports for handling routes and requests
+from flask import Blueprint, Response, current_app, jsonify, request, send_from_directory
+# Third-party imports
+from apifairy import authenticate
+# Local imports
+from routers.auth import auth
+from services.profiling import PROFILE_FILE_PATTERN, list_profiles
+
+# Blueprint Initialization
+admin_blueprint = Blueprint('admin', __name__, url_prefix='/admin')
+
+
+def is_admin(user):
+    """Only users listed in ADMIN_EMAILS may use admin endpoints; with an empty list nobody may."""
+    return user.email in (current_app.config.get("ADMIN_EMAILS") or [])
+
+
+@admin_blueprint.route('/profiles', methods=['GET'])
+@authenticate(auth)
+def get_profiles():
+    """
+    Lists the most recent request profiles.
+    """
+    if not is_admin(auth.current_user()):
+        return jsonify({"error": "Admin access required"}), 403
+    if not current_app.config["PROFILING_ENABLED"]:
+        return jsonify({"error": "Profiling is disabled"}), 404
+
+    profiles = list_profiles(current_app.config["PROFILING_DIR"])
+    return jsonify({"total": len(profiles), "data": profiles}), 200
+
+
+@admin_blueprint.route('/profiles/<string:name>', methods=['GET'])
+@authenticate(auth)
+def download_profile(name):
+    """
+    Downloads one profile. `?format=text` renders a cProfile dump as a cumulative-time report.
+    """
+    if not is_admin(auth.current_user()):
+        return jsonify({"error": "Admin access required"}), 403
+    if not current_app.config["PROFILING_ENABLED"]:
+        return jsonify({"error": "Profiling is disabled"}), 404
+    directory = current_app.config["PROFILING_DIR"]
+    if not PROFILE_FILE_PATTERN.match(name) or not os.path.isfile(os.path.join(directory, name)):
+        return jsonify({"error": "Profile not found"}), 404
+
+    if request.args.get("format") == "text" and name.endswith(".pstats"):
+        report = io.StringIO()
+        pstats.Stats(os.path.join(directory, name), stream=report).sort_stats("cumulative").print_stats(50)
+        return Response(report.getvalue(), mimetype="text/plain")
+
+    return send_from_directory(os.path.abspath(directory), name, as_attachment=True)
+
+
+@admin_blueprint.route('/group-commit', methods=['GET'])
+@authenticate(auth)
+def get_group_commit_metrics():
+    """
+    Reports group-commit batch sizes and commit latencies.
+    """
+    if not is_admin(auth.current_user()):
+        return jsonify({"error": "Admin access required"}), 403
+    writer = current_app.extensions.get("group_commit")
+    if writer is None:
+        return jsonify({"error": "Group commit is disabled"}), 404
+    return jsonify(writer.metrics()), 200
@@ -7,7 +7,7 @@ import logging
 import os
 from datetime import datetime, timedelta
 # Flask imports for handling routes and requests
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 # Third-party imports
 from apifairy import arguments, authenticate
 from flask_httpauth import HTTPBasicAuth
@@ -17,6 +17,7 @@ from sqlalchemy.exc import IntegrityError
 # Local imports for database setup and schemas
 from config.database import db
 from schemas.schema import RegisterSchema, TokenResponseSchema, User
+from services.ratelimit import charge_authenticated, charge_failed_authentication
 
 # Blueprint Initialization
 auth_blueprint = Blueprint('auth', __name__)
@@ -88,9 +89,16 @@ def login(args):
 
 @auth.verify_password
 def verify_password(username, password):
+    # Sub-requests of a /batch call reuse the user the batch itself authenticated, warm-up requests
+    # the user they run as (services/warmup.py).
+    authenticated_user = g.get("authenticated_user")
+    if authenticated_user is not None and authenticated_user.email == username:
+        return authenticated_user
     user = User.query.filter_by(email=username).first()
     if user and bcrypt_context.verify(password, user.password):
+        charge_authenticated(user.id)
         return user
+    charge_failed_authentication()
     return None
 
 
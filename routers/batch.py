@@ -0,0 +1,114 @@
+"""
+Batch endpoint: several character operations in one HTTP round trip
+"""
+
+# Standard library imports
+import contextlib
+import logging
+# Flask imports for handling routes and requests
+from flask import Blueprint, current_app, g, jsonify, request
+# Third-party imports
+from apifairy import authenticate, body
+from sqlalchemy.orm import Session
+# Local imports
+from config.database import db
+from config.sqlite import writer_engine
+from routers.auth import auth
+from schemas.schema import BatchRequestSchema
+from services.events import characters_changed
+
+# Blueprint Initialization
+batch_blueprint = Blueprint('batch', __name__)
+
+# Logging
+logger = logging.getLogger(__name__)
+
+# Streaming and long-poll routes cannot be answered inside a batch.
+EXCLUDED_ENDPOINTS = {"characters.subscribe_characters", "characters.get_character_changes"}
+
+
+def run_sub_request(sub_request):
+    """
+    Dispatch one sub-request to its characters route and return (status, JSON body).
+
+    `dispatch_request` skips the `before_request` hooks, so each operation is charged to its route's
+    rate limit budget here; profiling applies to the batch as a whole.
+    """
+    app = current_app._get_current_object()
+    options = {"method": sub_request["method"], "query_string": sub_request["query"],
+               "headers": {**(sub_request["headers"] or {}),
+                           "Authorization": request.headers.get("Authorization", "")}}
+    if sub_request["body"] is not None:
+        options["json"] = sub_request["body"]
+
+    with app.test_request_context(sub_request["path"], **options):
+        rule = request.url_rule
+        if rule is not None and (not rule.endpoint.startswith("characters.") or rule.endpoint in EXCLUDED_ENDPOINTS):
+            return 400, {"error": f"{sub_request['path']} cannot be used in a batch"}
+        limiter = app.extensions.get("rate_limiter")
+        charged = (limiter.sub_request(rule.endpoint, f"user:{g.authenticated_user.id}")
+                   if limiter is not None and rule is not None else contextlib.nullcontext())
+        with charged as rejection:
+            if rejection is not None:
+                return rejection.status_code, rejection.get_json()
+            try:
+                rv = app.dispatch_request()
+            except Exception as e:
+                rv = app.handle_user_exception(e)
+        response = app.make_response(rv)
+        return response.status_code, response.get_json(silent=True)
+
+
+@batch_blueprint.route('/batch', methods=['POST'])
+@authenticate(auth)
+@body(BatchRequestSchema)
+def run_batch(args):
+    """
+    Executes up to 50 /characters operations under one authentication check.
+    With `atomic`, all writes share one transaction and the first failure rolls everything back.
+    """
+    g.authenticated_user = auth.current_user()
+    if not args["atomic"]:
+        responses = [dict(zip(("status", "body"), run_sub_request(sub_request))) for sub_request in args["requests"]]
+        return jsonify({"atomic": False, "responses": responses}), 200
+    if "character_shards" in current_app.extensions:
+        # Shards commit on their own, so one transaction cannot cover the batch.
+        return jsonify({"error": "Atomic batches are not available while characters are sharded"}), 501
+
+    # Join one outer transaction: each handler's commit() only releases a savepoint.
+    connection = writer_engine(db).connect()
+    transaction = connection.begin()
+    if connection.dialect.name == "sqlite" and not connection.connection.dbapi_connection.in_transaction:
+        # pysqlite does not emit BEGIN itself, and RELEASE SAVEPOINT outside a transaction commits.
+        connection.exec_driver_sql("BEGIN")
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    db.session.remove()
+    db.session.registry.set(session)
+    g.deferred_character_events = []
+    responses, failed = [], False
+    try:
+        for sub_request in args["requests"]:
+            if failed:
+                responses.append({"status": 424, "body": {"error": "Not executed: an earlier operation failed"}})
+                continue
+            status, payload = run_sub_request(sub_request)
+            responses.append({"status": status, "body": payload})
+            failed = status >= 400
+        if failed:
+            transaction.rollback()
+        else:
+            transaction.commit()
+    except Exception as e:
+        transaction.rollback()
+        logger.error(f"Batch error: {str(e)}")
+        return jsonify({"error": "An unexpected error occurred", "message": str(e)}), 500
+    finally:
+        deferred = g.pop("deferred_character_events")
+        session.close()
+        connection.close()
+        db.session.registry.clear()
+
+    if not failed:
+        for sender, kwargs in deferred:
+            characters_changed.send(sender, **kwargs)
+    return jsonify({"atomic": True, "committed": not failed, "responses": responses}), 200
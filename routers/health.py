@@ -0,0 +1,32 @@
+"""
+Health endpoints for load balancers and orchestrators (no authentication)
+"""
+
+# Flask imports for handling routes and requests
+from flask import Blueprint, current_app, jsonify
+
+# Blueprint Initialization
+health_blueprint = Blueprint('health', __name__)
+
+
+@health_blueprint.route('/healthz', methods=['GET'])
+def liveness():
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return jsonify({"status": "ok"}), 200
+
+
+@health_blueprint.route('/readyz', methods=['GET'])
+def readiness():
+    """
+    Readiness: warm-up has finished and the database answers (checked at most every HEALTH_DB_PING_TTL seconds).
+    """
+    warmup = current_app.extensions["warmup"]
+    if not warmup.ready:
+        return jsonify({"status": "warming_up", "warmup": warmup.to_dict()}), 503
+    ok, error, age = current_app.extensions["database_ping"].check()
+    database = {"ok": ok, "checked_seconds_ago": age}
+    if not ok:
+        return jsonify({"status": "unavailable", "database": {**database, "error": error}}), 503
+    return jsonify({"status": "ready", "database": database, "warmup": warmup.to_dict()}), 200
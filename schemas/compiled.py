@@ -0,0 +1,219 @@
+"""
+Precompiled fast path for request schemas.
+
+`CompiledSchema.load` runs a validation function built once per schema
+instance from its declared fields: one specialised converter and validator list per
+field, with no per-request field lookups, hooks or error bookkeeping. The
+fast path only ever *accepts* input. Anything it is unsure about (a failed
+conversion or validator, a missing required field, an unknown key, a field
+type it does not support) falls back to marshmallow's own `Schema.load`, so
+successful results and validation error messages are exactly marshmallow's.
+
+Schemas with hooks (`@validates_schema`, `@pre_load`, ...) or unsupported
+field types are never compiled and always use marshmallow.
+"""
+# Standard library imports
+import math
+import re
+from collections.abc import Mapping
+# Third-party imports
+from marshmallow import EXCLUDE, RAISE, Schema, ValidationError, fields, missing, validate
+from webargs.fields import DelimitedList
+
+
+_INTEGER = re.compile(r"-?[0-9]+\Z")
+
+
+class _Fallback(Exception):
+    """Raised inside compiled code to hand the input to marshmallow."""
+
+
+def _to_str(value):
+    if type(value) is not str:
+        raise _Fallback
+    return value
+
+
+def _to_int(value):
+    if type(value) is int:
+        return value
+    if type(value) is str and _INTEGER.match(value):
+        try:
+            return int(value)
+        except ValueError:  # longer than sys.get_int_max_str_digits()
+            raise _Fallback
+    raise _Fallback
+
+
+def _to_float(value):
+    if type(value) in (int, float):
+        result = float(value)
+    elif type(value) is str:
+        try:
+            result = float(value)
+        except ValueError:
+            raise _Fallback
+    else:
+        raise _Fallback
+    if not math.isfinite(result):
+        raise _Fallback
+    return result
+
+
+def _bool_converter(field):
+    truthy, falsy = frozenset(field.truthy), frozenset(field.falsy)
+
+    def to_bool(value):
+        try:
+            if value in truthy:
+                return True
+            if value in falsy:
+                return False
+        except TypeError:  # unhashable
+            pass
+        raise _Fallback
+    return to_bool
+
+
+def _list_converter(inner):
+    def to_list(value):
+        if type(value) is not list:
+            raise _Fallback
+        return [inner(item) for item in value]
+    return to_list
+
+
+def _delimited_list_converter(inner, delimiter):
+    def to_list(value):
+        if type(value) is not str or not value:
+            raise _Fallback
+        return [inner(item) for item in value.split(delimiter)]
+    return to_list
+
+
+def _strict_int(value):
+    if type(value) is not int:
+        raise _Fallback
+    return value
+
+
+def _converter(field):
+    """A plain function converting one raw value like `field.deserialize`, or None if unsupported."""
+    field_type = type(field)
+    if field.allow_none:
+        return None
+    if field_type is DelimitedList:
+        inner = _converter(field.inner)
+        return inner and _delimited_list_converter(inner, field.delimiter)
+    if field_type is fields.List:
+        inner = _converter(field.inner)
+        return inner and _list_converter(inner)
+    if field_type is fields.Boolean:
+        return _bool_converter(field)
+    if field_type is fields.Integer:
+        return _strict_int if field.strict else _to_int
+    if field_type is fields.Float:
+        return _to_float
+    if field_type is fields.String:
+        return _to_str
+    return None
+
+
+def _check(validator):
+    """A validation function that raises `_Fallback` when `validator` would reject the value."""
+    if isinstance(validator, validate.OneOf):
+        choices = frozenset(validator.choices)
+
+        def check(value):
+            if value not in choices:
+                raise _Fallback
+        return check
+    if isinstance(validator, validate.Range):
+        low, high = validator.min, validator.max
+        low_inclusive, high_inclusive = validator.min_inclusive, validator.max_inclusive
+
+        def check(value):
+            if low is not None and (value < low if low_inclusive else value <= low):
+                raise _Fallback
+            if high is not None and (value > high if high_inclusive else value >= high):
+                raise _Fallback
+        return check
+    if isinstance(validator, validate.Length) and validator.equal is None:
+        low, high = validator.min, validator.max
+
+        def check(value):
+            if (low is not None and len(value) < low) or (high is not None and len(value) > high):
+                raise _Fallback
+        return check
+
+    def check(value):
+        try:
+            if validator(value) is False:
+                raise _Fallback
+        except ValidationError:
+            raise _Fallback
+    return check
+
+
+def compile_schema(schema):
+    """Build a fast `load(data, unknown)` function for `schema`, or return None if it cannot be compiled."""
+    if any(schema._hooks.values()) or schema.only or schema.exclude or schema.many:
+        return None
+    plan = []
+    for name, field in schema.load_fields.items():
+        convert = _converter(field)
+        if convert is None:
+            return None
+        checks = tuple(_check(validator) for validator in field.validators)
+        plan.append((name, field.data_key or name, convert, checks, field.required, field.load_default))
+    known_keys = frozenset(key for _, key, *_ in plan)
+    schema_unknown = schema.unknown
+
+    def load(data, unknown=None):
+        if not isinstance(data, Mapping):
+            raise _Fallback
+        unknown = unknown or schema_unknown
+        if unknown != EXCLUDE:
+            if unknown != RAISE or any(key not in known_keys for key in data):
+                raise _Fallback
+        result = {}
+        for name, key, convert, checks, required, default in plan:
+            value = data.get(key, missing)
+            if value is missing:
+                if required:
+                    raise _Fallback
+                if default is missing:
+                    continue
+                value = default() if callable(default) else default
+            else:
+                value = convert(value)
+                for check in checks:
+                    check(value)
+            result[name] = value
+        return result
+    return load
+
+
+class CompiledSchema(Schema):
+    """Schema whose `load` tries a precompiled validation function before marshmallow."""
+
+    # Set to False to always use marshmallow (e.g. to compare results or benchmark).
+    fast_path = True
+
+    def load(self, data, *, many=None, partial=None, unknown=None):
+        if CompiledSchema.fast_path and many is None and partial is None:
+            compiled = self._compiled_load()
+            if compiled is not None:
+                try:
+                    return compiled(data, unknown)
+                except _Fallback:
+                    pass
+        return super().load(data, many=many, partial=partial, unknown=unknown)
+
+    def _compiled_load(self):
+        # Compiled once per schema instance; apifairy creates one instance per decorated route.
+        try:
+            return self.__dict__["_compiled_function"]
+        except KeyError:
+            compiled = self.__dict__["_compiled_function"] = compile_schema(self)
+            return compiled
@@ -2,6 +2,8 @@
 Authentication and  Flask imports for handling routes and requests
 """
 from marshmallow import Schema, fields, ValidationError, validate, validates_schema
+from webargs.fields import DelimitedList
+from schemas.compiled import CompiledSchema
 import re
 from flask_sqlalchemy import SQLAlchemy
 from passlib.context import CryptContext
@@ -17,7 +19,7 @@ def validate_password(password):
         )
 
 
-class TokenResponseSchema(Schema):
+class TokenResponseSchema(CompiledSchema):
     """
     Token response schema (for login)
     """
@@ -53,7 +55,7 @@ class RegisterSchema(Schema):
         return data
 
 
-class CharacterSchema(Schema):
+class CharacterSchema(CompiledSchema):
     """
     Schema for general character properties
     """
@@ -61,7 +63,7 @@ class CharacterSchema(Schema):
     skip = fields.Int(load_default=0, metadata={"description": "Number of results to skip (default: 0)."})
 
 
-class UserSchema(Schema):
+class UserSchema(CompiledSchema):
     """
     Schema for user-related data
     """
@@ -77,14 +79,39 @@ class UserSchema(Schema):
     strength = fields.String(required=False)
 
 
-class UserSchemaDeletion(Schema):
+class CharacterUpsertSchema(UserSchema):
+    """
+    Schema for one character in an upsert (the full row; omitted fields become null)
+    """
+    id = fields.Integer(required=False, metadata={"description": "Required when upserting by id."})
+
+
+class UpsertQuerySchema(CompiledSchema):
+    """
+    Schema for choosing the upsert key
+    """
+    key = fields.Str(load_default="id", validate=validate.OneOf(["id", "natural"]), metadata={
+        "description": "Match on id or on the natural key (UPSERT_NATURAL_KEY, default name and house)."})
+
+
+class BulkUpsertSchema(Schema):
+    """
+    Schema for upserting many characters in one request
+    """
+    key = fields.Str(load_default="id", validate=validate.OneOf(["id", "natural"]), metadata={
+        "description": "Match on id or on the natural key (UPSERT_NATURAL_KEY, default name and house)."})
+    characters = fields.List(fields.Nested(CharacterUpsertSchema), required=True,
+                             validate=validate.Length(min=1, max=1000))
+
+
+class UserSchemaDeletion(CompiledSchema):
     """
     Schema for user deletion (without full data)
     """
     id = fields.Int(required=True, description="ID of the user to delete")
 
 
-class GetCharacterSchema(Schema):
+class GetCharacterSchema(CompiledSchema):
     """
     Schema to manage character details (filtering and inclusion)
     """
@@ -95,7 +122,23 @@ class GetCharacterSchema(Schema):
     include_age = fields.Bool(load_default=False, description="Include age information in the response.")
 
 
-class FilterCharactersQuerySchema(Schema):
+class MultiGetCharactersQuerySchema(GetCharacterSchema):
+    """
+    Schema to fetch many characters by id in one call (query string: ids=1,2,3)
+    """
+    ids = DelimitedList(fields.Int(), required=True, validate=validate.Length(min=1, max=1000),
+                        metadata={"description": "Comma separated character ids (at most 1000)."})
+
+
+class MultiGetCharactersBodySchema(GetCharacterSchema):
+    """
+    Schema to fetch many characters by id in one call (JSON body: {"ids": [1, 2, 3]})
+    """
+    ids = fields.List(fields.Int(), required=True, validate=validate.Length(min=1, max=1000),
+                      metadata={"description": "Character ids (at most 1000)."})
+
+
+class FilterCharactersQuerySchema(CompiledSchema):
     """
     Schema for complex filtering (characters)
     """
@@ -104,6 +147,14 @@ class FilterCharactersQuerySchema(Schema):
     role = fields.Str(required=False, description="Filter by character's role.")
     age_min = fields.Int(required=False, description="Filter by minimum age.")
     age_max = fields.Int(required=False, description="Filter by maximum age.")
+    facets = fields.Bool(load_default=False, metadata={
+        "description": "Include counts by house, role, animal and age bucket for the matched characters."})
+    q = fields.Str(required=False, validate=validate.Length(max=200), metadata={
+        "description": "Full-text search over every descriptive field; results are ranked and paginated."})
+    skip = fields.Int(load_default=0, validate=validate.Range(min=0),
+                      metadata={"description": "Search results to skip (only with q, default: 0)."})
+    limit = fields.Int(load_default=20, validate=validate.Range(min=1, max=1000),
+                       metadata={"description": "Search results per page (only with q, default: 20)."})
     sort_by = fields.Str(
         required=False,
         missing='name',
@@ -117,7 +168,7 @@ class FilterCharactersQuerySchema(Schema):
     )
 
 
-class SortRequestSchema(Schema):
+class SortRequestSchema(CompiledSchema):
     """
      Schema for sorting characters
     """
@@ -125,6 +176,72 @@ class SortRequestSchema(Schema):
                          metadata={"description": "Field to sort by."})
     sort_order = fields.Str(load_default="asc", validate=lambda x: x in ["asc", "desc"],
                             metadata={"description": "Sort order (asc or desc)."})
+    skip = fields.Int(load_default=0, validate=validate.Range(min=0),
+                      metadata={"description": "Sorted characters to skip (default: 0)."})
+    limit = fields.Int(required=False, validate=validate.Range(min=1),
+                       metadata={"description": "Sorted characters to return (default: all)."})
+
+class ChangesQuerySchema(CompiledSchema):
+    """
+    Schema for reading the characters change feed
+    """
+    since = fields.Int(load_default=0, validate=validate.Range(min=0),
+                       metadata={"description": "Return changes with a sequence number greater than this."})
+    limit = fields.Int(load_default=100, validate=validate.Range(min=1, max=1000),
+                       metadata={"description": "Maximum number of changes per response."})
+    wait = fields.Float(load_default=0, validate=validate.Range(min=0, max=60),
+                        metadata={"description": "Seconds to long-poll when there are no new changes."})
+    stream = fields.Bool(load_default=False,
+                         metadata={"description": "Stream changes as Server-Sent Events instead of returning JSON."})
+
+
+class SubscribeQuerySchema(CompiledSchema):
+    """
+    Schema for streaming subscriptions to character updates
+    """
+    house = fields.Str(required=False, metadata={"description": "Only send events for this house (exact, case-insensitive)."})
+    role = fields.Str(required=False, metadata={"description": "Only send events for this role (exact, case-insensitive)."})
+
+
+class AutocompleteQuerySchema(CompiledSchema):
+    """
+    Schema for autocomplete suggestions
+    """
+    q = fields.Str(required=True, validate=validate.Length(min=1, max=100),
+                   metadata={"description": "Prefix typed so far (matched at the start of any word)."})
+    search_fields = DelimitedList(fields.Str(validate=validate.OneOf(["name", "house", "nickname"])),
+                                  data_key="fields", load_default=("name", "house", "nickname"),
+                                  metadata={"description": "Comma separated fields to suggest from (default: all)."})
+    limit = fields.Int(load_default=10, validate=validate.Range(min=1, max=50),
+                       metadata={"description": "Maximum number of suggestions (default: 10)."})
+
+
+# Conditional headers a batch entry may send; the batch's own Authorization is always forwarded.
+BATCH_SUB_REQUEST_HEADERS = ("If-Match", "If-None-Match")
+
+
+class BatchSubRequestSchema(Schema):
+    """
+    One operation inside a batch request
+    """
+    method = fields.Str(required=True, validate=validate.OneOf(["GET", "POST", "PUT", "DELETE"]))
+    path = fields.Str(required=True, validate=validate.Regexp(r"^/characters/"),
+                      metadata={"description": "Path of a /characters route, e.g. /characters/update-character/3."})
+    query = fields.Dict(load_default=None, metadata={"description": "Query string parameters."})
+    body = fields.Raw(load_default=None, metadata={"description": "JSON body."})
+    headers = fields.Dict(keys=fields.Str(validate=validate.OneOf(BATCH_SUB_REQUEST_HEADERS)), values=fields.Str(),
+                          load_default=None, metadata={"description": "If-Match or If-None-Match for this operation."})
+
+
+class BatchRequestSchema(Schema):
+    """
+    Schema for executing several character operations in one round trip
+    """
+    requests = fields.List(fields.Nested(BatchSubRequestSchema), required=True,
+                           validate=validate.Length(min=1, max=50))
+    atomic = fields.Bool(load_default=False, metadata={
+        "description": "Run every write in one transaction; the first failure rolls back the whole batch."})
+
 
 """
 Schema for pagination, sorting, and filtering characters
@@ -0,0 +1,165 @@
+"""
+Prefix index for search-box autocomplete over character names, houses and nicknames.
+
+Every distinct value is indexed under each of its words, so "sta" suggests
+"House Stark" as well as "Stannis Baratheon". Each field keeps a sorted array
+of (lower-cased word suffix, value) entries with a row count per entry; a
+lookup is one bisect plus a short scan, independent of table size.
+
+Like the snapshot, the index loads lazily on first use and stays current by
+replaying the `character_changes` outbox: a local write marks it stale, and
+writes from other processes are picked up every `AUTOCOMPLETE_REFRESH_INTERVAL`
+seconds. The indexed values of every row are kept so updates and deletes can
+remove their old entries.
+"""
+# Standard library imports
+import bisect
+import logging
+import threading
+import time
+# Third-party imports
+from sqlalchemy import select
+# Local imports
+from models.model_tables import Character
+from services.changes import fetch_changes, latest_seq
+from services.events import characters_changed
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_FIELDS = ("name", "house", "nickname")
+
+
+def _entries(value):
+    """(word suffix, value) keys for one value: the whole value and every later word start."""
+    if not isinstance(value, str) or not value.strip():
+        return ()
+    lowered = value.lower()
+    keys = {lowered}
+    for position, character in enumerate(lowered):
+        if character == " " and position + 1 < len(lowered) and lowered[position + 1] != " ":
+            keys.add(lowered[position + 1:])
+    return [(key, value) for key in keys]
+
+
+class AutocompleteIndex:
+    """Sorted prefix arrays over `AUTOCOMPLETE_FIELDS`, maintained incrementally."""
+
+    def __init__(self, refresh_interval=1.0, scan_limit=200):
+        self.refresh_interval = refresh_interval
+        self.scan_limit = scan_limit
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._refreshed_at = 0.0
+        self._stale = False
+        self.last_seq = 0
+        self._values = {}
+        self._keys = {field: [] for field in AUTOCOMPLETE_FIELDS}
+        self._counts = {field: {} for field in AUTOCOMPLETE_FIELDS}
+
+    # Loading and maintenance
+
+    def load(self, session):
+        """Rebuild the index from the characters table."""
+        started = time.perf_counter()
+        last_seq = latest_seq(session)
+        columns = [Character.id] + [getattr(Character, field) for field in AUTOCOMPLETE_FIELDS]
+        values = {row[0]: tuple(row[1:]) for row in session.execute(select(*columns)).tuples()}
+        counts = {field: {} for field in AUTOCOMPLETE_FIELDS}
+        for row in values.values():
+            for field, value in zip(AUTOCOMPLETE_FIELDS, row):
+                field_counts = counts[field]
+                for entry in _entries(value):
+                    field_counts[entry] = field_counts.get(entry, 0) + 1
+        with self._lock:
+            self._values = values
+            self._counts = counts
+            self._keys = {field: sorted(counts[field]) for field in AUTOCOMPLETE_FIELDS}
+            self._loaded_at = self._refreshed_at = time.monotonic()
+            self._stale = False
+            self.last_seq = last_seq
+        logger.info("Built the autocomplete index over %d characters in %.3fs", len(values),
+                    time.perf_counter() - started)
+
+    def ensure_current(self, session):
+        """Load on first use, then replay outbox changes when stale or after `refresh_interval` seconds."""
+        if self._loaded_at is None:
+            self.load(session)
+        elif self._stale or time.monotonic() - self._refreshed_at >= self.refresh_interval:
+            self.catch_up(session)
+
+    def catch_up(self, session, batch_size=1000):
+        """Apply every outbox change newer than `last_seq`."""
+        with self._lock:
+            self._stale = False
+            self._refreshed_at = time.monotonic()
+            while True:
+                changes = fetch_changes(session, self.last_seq, batch_size)
+                for change in changes:
+                    self.apply(change.operation, change.payload)
+                    self.last_seq = change.seq
+                if len(changes) < batch_size:
+                    break
+
+    def mark_stale(self, *args, **kwargs):
+        """Connected to `characters_changed`, so this process sees its own writes on the next lookup."""
+        self._stale = True
+
+    def _add(self, field, value, delta):
+        keys, counts = self._keys[field], self._counts[field]
+        for entry in _entries(value):
+            count = counts.get(entry, 0) + delta
+            if count > 0:
+                if entry not in counts:
+                    bisect.insort(keys, entry)
+                counts[entry] = count
+            elif entry in counts:
+                del counts[entry]
+                position = bisect.bisect_left(keys, entry)
+                if position < len(keys) and keys[position] == entry:
+                    del keys[position]
+
+    def apply(self, operation, character):
+        """Apply one committed change (an upsert for create/update, a removal for delete)."""
+        if character is None:
+            return
+        with self._lock:
+            previous = self._values.pop(character["id"], None)
+            if previous is not None:
+                for field, value in zip(AUTOCOMPLETE_FIELDS, previous):
+                    self._add(field, value, -1)
+            if operation != "delete":
+                row = tuple(character.get(field) for field in AUTOCOMPLETE_FIELDS)
+                self._values[character["id"]] = row
+                for field, value in zip(AUTOCOMPLETE_FIELDS, row):
+                    self._add(field, value, 1)
+
+    # Reads
+
+    def suggest(self, prefix, fields=AUTOCOMPLETE_FIELDS, limit=10):
+        """
+        Up to `limit` distinct values starting with `prefix` (at any word), most common first.
+
+        At most `scan_limit` index entries per field are examined, so very short prefixes
+        rank a bounded, alphabetically first slice rather than every match.
+        """
+        prefix = prefix.lower()
+        suggestions = {}
+        with self._lock:
+            for field in fields:
+                keys, counts = self._keys[field], self._counts[field]
+                position = bisect.bisect_left(keys, (prefix,))
+                end = min(position + self.scan_limit, len(keys))
+                while position < end and keys[position][0].startswith(prefix):
+                    entry = keys[position]
+                    suggestions.setdefault((field, entry[1]), counts[entry])
+                    position += 1
+        ranked = sorted(suggestions.items(), key=lambda item: (-item[1], item[0][1].lower(), item[0][0]))
+        return [{"value": value, "field": field, "count": count} for (field, value), count in ranked[:limit]]
+
+
+def init_autocomplete(app):
+    """Create the autocomplete index and keep it current with local writes."""
+    index = AutocompleteIndex(refresh_interval=app.config["AUTOCOMPLETE_REFRESH_INTERVAL"])
+    characters_changed.connect(index.mark_stale, weak=False)
+    app.extensions["autocomplete_index"] = index
+    return index
@@ -0,0 +1,159 @@
+"""
+Fan-out broker for streaming character updates to subscribers.
+
+Subscriptions are indexed by their (house, role) filter, so publishing an
+event touches only the subscribers that match it rather than every open
+connection. Each subscriber owns a bounded queue; a subscriber that falls too
+far behind is closed and expected to resume from the change feed with
+`Last-Event-ID`.
+
+Two backends feed the broker:
+
+- "local" (default): events come from the `characters_changed` signal, so
+  subscribers see writes made by this process;
+- "outbox": a background thread tails the `character_changes` table, so
+  subscribers see writes from every process sharing the database. The outbox
+  only stores the new row, so filters match the state after the write.
+
+Only `threading` primitives are used, so the broker also works under
+gevent/eventlet workers, where idle connections are cheap greenlets.
+"""
+# Standard library imports
+import logging
+import queue
+import threading
+# Local imports
+from services.changes import fetch_changes, latest_seq
+from services.events import characters_changed
+
+logger = logging.getLogger(__name__)
+
+BROKER_BACKENDS = ("local", "outbox")
+
+
+def _key(value):
+    return value.lower() if isinstance(value, str) and value else None
+
+
+class Subscription:
+    """One subscriber's filter and bounded event queue."""
+
+    def __init__(self, house=None, role=None, max_queue=1000):
+        self.house = _key(house)
+        self.role = _key(role)
+        self.overflowed = False
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def offer(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Next event, or None after `timeout` seconds without one."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """In-process publish/subscribe fan-out keyed by (house, role) filters."""
+
+    def __init__(self, max_queue=1000, relay=None):
+        self.max_queue = max_queue
+        self.relay = relay
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    @property
+    def needs_previous(self):
+        """Whether publishing an update needs the row as it was before: only for local events with subscribers."""
+        return self.relay is None and len(self) > 0
+
+    def subscribe(self, house=None, role=None):
+        subscription = Subscription(house, role, self.max_queue)
+        with self._lock:
+            # The relay starts with the first subscriber, so forked workers each run their own.
+            if self.relay is not None and not self.relay.is_alive():
+                self.relay.start()
+            self._subscriptions.setdefault((subscription.house, subscription.role), set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        key = (subscription.house, subscription.role)
+        with self._lock:
+            subscriptions = self._subscriptions.get(key)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[key]
+
+    def publish(self, event, rows):
+        """Deliver `event` to subscribers whose filter matches any of `rows` (old and new state)."""
+        keys = set()
+        for row in rows:
+            if row is None:
+                continue
+            house, role = _key(row.get("house")), _key(row.get("role"))
+            keys.update({(None, None), (house, None), (None, role), (house, role)})
+        with self._lock:
+            targets = [subscription for key in keys for subscription in self._subscriptions.get(key, ())]
+        for subscription in targets:
+            subscription.offer(event)
+
+    def publish_change(self, sender=None, operation=None, character=None, seq=None, previous=None, **kwargs):
+        """Receiver for the `characters_changed` signal."""
+        event = {"seq": seq, "character_id": character["id"], "operation": operation, "character": character}
+        self.publish(event, (character, previous))
+
+
+class OutboxRelay(threading.Thread):
+    """Tails the outbox table and publishes every new change to the broker."""
+
+    def __init__(self, app, interval):
+        super().__init__(daemon=True, name="outbox-relay")
+        self.app = app
+        self.broker = None
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        from config.database import db
+        with self.app.app_context():
+            last_seq = latest_seq(db.session)
+            db.session.rollback()
+            while not self._stop_event.wait(self.interval):
+                try:
+                    for change in fetch_changes(db.session, last_seq, 1000):
+                        event = change.to_dict()
+                        self.broker.publish(event, (event["character"],))
+                        last_seq = change.seq
+                    db.session.rollback()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Outbox relay error: {str(e)}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def init_broker(app):
+    """Create the broker and connect the configured backend."""
+    backend = app.config["BROKER_BACKEND"]
+    if backend not in BROKER_BACKENDS:
+        raise ValueError(f"BROKER_BACKEND must be one of {', '.join(BROKER_BACKENDS)}")
+    if backend == "local":
+        broker = EventBroker(max_queue=app.config["BROKER_MAX_QUEUE"])
+        characters_changed.connect(broker.publish_change, weak=False)
+    else:
+        relay = OutboxRelay(app, app.config["CHANGES_POLL_INTERVAL"])
+        broker = EventBroker(max_queue=app.config["BROKER_MAX_QUEUE"], relay=relay)
+        relay.broker = broker
+    app.extensions["character_broker"] = broker
+    return broker
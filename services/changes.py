@@ -0,0 +1,92 @@
+"""
+Change data feed for characters.
+
+Every write adds a row to the `character_changes` outbox inside the same
+transaction as the character itself, so the feed never reports a write that
+was rolled back and never misses one that committed. Consumers read the
+outbox by sequence number (`since`), either by long-polling or as a
+Server-Sent Events stream.
+
+Readers only move forward (`seq > since`), so a row must never become
+visible after a row with a higher sequence number. A sequence number is taken
+when the row is inserted, not when its transaction commits: on PostgreSQL a
+transaction that took seq 11 could otherwise commit before the one holding
+seq 10, and a reader that saw 11 would skip 10 for good. Outbox inserts
+therefore take a transaction-scoped advisory lock first, which makes writers
+commit in sequence order; the outbox insert is the last statement of a write,
+so the lock is only held until the commit. SQLite already allows a single
+writing transaction at a time.
+"""
+# Standard library imports
+import json
+import threading
+# Third-party imports
+from sqlalchemy import func, insert, select
+# Local imports
+from models.model_tables import CharacterChange
+
+# pg_advisory_xact_lock key serialising outbox inserts ("chgs")
+OUTBOX_LOCK_KEY = 0x63686773
+
+
+def _lock_outbox(session):
+    """Hold the outbox lock until the transaction ends, so sequence numbers commit in order."""
+    if session.get_bind(CharacterChange).dialect.name == "postgresql":
+        session.execute(select(func.pg_advisory_xact_lock(OUTBOX_LOCK_KEY)))
+
+
+def record_change(session, operation, character):
+    """Insert an outbox row for `character` in the current transaction and return its sequence number."""
+    _lock_outbox(session)
+    statement = (insert(CharacterChange)
+                 .values(character_id=character["id"], operation=operation, payload=character)
+                 .returning(CharacterChange.seq))
+    return session.execute(statement).scalar_one()
+
+
+def record_changes(session, changes):
+    """Insert outbox rows for many (operation, character) pairs at once; returns their sequence numbers in order."""
+    if not changes:
+        return []
+    _lock_outbox(session)
+    statement = insert(CharacterChange).returning(CharacterChange.seq, sort_by_parameter_order=True)
+    rows = [{"character_id": character["id"], "operation": operation, "payload": character}
+            for operation, character in changes]
+    return list(session.scalars(statement, rows))
+
+
+def fetch_changes(session, since, limit):
+    """Changes with a sequence number greater than `since`, oldest first."""
+    query = select(CharacterChange).where(CharacterChange.seq > since).order_by(CharacterChange.seq).limit(limit)
+    return list(session.scalars(query))
+
+
+def latest_seq(session):
+    """Sequence number of the newest change, or 0 when the outbox is empty."""
+    return session.scalar(select(func.max(CharacterChange.seq))) or 0
+
+
+def format_sse(change):
+    """Encode one change as a Server-Sent Events message."""
+    return f"id: {change['seq']}\nevent: {change['operation']}\ndata: {json.dumps(change)}\n\n"
+
+
+class ChangeNotifier:
+    """
+    Wakes long-poll and streaming readers when this process commits a change.
+    Readers still poll the outbox on a timeout to see writes from other processes.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.counter = 0
+
+    def notify(self, *args, **kwargs):
+        with self._condition:
+            self.counter += 1
+            self._condition.notify_all()
+
+    def wait(self, seen, timeout):
+        """Block until the counter moves past `seen` or `timeout` expires; True if it moved."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.counter != seen, timeout=timeout)
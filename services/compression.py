@@ -0,0 +1,132 @@
+"""
+Response compression with Accept-Encoding negotiation.
+
+gzip is always available; brotli (`brotli` package) and zstd (`zstandard`
+package) are used when installed. Responses smaller than
+`COMPRESSION_MIN_SIZE` are sent as is. Each route can use a compression
+profile ("fast", "default" or "best") so large list responses trade ratio for
+CPU. Streamed responses are compressed chunk by chunk and flushed after every
+chunk, so Server-Sent Events still reach the client immediately.
+"""
+# Standard library imports
+import zlib
+# Flask imports
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# Per-codec levels for each profile.
+PROFILES = {
+    "fast": {"zstd": 1, "br": 1, "gzip": 1},
+    "default": {"zstd": 3, "br": 4, "gzip": 6},
+    "best": {"zstd": 12, "br": 9, "gzip": 9},
+}
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/event-stream", "text/html", "text/plain",
+                          "text/css", "application/javascript", "image/svg+xml",
+                          "application/msgpack", "application/x-msgpack", "application/cbor"}
+
+
+def available_encodings():
+    """Supported encodings in server preference order."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate(accept_encoding, encodings):
+    """Pick the encoding with the highest client q-value, breaking ties by server preference."""
+    best, best_q = None, 0.0
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    for encoding in encodings:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data, encoding, level):
+    """Compress a complete body."""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks, encoding, level):
+    """Compress an iterable of chunks, flushing after each so partial output is sent right away."""
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        flush_chunk = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        finish = compressor.flush
+    elif encoding == "br":
+        compressor = brotli.Compressor(quality=level)
+        compressor.compress = compressor.process
+        flush_chunk = compressor.flush
+        finish = compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        flush_chunk = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        output = compressor.compress(chunk) + flush_chunk()
+        if output:
+            yield output
+    yield finish()
+
+
+def init_compression(app):
+    """Register the response compression hook when `COMPRESSION_ENABLED` is set."""
+    if not app.config["COMPRESSION_ENABLED"]:
+        return
+    encodings = available_encodings()
+    min_size = app.config["COMPRESSION_MIN_SIZE"]
+    route_profiles = app.config["COMPRESSION_ROUTE_PROFILES"]
+    default_profile = app.config["COMPRESSION_PROFILE"]
+
+    @app.after_request
+    def compress_response(response):
+        if (request.method == "HEAD" or response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""), encodings)
+        if encoding is None:
+            return response
+        level = PROFILES[route_profiles.get(request.endpoint, default_profile)][encoding]
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, level)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress(data, encoding, level))
+        response.headers["Content-Encoding"] = encoding
+        return response
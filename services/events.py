@@ -0,0 +1,30 @@
+"""
+Signals emitted after character writes are committed.
+
+Receivers (caches, indexes, subscribers) connect to `characters_changed` and are
+called with `operation` ("create", "update" or "delete") and `character`, the
+row as a dictionary.
+
+Write handlers call `send_characters_changed`, which holds the signal back
+while an atomic batch is still open and the write may yet be rolled back.
+"""
+from blinker import Namespace
+from flask import g
+
+_signals = Namespace()
+
+characters_changed = _signals.signal("characters-changed")
+
+
+def in_batch_transaction():
+    """True while an atomic batch request runs its operations in one shared transaction."""
+    return g.get("deferred_character_events") is not None
+
+
+def send_characters_changed(sender, **kwargs):
+    """Send `characters_changed` now, or queue it until the surrounding batch transaction commits."""
+    deferred = g.get("deferred_character_events")
+    if deferred is not None:
+        deferred.append((sender, kwargs))
+    else:
+        characters_changed.send(sender, **kwargs)
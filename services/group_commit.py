@@ -0,0 +1,197 @@
+"""
+Group commit: one transaction for the writes of many concurrent requests.
+
+With `GROUP_COMMIT_ENABLED`, write endpoints hand their statements to
+`GroupCommitWriter.submit` instead of committing themselves. A background
+thread collects the writes that arrive within `GROUP_COMMIT_MAX_WAIT`
+seconds of the first one (or until `GROUP_COMMIT_MAX_BATCH` are waiting),
+runs them in one transaction and commits once; each request is answered
+after the commit that made its write durable. Under load the cost of a
+commit (an fsync, on SQLite) is shared by the whole batch; an idle server
+only adds up to `GROUP_COMMIT_MAX_WAIT` of latency.
+
+If any write of a batch fails, the batch is rolled back and its writes are
+retried one transaction each, so a failing write (a duplicate name, say) only
+fails its own request.
+
+`metrics()` reports batch sizes and commit latencies (served at
+`/admin/group-commit`).
+"""
+# Standard library imports
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Batch size histogram buckets: the upper bound of each bucket.
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class _Job:
+    """One submitted write and, once its batch is committed, its result or error."""
+
+    __slots__ = ("write", "done", "result", "error")
+
+    def __init__(self, write):
+        self.write = write
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class GroupCommitStats:
+    """Counters for committed batches, with a window of recent commit latencies."""
+
+    def __init__(self, window=1024):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.writes = 0
+        self.failed_batches = 0
+        self.max_batch_size = 0
+        self.batch_sizes = dict.fromkeys(BATCH_SIZE_BUCKETS, 0)
+        self._commit_latencies = deque(maxlen=window)
+        self._waits = deque(maxlen=window)
+
+    def record(self, size, commit_latency, wait):
+        with self._lock:
+            self.batches += 1
+            self.writes += size
+            self.max_batch_size = max(self.max_batch_size, size)
+            bucket = next((bound for bound in BATCH_SIZE_BUCKETS if size <= bound), BATCH_SIZE_BUCKETS[-1])
+            self.batch_sizes[bucket] += 1
+            self._commit_latencies.append(commit_latency)
+            self._waits.append(wait)
+
+    def record_failure(self):
+        with self._lock:
+            self.failed_batches += 1
+
+    @staticmethod
+    def _summary(values):
+        if not values:
+            return {"mean_ms": None, "p50_ms": None, "p99_ms": None, "max_ms": None}
+        ordered = sorted(values)
+
+        def at(fraction):
+            return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3)
+        return {"mean_ms": round(sum(ordered) / len(ordered) * 1000, 3), "p50_ms": at(0.5),
+                "p99_ms": at(0.99), "max_ms": round(ordered[-1] * 1000, 3)}
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "writes": self.writes,
+                "failed_batches": self.failed_batches,
+                "mean_batch_size": round(self.writes / self.batches, 2) if self.batches else None,
+                "max_batch_size": self.max_batch_size,
+                "batch_sizes": {f"<={bound}": count for bound, count in self.batch_sizes.items()},
+                # Time from the first write of a batch arriving to its commit returning.
+                "batch_latency": self._summary(list(self._waits)),
+                "commit_latency": self._summary(list(self._commit_latencies)),
+            }
+
+
+class GroupCommitWriter:
+    """Runs submitted writes on a background thread, committing them in batches."""
+
+    def __init__(self, app, max_batch=64, max_wait=0.002):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.stats = GroupCommitStats()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, write):
+        """
+        Run `write(session)` in the next batch and return its result once the batch is committed.
+
+        `write` must only issue statements (no commit) and must not touch request state. Its
+        exceptions are re-raised here, after the batch was rolled back.
+        """
+        self._ensure_started()
+        job = _Job(write)
+        self._queue.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _ensure_started(self):
+        # Started on first use, and again in a forked worker (threads do not survive fork).
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, daemon=True, name="group-commit")
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch, started
+
+    def _run(self):
+        from config.database import db
+        while True:
+            batch, started = self._next_batch()
+            with self.app.app_context():
+                try:
+                    self._commit(db.session, batch, started)
+                except Exception as e:  # never let the writer thread die with requests waiting
+                    logger.error(f"Group commit error: {str(e)}")
+                    for job in batch:
+                        if not job.done.is_set():
+                            job.error = e
+                            job.done.set()
+
+    def _commit(self, session, batch, started):
+        try:
+            results = [job.write(session) for job in batch]
+            commit_started = time.perf_counter()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if len(batch) == 1:
+                batch[0].error = e
+                batch[0].done.set()
+                return
+            # Retry each write on its own so only the failing one reports an error.
+            self.stats.record_failure()
+            for job in batch:
+                self._commit(session, [job], time.perf_counter())
+            return
+        finished = time.perf_counter()
+        self.stats.record(len(batch), finished - commit_started, finished - started)
+        for job, result in zip(batch, results):
+            job.result = result
+            job.done.set()
+
+    def metrics(self):
+        return {"max_batch": self.max_batch, "max_wait_ms": self.max_wait * 1000, **self.stats.to_dict()}
+
+
+def init_group_commit(app):
+    """Create the group-commit writer when `GROUP_COMMIT_ENABLED` is set."""
+    if not app.config["GROUP_COMMIT_ENABLED"]:
+        return None
+    writer = GroupCommitWriter(app, max_batch=app.config["GROUP_COMMIT_MAX_BATCH"],
+                               max_wait=app.config["GROUP_COMMIT_MAX_WAIT"])
+    app.extensions["group_commit"] = writer
+    return writer
@@ -0,0 +1,157 @@
+"""
+Opt-in per-request profiling.
+
+When `PROFILING_ENABLED` is set, a request is profiled if it carries the
+`X-Profile` header, the `__profile` query flag, or is picked by
+`PROFILING_SAMPLE_RATE`. The header or flag value must match `PROFILING_TOKEN`,
+which profiling requires, so clients cannot make the server profile requests and
+write files at will. `X-Profile-Mode` overrides `PROFILING_MODE` for one request. Profiles are written to `PROFILING_DIR` either as a
+cProfile `.pstats` dump or, in sampling mode, as a flamegraph-compatible
+`.collapsed` stack file. When profiling is disabled no hooks are registered,
+so requests pay nothing.
+"""
+# Standard library imports
+import cProfile
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+# Flask imports
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_MODE_HEADER = "X-Profile-Mode"
+PROFILE_QUERY_FLAG = "__profile"
+PROFILE_MODES = ("cprofile", "sample")
+PROFILE_FILE_PATTERN = re.compile(r"^[\w.-]+\.(pstats|collapsed)$")
+
+
+class StackSampler(threading.Thread):
+    """Samples the stack of one thread at a fixed interval and counts collapsed stacks."""
+
+    def __init__(self, target_thread_id, interval):
+        super().__init__(daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.target_thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        """Return the samples in Brendan Gregg's collapsed stack format."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _should_profile(app):
+    trigger = request.headers.get(PROFILE_HEADER, request.args.get(PROFILE_QUERY_FLAG))
+    if trigger is not None:
+        return hmac.compare_digest(trigger.encode(), app.config["PROFILING_TOKEN"].encode())
+    rate = app.config["PROFILING_SAMPLE_RATE"]
+    return rate > 0 and random.random() < rate
+
+
+def _profile_filename(extension, elapsed):
+    endpoint = (request.endpoint or "unknown").replace(".", "-")
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+    return f"{stamp}-{int(time.time() * 1000) % 1000:03d}-{request.method}-{endpoint}-{elapsed * 1000:.0f}ms.{extension}"
+
+
+def _prune(directory, keep):
+    files = list_profiles(directory)
+    for entry in files[keep:]:
+        try:
+            os.remove(os.path.join(directory, entry["name"]))
+        except OSError:
+            pass
+
+
+def list_profiles(directory):
+    """Return stored profiles, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    entries = []
+    for name in os.listdir(directory):
+        if not PROFILE_FILE_PATTERN.match(name):
+            continue
+        stat = os.stat(os.path.join(directory, name))
+        entries.append({"name": name, "size": stat.st_size, "created": stat.st_mtime})
+    return sorted(entries, key=lambda entry: entry["created"], reverse=True)
+
+
+def init_profiling(app):
+    """Register the profiling hooks on `app` when `PROFILING_ENABLED` is set."""
+    if not app.config["PROFILING_ENABLED"]:
+        return
+    if app.config["PROFILING_MODE"] not in PROFILE_MODES:
+        raise ValueError(f"PROFILING_MODE must be one of {', '.join(PROFILE_MODES)}")
+    if not app.config["PROFILING_TOKEN"]:
+        raise ValueError("PROFILING_TOKEN must be set when PROFILING_ENABLED is true")
+    os.makedirs(app.config["PROFILING_DIR"], exist_ok=True)
+    logger.warning("Request profiling is enabled; profiles are written to %s", app.config["PROFILING_DIR"])
+
+    @app.before_request
+    def start_profile():
+        if not _should_profile(app):
+            return
+        mode = request.headers.get(PROFILE_MODE_HEADER, "").lower()
+        mode = mode if mode in PROFILE_MODES else app.config["PROFILING_MODE"]
+        g.profile_started = time.perf_counter()
+        if mode == "sample":
+            g.profiler = StackSampler(threading.get_ident(), app.config["PROFILING_SAMPLE_INTERVAL"])
+            g.profiler.start()
+        else:
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def stop_profile(response):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+        elapsed = time.perf_counter() - g.pop("profile_started")
+        try:
+            if isinstance(profiler, StackSampler):
+                profiler.stop()
+                name = _profile_filename("collapsed", elapsed)
+                with open(os.path.join(app.config["PROFILING_DIR"], name), "w") as handle:
+                    handle.write(profiler.collapsed())
+            else:
+                profiler.disable()
+                name = _profile_filename("pstats", elapsed)
+                profiler.dump_stats(os.path.join(app.config["PROFILING_DIR"], name))
+            _prune(app.config["PROFILING_DIR"], app.config["PROFILING_MAX_FILES"])
+            response.headers["X-Profile-Id"] = name
+        except OSError as e:
+            logger.error(f"Could not store profile: {str(e)}")
+        return response
+
+    @app.teardown_request
+    def discard_profile(error=None):
+        # A request that failed before after_request still has a running profiler.
+        profiler = g.pop("profiler", None)
+        if isinstance(profiler, StackSampler):
+            profiler.stop()
+        elif profiler is not None:
+            profiler.disable()
@@ -0,0 +1,340 @@
+"""
+Per-client rate limiting and concurrency caps.
+
+Every route belongs to a budget ("default", "expensive" or "auth"), each with
+its own token bucket: `<requests>/<seconds>` allows bursts of `requests` and
+refills at `requests / seconds` tokens per second. The limits are checked
+before the view authenticates the request, so a basic auth username nobody has
+checked yet is never used as a key (it would let a client drain another user's
+budget, or mint a bucket per made-up name):
+
+- requests without credentials, and the "auth" budget (token and register),
+  are charged to the client address before the view runs;
+- requests with credentials are charged to the user once `verify_password`
+  has accepted them (`charge_authenticated`). Each rejected password takes a
+  token from the address's "auth" bucket (`charge_failed_authentication`),
+  and an address whose bucket is empty gets 429 before any bcrypt work.
+
+Behind a load balancer every request comes from the proxy's address: set
+`RATE_LIMIT_TRUSTED_PROXIES` to the number of proxies in front of the app and
+the client address is read from `X-Forwarded-For` instead (as werkzeug's
+ProxyFix does). Never set it higher than the real number of proxies, or
+clients can pick their own address.
+
+Buckets live in a `BucketStore`: `MemoryBucketStore` is per process, so with N
+worker processes each client effectively gets N times every limit, while
+`SQLiteBucketStore` shares buckets between the workers of one host (the
+gunicorn config selects it when it starts more than one worker). A bucket that
+has refilled to capacity is the same as no bucket, so both stores periodically
+drop those, and idle clients do not accumulate. Concurrency caps are per process.
+"""
+# Standard library imports
+import contextlib
+import logging
+import math
+import sqlite3
+import threading
+import time
+# Flask imports
+from flask import abort, current_app, g, jsonify, request
+
+logger = logging.getLogger(__name__)
+
+BUDGETS = ("default", "expensive", "auth")
+# Static files and health checks (polled by load balancers) are never limited.
+EXEMPT_ENDPOINTS = frozenset({"static", "health.liveness", "health.readiness"})
+# Set in the WSGI environ of requests the app makes to itself (warm-up); clients cannot set it.
+EXEMPT_ENVIRON_KEY = "ratelimit.exempt"
+# Seconds between sweeps for buckets that have refilled completely.
+SWEEP_INTERVAL = 60.0
+
+
+def parse_limit(value):
+    """Parse `<requests>/<seconds>` into (capacity, refill rate per second); empty or 0 disables the limit."""
+    if not value or value.strip() in ("0", "off"):
+        return None
+    requests, _, seconds = value.partition("/")
+    capacity = float(requests)
+    return capacity, capacity / float(seconds or 1)
+
+
+def _refill(tokens, updated, capacity, rate, now):
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+def _decide(tokens, capacity, rate, cost):
+    """Return (allowed, tokens left, seconds until `cost` tokens are available)."""
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / rate
+
+
+def _full_at(tokens, capacity, rate, now):
+    """When a bucket left with `tokens` at `now` will be full again, and can be forgotten."""
+    return now + (capacity - tokens) / rate
+
+
+class BucketStore:
+    """Interface for token bucket storage backends."""
+
+    def consume(self, key, capacity, rate, cost=1.0):
+        """Try to take `cost` tokens from bucket `key`; returns (allowed, remaining, retry_after)."""
+        raise NotImplementedError
+
+
+class MemoryBucketStore(BucketStore):
+    """In-process token buckets."""
+
+    def __init__(self, clock=time.monotonic, sweep_interval=SWEEP_INTERVAL):
+        self.clock = clock
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._last_sweep = clock()
+
+    def consume(self, key, capacity, rate, cost=1.0):
+        with self._lock:
+            now = self.clock()
+            if now - self._last_sweep >= self.sweep_interval:
+                self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+                self._last_sweep = now
+            tokens, updated, _ = self._buckets.get(key, (capacity, now, now))
+            allowed, tokens, retry_after = _decide(_refill(tokens, updated, capacity, rate, now), capacity, rate, cost)
+            self._buckets[key] = (tokens, now, _full_at(tokens, capacity, rate, now))
+            return allowed, tokens, retry_after
+
+
+class SQLiteBucketStore(BucketStore):
+    """Token buckets in a local SQLite file, shared by every worker process on the host."""
+
+    def __init__(self, path, clock=time.time, sweep_interval=SWEEP_INTERVAL):
+        self.path = path
+        self.clock = clock
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._last_sweep = clock()
+        # Not kept: the app is created in the gunicorn master, and connections must not cross a fork.
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        connection.execute("CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+                           "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(rate_limit_buckets)")]
+        if "full_at" not in columns:
+            # Files written before buckets expired: their rows are swept on the first pass.
+            connection.execute("ALTER TABLE rate_limit_buckets ADD COLUMN full_at REAL NOT NULL DEFAULT 0")
+        connection.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_buckets_full_at ON rate_limit_buckets (full_at)")
+        connection.close()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def consume(self, key, capacity, rate, cost=1.0):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            now = self.clock()
+            if now - self._last_sweep >= self.sweep_interval:
+                connection.execute("DELETE FROM rate_limit_buckets WHERE full_at <= ?", (now,))
+                self._last_sweep = now
+            row = connection.execute("SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            allowed, tokens, retry_after = _decide(_refill(tokens, updated, capacity, rate, now), capacity, rate, cost)
+            connection.execute("INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated, full_at) "
+                               "VALUES (?, ?, ?, ?)", (key, tokens, now, _full_at(tokens, capacity, rate, now)))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return allowed, tokens, retry_after
+
+
+class ConcurrencyLimiter:
+    """Caps the number of in-flight requests per key within this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}
+
+    def acquire(self, key, limit):
+        with self._lock:
+            if self._active.get(key, 0) >= limit:
+                return False
+            self._active[key] = self._active.get(key, 0) + 1
+            return True
+
+    def release(self, key):
+        with self._lock:
+            remaining = self._active.get(key, 0) - 1
+            if remaining > 0:
+                self._active[key] = remaining
+            else:
+                self._active.pop(key, None)
+
+
+def create_bucket_store(url):
+    """`memory` or `sqlite:///path/to/buckets.db`."""
+    if url == "memory":
+        return MemoryBucketStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteBucketStore(url[len("sqlite:///"):])
+    raise ValueError("RATE_LIMIT_STORE must be 'memory' or 'sqlite:///<path>'")
+
+
+def too_many_requests(retry_after, message):
+    response = jsonify({"error": "Too Many Requests", "message": message, "retry_after": retry_after})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+class RateLimiter:
+    """The app's budgets, bucket store and concurrency caps."""
+
+    def __init__(self, app):
+        self.store = create_bucket_store(app.config["RATE_LIMIT_STORE"])
+        self.concurrency_limiter = ConcurrencyLimiter()
+        self.limits = {budget: parse_limit(app.config[f"RATE_LIMIT_{budget.upper()}"]) for budget in BUDGETS}
+        self.concurrency = {budget: app.config[f"CONCURRENCY_LIMIT_{budget.upper()}"] for budget in BUDGETS}
+        self.endpoints = {endpoint: budget for budget in ("expensive", "auth")
+                          for endpoint in app.config[f"RATE_LIMIT_{budget.upper()}_ENDPOINTS"]}
+        self.trusted_proxies = app.config["RATE_LIMIT_TRUSTED_PROXIES"]
+
+    def budget_for(self, endpoint):
+        return self.endpoints.get(endpoint, "default")
+
+    def client_address(self):
+        """The client's address: the remote address, or the one the trusted proxies put in X-Forwarded-For."""
+        if self.trusted_proxies:
+            forwarded = [address.strip() for address in request.headers.get("X-Forwarded-For", "").split(",")
+                         if address.strip()]
+            if len(forwarded) >= self.trusted_proxies:
+                return forwarded[-self.trusted_proxies]
+        return request.remote_addr
+
+    def charge(self, budget, key, cost=1.0, headers=True):
+        """
+        Take `cost` tokens from `key`'s bucket of `budget`; returns a 429 response, or None when allowed.
+
+        With `headers`, the bucket's state is reported in this response's X-RateLimit headers.
+        """
+        if self.limits[budget] is None:
+            return None
+        capacity, rate = self.limits[budget]
+        allowed, remaining, retry_after = self.store.consume(f"{budget}:{key}", capacity, rate, cost)
+        if headers:
+            g.rate_limit = (int(capacity), int(remaining))
+        if not allowed:
+            return too_many_requests(max(1, math.ceil(retry_after)), f"Rate limit exceeded for the {budget} budget.")
+        return None
+
+    def has_tokens(self, budget, key):
+        """Whether `key`'s bucket of `budget` has a token left, without taking it."""
+        if self.limits[budget] is None:
+            return True
+        capacity, rate = self.limits[budget]
+        return self.store.consume(f"{budget}:{key}", capacity, rate, cost=0)[1] >= 1
+
+    def acquire(self, budget, key):
+        """Take a concurrency slot for this request; returns a 429 response, or None when allowed."""
+        if not self.concurrency[budget]:
+            return None
+        if not self.concurrency_limiter.acquire(f"{budget}:{key}", self.concurrency[budget]):
+            return too_many_requests(1, f"Too many concurrent {budget} requests.")
+        g.concurrency_key = f"{budget}:{key}"
+        return None
+
+    def limit(self, budget, key):
+        return self.charge(budget, key) or self.acquire(budget, key)
+
+    @contextlib.contextmanager
+    def sub_request(self, endpoint, key):
+        """
+        Charge one operation of a /batch request to `key` as if it were a request of its own.
+
+        Yields a 429 response, or None when the operation may run. Operations run one at a time,
+        so one that shares the batch's own concurrency slot (same budget) does not take another.
+        """
+        budget = self.budget_for(endpoint)
+        rejection = self.charge(budget, key, headers=False)
+        slot = f"{budget}:{key}"
+        if rejection is not None or not self.concurrency[budget] or g.get("concurrency_key") == slot:
+            slot = None
+        elif not self.concurrency_limiter.acquire(slot, self.concurrency[budget]):
+            slot, rejection = None, too_many_requests(1, f"Too many concurrent {budget} requests.")
+        try:
+            yield rejection
+        finally:
+            if slot is not None:
+                self.concurrency_limiter.release(slot)
+
+
+def charge_authenticated(user_id):
+    """Charge this request to the user `verify_password` accepted; aborts with 429 when over a limit."""
+    limiter = current_app.extensions.get("rate_limiter")
+    budget = g.pop("rate_limit_budget", None)
+    if limiter is None or budget is None:
+        return
+    rejection = limiter.limit(budget, f"user:{user_id}")
+    if rejection is not None:
+        abort(rejection)
+
+
+def charge_failed_authentication():
+    """Take a token from the client address's "auth" bucket for a rejected password."""
+    limiter = current_app.extensions.get("rate_limiter")
+    if limiter is not None:
+        # The failure is its cost: it is not charged to the route's budget as well.
+        g.pop("rate_limit_budget", None)
+        limiter.charge("auth", f"ip:{limiter.client_address()}")
+
+
+def init_rate_limiting(app):
+    """Register the rate limit and concurrency hooks when `RATE_LIMIT_ENABLED` is set."""
+    if not app.config["RATE_LIMIT_ENABLED"]:
+        return None
+    limiter = RateLimiter(app)
+    app.extensions["rate_limiter"] = limiter
+
+    @app.before_request
+    def enforce_rate_limits():
+        if (request.endpoint is None or request.endpoint in EXEMPT_ENDPOINTS
+                or request.environ.get(EXEMPT_ENVIRON_KEY)):
+            return None
+        budget = limiter.budget_for(request.endpoint)
+        address_key = f"ip:{limiter.client_address()}"
+        if budget != "auth" and request.authorization is not None:
+            if not limiter.has_tokens("auth", address_key):
+                return too_many_requests(max(1, math.ceil(1 / limiter.limits["auth"][1])),
+                                         "Too many failed authentication attempts.")
+            if not limiter.has_tokens(budget, address_key):
+                # Spent by earlier requests whose credentials were never verified (see add_rate_limit_headers).
+                return too_many_requests(max(1, math.ceil(1 / limiter.limits[budget][1])),
+                                         f"Rate limit exceeded for the {budget} budget.")
+            # Charged to the user once the credentials are verified (see charge_authenticated).
+            g.rate_limit_budget = budget
+            return None
+        return limiter.limit(budget, address_key)
+
+    @app.after_request
+    def add_rate_limit_headers(response):
+        budget = g.pop("rate_limit_budget", None)
+        if budget is not None:
+            # Credentials the route never checked: charge the address after all.
+            limiter.charge(budget, f"ip:{limiter.client_address()}")
+        rate_limit = g.pop("rate_limit", None)
+        if rate_limit is not None:
+            response.headers["X-RateLimit-Limit"] = str(rate_limit[0])
+            response.headers["X-RateLimit-Remaining"] = str(rate_limit[1])
+        return response
+
+    @app.teardown_request
+    def release_concurrency_slot(error=None):
+        key = g.pop("concurrency_key", None)
+        if key is not None:
+            limiter.concurrency_limiter.release(key)
+
+    return limiter
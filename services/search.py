@@ -0,0 +1,133 @@
+"""
+Ranked full-text search over every descriptive character field.
+
+`search_matches(session, text)` returns a subquery of (id, score) for the
+characters matching `text`, so callers can join it, add the usual filters,
+count, facet and paginate like any other query. Every word of `text` must
+match (as a prefix) somewhere in name, nickname, house, animal, symbol, role
+or strength; names and nicknames weigh more than the other fields.
+
+Backends, chosen from the session's dialect:
+
+- PostgreSQL: the generated `characters.search_vector` tsvector column and its
+  GIN index (created by migration 4c1f9a2e7b36), ranked with `ts_rank_cd`;
+- SQLite: the external-content FTS5 table `characters_fts`, kept in sync by
+  triggers and ranked with `bm25`. `ensure_search_index` creates it on
+  databases built with `create_all` instead of migrations (until it exists,
+  searches use the fallback below);
+- anything else: `ilike` on each field with a constant score, ordered by id.
+"""
+# Standard library imports
+import logging
+import re
+import threading
+# Third-party imports
+from sqlalchemy import column, func, literal, literal_column, or_, select, table, text
+from sqlalchemy.exc import OperationalError
+# Local imports
+from models.model_tables import Character
+
+SEARCH_FIELDS = ("name", "nickname", "house", "animal", "symbol", "role", "strength")
+# Relative weights, in SEARCH_FIELDS order (bm25 takes one weight per FTS5 column).
+FIELD_WEIGHTS = (10.0, 10.0, 4.0, 2.0, 2.0, 2.0, 1.0)
+
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS characters_fts USING fts5("
+    f"{', '.join(SEARCH_FIELDS)}, content='characters', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS characters_fts_insert AFTER INSERT ON characters BEGIN "
+    f"INSERT INTO characters_fts(rowid, {', '.join(SEARCH_FIELDS)}) "
+    f"VALUES (new.id, {', '.join('new.' + field for field in SEARCH_FIELDS)}); END",
+    "CREATE TRIGGER IF NOT EXISTS characters_fts_delete AFTER DELETE ON characters BEGIN "
+    f"INSERT INTO characters_fts(characters_fts, rowid, {', '.join(SEARCH_FIELDS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + field for field in SEARCH_FIELDS)}); END",
+    "CREATE TRIGGER IF NOT EXISTS characters_fts_update AFTER UPDATE ON characters BEGIN "
+    f"INSERT INTO characters_fts(characters_fts, rowid, {', '.join(SEARCH_FIELDS)}) "
+    f"VALUES ('delete', old.id, {', '.join('old.' + field for field in SEARCH_FIELDS)}); "
+    f"INSERT INTO characters_fts(rowid, {', '.join(SEARCH_FIELDS)}) "
+    f"VALUES (new.id, {', '.join('new.' + field for field in SEARCH_FIELDS)}); END",
+)
+
+SQLITE_FTS_OBJECTS = ("characters_fts", "characters_fts_insert", "characters_fts_delete", "characters_fts_update")
+# Milliseconds a search waits to build a missing index before searching without it.
+SEARCH_INDEX_BUSY_TIMEOUT = 200
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_ensured = set()
+_ensure_lock = threading.Lock()
+
+
+def search_terms(text_query):
+    """The words of a search string; punctuation and operators are ignored."""
+    return _WORD.findall(text_query.lower())
+
+
+def ensure_search_index(engine, busy_timeout=None):
+    """
+    Create the SQLite FTS5 table and triggers (once per database) and fill them if they are new.
+
+    Runs in its own transaction on `engine`, never in a caller's session, so it cannot commit a
+    request's pending writes or an atomic batch early. Warm-up builds it when a worker starts.
+    With `busy_timeout` (ms), gives up when the write lock is not free by then, for instance
+    because the caller's own transaction holds it. Returns whether the index is ready.
+    """
+    if engine.dialect.name != "sqlite" or engine.url in _ensured:
+        return True
+    with _ensure_lock:
+        if engine.url in _ensured:
+            return True
+        with engine.connect() as connection:
+            names = {name for name, in connection.exec_driver_sql("SELECT name FROM sqlite_master")}
+            if not names.issuperset(SQLITE_FTS_OBJECTS):
+                previous = connection.exec_driver_sql("PRAGMA busy_timeout").scalar()
+                if busy_timeout is not None:
+                    connection.exec_driver_sql(f"PRAGMA busy_timeout = {int(busy_timeout)}")
+                try:
+                    for statement in SQLITE_FTS_DDL:
+                        connection.exec_driver_sql(statement)
+                    if "characters_fts" not in names:
+                        connection.exec_driver_sql("INSERT INTO characters_fts(characters_fts) VALUES ('rebuild')")
+                    connection.commit()
+                except OperationalError as e:
+                    connection.rollback()
+                    if busy_timeout is None or "locked" not in str(e):
+                        raise
+                    logger.warning("Search index not built yet, the database is locked: %s", e)
+                    return False
+                finally:
+                    connection.exec_driver_sql(f"PRAGMA busy_timeout = {int(previous)}")
+        _ensured.add(engine.url)
+        return True
+
+
+def search_matches(session, text_query):
+    """Subquery of (id, score) for characters matching every word of `text_query`; higher scores rank first."""
+    terms = search_terms(text_query)
+    if not terms:
+        return select(Character.id.label("id"), literal(0.0).label("score")).where(literal(False)).subquery()
+    bind = session.get_bind(Character)
+    dialect = bind.dialect.name
+
+    if dialect == "postgresql":
+        tsquery = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{term}:*" for term in terms))
+        search_vector = literal_column("characters.search_vector")
+        return (
+            select(Character.id.label("id"), func.ts_rank_cd(search_vector, tsquery).label("score"))
+            .where(search_vector.op("@@")(tsquery))
+            .subquery()
+        )
+
+    # Until the index exists, fall through to the ilike search rather than wait for the write lock.
+    if dialect == "sqlite" and ensure_search_index(bind, busy_timeout=SEARCH_INDEX_BUSY_TIMEOUT):
+        fts = table("characters_fts", column("rowid"))
+        query = " ".join(f'"{term}"*' for term in terms)
+        bm25 = func.bm25(text("characters_fts"), *[literal(weight) for weight in FIELD_WEIGHTS])
+        return (
+            select(fts.c.rowid.label("id"), (-bm25).label("score"))
+            .where(text("characters_fts MATCH :search_query").bindparams(search_query=query))
+            .subquery()
+        )
+
+    conditions = [or_(*[getattr(Character, field).ilike(f"%{term}%") for field in SEARCH_FIELDS]) for term in terms]
+    return select(Character.id.label("id"), literal(0.0).label("score")).where(*conditions).subquery()
@@ -0,0 +1,71 @@
+"""
+Content negotiation between JSON and binary response formats.
+
+Handlers build their payload from plain Python values once, using
+`encode_rows` to turn ORM characters or snapshot rows into dictionaries,
+and `make_payload_response` serializes it in the format the client asked for
+in its `Accept` header:
+
+- application/json (default);
+- application/msgpack (also application/x-msgpack), when `msgpack` is installed;
+- application/cbor, when `cbor2` is installed.
+
+Binary formats are intended for internal service-to-service callers that
+fetch large pages; browsers and other clients keep getting JSON.
+"""
+# Standard library imports
+from operator import attrgetter
+# Flask imports
+from flask import current_app, jsonify, request
+# Local imports
+from services.snapshot import CHARACTER_FIELDS
+
+try:
+    import msgpack
+except ImportError:  # optional dependency
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # optional dependency
+    cbor2 = None
+
+JSON_MIMETYPE = "application/json"
+
+_character_values = attrgetter(*CHARACTER_FIELDS)
+
+
+def encode_rows(characters):
+    """Turn characters (ORM objects or snapshot rows) into plain dictionaries for any output format."""
+    return [dict(zip(CHARACTER_FIELDS, _character_values(character))) for character in characters]
+
+
+def available_encoders():
+    """Binary encoders by mimetype, limited to the libraries that are installed."""
+    encoders = {}
+    if msgpack is not None:
+        encoders["application/msgpack"] = msgpack.packb
+        encoders["application/x-msgpack"] = msgpack.packb
+    if cbor2 is not None:
+        encoders["application/cbor"] = cbor2.dumps
+    return encoders
+
+
+BINARY_ENCODERS = available_encoders()
+
+
+def negotiate_mimetype():
+    """The response mimetype for the current request; JSON unless a binary format is preferred."""
+    # JSON is listed first, so a missing Accept header or */* selects it.
+    return request.accept_mimetypes.best_match([JSON_MIMETYPE, *BINARY_ENCODERS], default=JSON_MIMETYPE)
+
+
+def make_payload_response(payload):
+    """Serialize `payload` (dicts, lists and scalars) in the negotiated format."""
+    mimetype = negotiate_mimetype()
+    if mimetype == JSON_MIMETYPE:
+        response = jsonify(payload)
+    else:
+        response = current_app.response_class(BINARY_ENCODERS[mimetype](payload), mimetype=mimetype)
+    response.vary.add("Accept")
+    return response
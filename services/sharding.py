@@ -0,0 +1,273 @@
+"""
+Optional horizontal sharding of the characters table across several databases.
+
+With `SHARD_URLS` (comma separated database URLs) the characters live in the
+`characters` table of those databases instead of the main one, spread by
+`SHARD_KEY`:
+
+- `id`: character `id` goes to shard `id % N`, which spreads rows evenly,
+  but a `(name, house)` pair is then only unique within each shard;
+- `house`: a hash of the house picks the shard, so a house's characters
+  share one database (and its `(name, house)` unique index still holds).
+
+Ids stay unique across shards: they are allocated by the `character_shards`
+directory in the main database, which also records the shard of each
+character under the house key. The outbox, users and every other table stay
+in the main database.
+
+Point lookups go to one shard. Listings, filters and sorts run on every
+shard in parallel, each shard returning its rows already in the requested
+order (and only the first `skip + limit` of them when paginated); the
+ordered results are merged with a heap and the page is cut from the merge.
+
+Writes are not atomic across databases: a create commits the row on its
+shard, then the directory entry and the outbox record in the main database.
+A failure in between can leave a row the directory does not know about.
+Search (`q`), autocomplete, upserts, atomic batches, the snapshot and group
+commit only work with the main database and are unavailable while sharding.
+The number of shards cannot change without moving the data.
+"""
+# Standard library imports
+import heapq
+import itertools
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+# Third-party imports
+from sqlalchemy import create_engine, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+# Local imports
+from config.sqlite import apply_sqlite_profile, is_sqlite_file, sqlite_profile
+from models.model_tables import Character, CharacterShard
+from services import writes
+from services.snapshot import character_columns
+
+SHARD_KEYS = ("id", "house")
+
+
+def sort_order(field="id", descending=False):
+    """
+    How shards order rows by `field` and how the merge compares them: (ORDER BY clauses, key, reverse).
+
+    Like `sort_characters`, text sorts case-insensitively with NULL as "", unknown ages come
+    before known ones and ties keep id order in both directions.
+    """
+    column = Character.__table__.c[field]
+    if field == "id":
+        clauses, value = [], lambda row: ()
+    elif field == "age":
+        clauses, value = [column.is_not(None), column], lambda row: (row.age is not None, row.age or 0)
+    else:
+        # The database's lower() only folds ASCII; shards and the merge agree for ASCII text.
+        clauses = [func.lower(func.coalesce(column, ""))]
+        value = lambda row: ((getattr(row, field) or "").lower(),)
+    if descending:
+        return ([clause.desc() for clause in clauses] + [Character.id],
+                lambda row: value(row) + (-row.id,), True)
+    return clauses + [Character.id], lambda row: value(row) + (row.id,), False
+
+
+class ShardRouter:
+    """
+    Routes character reads and writes to the shard databases.
+
+    The write methods take the same arguments as those of `services.writes`, plus the main
+    database session for the directory, so write endpoints can use either interchangeably.
+    """
+
+    def __init__(self, urls, key="id", pragmas=None):
+        if key not in SHARD_KEYS:
+            raise ValueError(f"SHARD_KEY must be one of {', '.join(SHARD_KEYS)}")
+        if not urls:
+            raise ValueError("Sharding needs at least one database URL")
+        self.key = key
+        self.engines = [create_engine(url) for url in urls]
+        for url, engine in zip(urls, self.engines):
+            if pragmas and is_sqlite_file(url):
+                apply_sqlite_profile(engine, pragmas)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def __len__(self):
+        return len(self.engines)
+
+    def create_tables(self):
+        """Create the characters table (and its indexes) on every shard that lacks it."""
+        for engine in self.engines:
+            Character.__table__.create(engine, checkfirst=True)
+
+    def dispose(self):
+        """Drop pooled connections, e.g. those inherited by a forked worker."""
+        for engine in self.engines:
+            engine.dispose(close=False)
+
+    # Routing
+
+    def shard_for_house(self, house):
+        return zlib.crc32((house or "").encode()) % len(self.engines)
+
+    def locate(self, session, character_id):
+        """The shard holding `character_id`, or None when the directory does not know it."""
+        if self.key == "id":
+            return character_id % len(self.engines)
+        return session.scalar(select(CharacterShard.shard).where(CharacterShard.id == character_id))
+
+    def locate_many(self, session, ids):
+        """Map each shard to the ids of `ids` it holds."""
+        if self.key == "id":
+            pairs = ((character_id, character_id % len(self.engines)) for character_id in ids)
+        else:
+            pairs = session.execute(select(CharacterShard.id, CharacterShard.shard)
+                                    .where(CharacterShard.id.in_(set(ids)))).tuples()
+        shards = {}
+        for character_id, shard in pairs:
+            shards.setdefault(shard, set()).add(character_id)
+        return shards
+
+    # Execution
+
+    def _pool(self):
+        # Worker threads do not survive a fork; a forked process starts its own pool.
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=len(self.engines), thread_name_prefix="shard")
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, queries):
+        """Run the `{shard: query(session)}` queries in parallel; returns their results in the same order."""
+        def on_shard(item):
+            shard, query = item
+            with Session(self.engines[shard], expire_on_commit=False) as session:
+                return query(session)
+        items = list(queries.items())
+        if len(items) == 1:
+            return [on_shard(items[0])]
+        return list(self._pool().map(on_shard, items))
+
+    def run_everywhere(self, query):
+        """Run `query(session)` on every shard in parallel; returns the results in shard order."""
+        return self.run(dict.fromkeys(range(len(self.engines)), query))
+
+    @contextmanager
+    def begin(self, shard):
+        """A session on `shard` in a transaction that commits on exit."""
+        with Session(self.engines[shard], expire_on_commit=False) as session, session.begin():
+            yield session
+
+    # Reads
+
+    def get(self, session, character_id):
+        """One character, read from its shard only."""
+        shard = self.locate(session, character_id)
+        if shard is None:
+            return None
+        return self.run({shard: lambda shard_session: shard_session.get(Character, character_id)})[0]
+
+    def get_many(self, session, ids):
+        """Characters by id as {id: character}, one query per shard holding any of them."""
+        def fetch(shard_ids):
+            return lambda shard_session: shard_session.scalars(
+                select(Character).where(Character.id.in_(shard_ids))).all()
+        shards = self.locate_many(session, ids)
+        found = self.run({shard: fetch(shard_ids) for shard, shard_ids in shards.items()})
+        return {character.id: character for characters in found for character in characters}
+
+    def gather(self, build, order=None, skip=0, limit=None, count=False):
+        """
+        Scatter the query `build(session)` to every shard and merge the ordered results.
+
+        `order` comes from `sort_order` (id order by default). With `limit`, each shard only
+        returns its first `skip + limit` rows. Returns (total, rows): the matching rows on all
+        shards when `count` is set, else the number of rows returned.
+        """
+        clauses, key, reverse = order or sort_order()
+
+        def query(session):
+            query = build(session)
+            total = query.order_by(None).count() if count else None
+            rows = query.order_by(*clauses)
+            if limit is not None:
+                rows = rows.limit(skip + limit)
+            return total, rows.all()
+
+        results = self.run_everywhere(query)
+        merged = heapq.merge(*[rows for _, rows in results], key=key, reverse=reverse)
+        rows = list(itertools.islice(merged, skip, None if limit is None else skip + limit))
+        return (sum(total for total, _ in results) if count else len(rows)), rows
+
+    def columns(self):
+        """NumPy columns of the characters on every shard for vectorised statistics, like `snapshot.columns()`."""
+        fields = [Character.id, Character.house, Character.role, Character.animal, Character.age, Character.death]
+        results = self.run_everywhere(lambda session: session.execute(
+            select(*fields).order_by(Character.id)).all())
+        return character_columns(list(heapq.merge(*results, key=lambda row: row.id)))
+
+    # Writes, with the signatures of services.writes
+
+    def insert_character(self, session, values):
+        """Allocate an id in the directory and insert the character on its shard."""
+        house_shard = self.shard_for_house(values.get("house")) if self.key == "house" else None
+        character_id = session.execute(insert(CharacterShard).values(shard=house_shard)
+                                       .returning(CharacterShard.id)).scalar_one()
+        shard = house_shard if self.key == "house" else character_id % len(self.engines)
+        with self.begin(shard) as shard_session:
+            return writes.insert_character(shard_session, {**values, "id": character_id})
+
+    def update_character(self, session, character_id, values, with_previous=False, expected_versions=None):
+        """
+        Update a character on its shard; returns (new row, previous row or None) like `writes.update_character`.
+
+        With SHARD_KEY=house, a new house that hashes to another shard moves the character there.
+        """
+        shard = self.locate(session, character_id)
+        if shard is None:
+            return None, None
+        target = self.shard_for_house(values["house"]) if self.key == "house" and "house" in values else shard
+        with self.begin(shard) as shard_session:
+            if target == shard:
+                return writes.update_character(shard_session, character_id, values,
+                                               with_previous=with_previous, expected_versions=expected_versions)
+            # Only committed here once the copy is on the target shard.
+            previous = writes.delete_character(shard_session, character_id, expected_versions=expected_versions)
+            if previous is None:
+                return None, None
+            with self.begin(target) as target_session:
+                result = writes.insert_character(target_session,
+                                                 {**previous, **values, "version": previous["version"] + 1})
+        session.execute(update(CharacterShard).where(CharacterShard.id == character_id).values(shard=target))
+        return result, previous if with_previous else None
+
+    def current_version(self, session, character_id):
+        shard = self.locate(session, character_id)
+        if shard is None:
+            return None
+        return self.run({shard: lambda shard_session: writes.current_version(shard_session, character_id)})[0]
+
+    def delete_character(self, session, character_id):
+        """Delete a character from its shard and the directory; returns the deleted row or None."""
+        shard = self.locate(session, character_id)
+        if shard is None:
+            return None
+        with self.begin(shard) as shard_session:
+            deleted = writes.delete_character(shard_session, character_id)
+        if deleted is not None:
+            session.execute(delete(CharacterShard).where(CharacterShard.id == character_id))
+        return deleted
+
+
+def init_sharding(app):
+    """Create the shard router when `SHARD_URLS` is set; None keeps every character in the main database."""
+    urls = app.config["SHARD_URLS"]
+    if not urls:
+        return None
+    for option in ("SNAPSHOT_ENABLED", "GROUP_COMMIT_ENABLED"):
+        if app.config.get(option):
+            raise ValueError(f"{option} cannot be combined with SHARD_URLS")
+    router = ShardRouter(urls, key=app.config["SHARD_KEY"], pragmas=sqlite_profile(app.config["SQLITE_PROFILE"]))
+    router.create_tables()
+    app.extensions["character_shards"] = router
+    return router
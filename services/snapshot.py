@@ -0,0 +1,275 @@
+"""
+In-process, read-optimised snapshot of the characters table.
+
+Rows are held as `__slots__` objects keyed by id, with secondary indexes kept
+up to date incrementally:
+
+- hash indexes on lower-cased `house` and `role` (value -> set of ids), so a
+  substring filter only scans the few distinct values, not every row;
+- sorted (key, id) arrays for `name`, `house` and `age`, used for range
+  filters with bisect and for pre-sorted listings.
+
+The snapshot is loaded lazily on first use and then refreshed incrementally by
+replaying the `character_changes` outbox from the last sequence number it has
+seen. A local write marks it stale so the next read catches up immediately;
+writes from other processes are picked up every `SNAPSHOT_REFRESH_INTERVAL`
+seconds. NumPy columns for statistics and facets are built on demand and
+cached until the next change.
+"""
+# Standard library imports
+import bisect
+import itertools
+import logging
+import threading
+import time
+# Third-party imports
+import numpy as np
+from sqlalchemy import select
+# Local imports
+from models.model_tables import Character
+from services.changes import fetch_changes, latest_seq
+from services.events import characters_changed
+
+logger = logging.getLogger(__name__)
+
+# Every response shape (ORM, snapshot and outbox rows) carries these, `version` included.
+CHARACTER_FIELDS = ("id", "name", "house", "animal", "symbol", "nickname", "role", "age", "death", "strength",
+                    "version")
+SORTED_FIELDS = ("name", "house", "age")
+
+
+class CharacterRow:
+    """Compact, attribute-only copy of one character."""
+    __slots__ = CHARACTER_FIELDS
+
+    def __init__(self, id, name, house, animal, symbol, nickname, role, age, death, strength, version):
+        self.id = id
+        self.name = name
+        self.house = house
+        self.animal = animal
+        self.symbol = symbol
+        self.nickname = nickname
+        self.role = role
+        self.age = age
+        self.death = death
+        self.strength = strength
+        self.version = version
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(*[values.get(field) for field in CHARACTER_FIELDS])
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in CHARACTER_FIELDS}
+
+
+def _text_key(value):
+    # Mirrors the sort key used by sort_characters: lower-cased strings, None as "".
+    return value.lower() if isinstance(value, str) else ""
+
+
+def character_sort_key(field, row):
+    """Sort key of `row` for sort_characters: text case-insensitive with None as "", unknown ages first."""
+    value = getattr(row, field)
+    if field == "age":
+        # Unknown ages sort before every known age.
+        return (0, 0) if value is None else (1, value)
+    return _text_key(value)
+
+
+class CharacterSnapshot:
+    """Columnar-friendly in-memory copy of the characters table with secondary indexes."""
+
+    def __init__(self, refresh_interval=1.0):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._refreshed_at = 0.0
+        self._stale = False
+        self.last_seq = 0
+        self.version = 0
+        self._rows = {}
+        self._ids = []
+        self._hash_indexes = {"house": {}, "role": {}}
+        self._sorted = {field: [] for field in SORTED_FIELDS}
+        self._columns = None
+
+    # Loading and maintenance
+
+    def load(self, session):
+        """Replace the snapshot with a full copy of the characters table."""
+        started = time.perf_counter()
+        # Read the outbox position first: changes committed during the load are replayed, and replay is idempotent.
+        last_seq = latest_seq(session)
+        result = session.execute(select(*[getattr(Character, field) for field in CHARACTER_FIELDS]))
+        rows = [CharacterRow(*row) for row in result.tuples()]
+        with self._lock:
+            self._rows = {}
+            self._hash_indexes = {"house": {}, "role": {}}
+            for row in rows:
+                self._rows[row.id] = row
+                for field, index in self._hash_indexes.items():
+                    index.setdefault(_text_key(getattr(row, field)), set()).add(row.id)
+            self._ids = sorted(self._rows)
+            self._sorted = {
+                field: sorted((character_sort_key(field, row), row.id) for row in rows) for field in SORTED_FIELDS
+            }
+            self._columns = None
+            self._loaded_at = self._refreshed_at = time.monotonic()
+            self._stale = False
+            self.last_seq = last_seq
+            self.version += 1
+        logger.info("Loaded %d characters into the snapshot in %.3fs", len(rows), time.perf_counter() - started)
+
+    def ensure_current(self, session):
+        """Load on first use, then replay outbox changes when stale or after `refresh_interval` seconds."""
+        if self._loaded_at is None:
+            self.load(session)
+        elif self._stale or time.monotonic() - self._refreshed_at >= self.refresh_interval:
+            self.catch_up(session)
+
+    def catch_up(self, session, batch_size=1000):
+        """Apply every outbox change newer than `last_seq`."""
+        with self._lock:
+            self._stale = False
+            self._refreshed_at = time.monotonic()
+            while True:
+                changes = fetch_changes(session, self.last_seq, batch_size)
+                for change in changes:
+                    self.apply(change.operation, change.payload)
+                    self.last_seq = change.seq
+                if len(changes) < batch_size:
+                    break
+
+    def mark_stale(self, *args, **kwargs):
+        """Connected to `characters_changed`, so this process reads its own writes."""
+        self._stale = True
+
+    def _index_row(self, row):
+        bisect.insort(self._ids, row.id)
+        for field, index in self._hash_indexes.items():
+            index.setdefault(_text_key(getattr(row, field)), set()).add(row.id)
+        for field in SORTED_FIELDS:
+            bisect.insort(self._sorted[field], (character_sort_key(field, row), row.id))
+
+    def _unindex_row(self, row):
+        position = bisect.bisect_left(self._ids, row.id)
+        if position < len(self._ids) and self._ids[position] == row.id:
+            del self._ids[position]
+        for field, index in self._hash_indexes.items():
+            key = _text_key(getattr(row, field))
+            index.get(key, set()).discard(row.id)
+            if key in index and not index[key]:
+                del index[key]
+        for field in SORTED_FIELDS:
+            entries = self._sorted[field]
+            entry = (character_sort_key(field, row), row.id)
+            position = bisect.bisect_left(entries, entry)
+            if position < len(entries) and entries[position] == entry:
+                del entries[position]
+
+    def apply(self, operation, character):
+        """Apply one committed change (an upsert for create/update, a removal for delete)."""
+        with self._lock:
+            if character is None:
+                return
+            existing = self._rows.pop(character["id"], None)
+            if existing is not None:
+                self._unindex_row(existing)
+            if operation != "delete":
+                row = CharacterRow.from_dict(character)
+                self._rows[row.id] = row
+                self._index_row(row)
+            self._columns = None
+            self.version += 1
+
+    # Reads
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, character_id):
+        return self._rows.get(character_id)
+
+    def page(self, skip, limit):
+        """Rows in id order for offset pagination, with the total row count."""
+        with self._lock:
+            ids = self._ids[skip:skip + limit] if limit >= 0 else self._ids[skip:]
+            return len(self._ids), [self._rows[character_id] for character_id in ids]
+
+    def _matching_ids(self, field, needle):
+        needle = needle.lower()
+        matched = set()
+        for key, ids in self._hash_indexes[field].items():
+            if needle in key:
+                matched |= ids
+        return matched
+
+    def filter(self, name=None, house=None, role=None, age_min=None, age_max=None):
+        """Rows matching the same case-insensitive substring and age range rules as filter_characters."""
+        with self._lock:
+            candidates = None
+            for field, needle in (("house", house), ("role", role)):
+                if needle:
+                    ids = self._matching_ids(field, needle)
+                    candidates = ids if candidates is None else candidates & ids
+            if age_min or age_max:
+                entries = self._sorted["age"]
+                low = bisect.bisect_left(entries, ((1, age_min), -1)) if age_min else bisect.bisect_left(entries, ((1,),))
+                high = bisect.bisect_right(entries, ((1, age_max), float("inf"))) if age_max else len(entries)
+                ids = {character_id for _, character_id in entries[low:high]}
+                candidates = ids if candidates is None else candidates & ids
+            if candidates is None:
+                rows = [self._rows[character_id] for character_id in self._ids]
+            else:
+                rows = [self._rows[character_id] for character_id in sorted(candidates)]
+            if name:
+                needle = name.lower()
+                rows = [row for row in rows if row.name is not None and needle in row.name.lower()]
+            return rows
+
+    def sorted_rows(self, field, descending=False):
+        """All rows ordered by `field`; equal keys keep id order in both directions, like a stable sort."""
+        with self._lock:
+            entries = self._sorted[field]
+            if not descending:
+                return [self._rows[character_id] for _, character_id in entries]
+            rows = []
+            for _, group in itertools.groupby(reversed(entries), key=lambda entry: entry[0]):
+                rows.extend(self._rows[character_id] for _, character_id in reversed(list(group)))
+            return rows
+
+    def columns(self):
+        """NumPy columns of the whole snapshot for vectorised statistics (see `character_columns`)."""
+        with self._lock:
+            if self._columns is None:
+                self._columns = character_columns([self._rows[character_id] for character_id in self._ids])
+            return self._columns
+
+
+def character_columns(rows):
+    """
+    NumPy columns of `rows` (in id order) for vectorised statistics: "id" as int64, "house",
+    "role" and "animal" as object arrays, "age" and "death" as float64 with NaN for nulls.
+    """
+    as_float = lambda field: np.array(
+        [np.nan if getattr(row, field) is None else getattr(row, field) for row in rows],
+        dtype=np.float64)
+    return {
+        "id": np.array([row.id for row in rows], dtype=np.int64),
+        "house": np.array([row.house for row in rows], dtype=object),
+        "role": np.array([row.role for row in rows], dtype=object),
+        "animal": np.array([row.animal for row in rows], dtype=object),
+        "age": as_float("age"),
+        "death": as_float("death"),
+    }
+
+
+def init_snapshot(app):
+    """Create the snapshot when `SNAPSHOT_ENABLED` is set."""
+    if not app.config["SNAPSHOT_ENABLED"]:
+        return None
+    snapshot = CharacterSnapshot(refresh_interval=app.config["SNAPSHOT_REFRESH_INTERVAL"])
+    characters_changed.connect(snapshot.mark_stale, weak=False)
+    app.extensions["character_snapshot"] = snapshot
+    return snapshot
@@ -0,0 +1,113 @@
+"""
+Prebuilt, cache-friendly serving of the OpenAPI document, the docs page and static files.
+
+At startup every asset is rendered once and kept in memory with a content
+hash and precompressed variants (gzip always, brotli/zstd when installed), so
+serving one is a dictionary lookup:
+
+- `ETag` is the content hash (with the encoding as a suffix), and a matching
+  `If-None-Match` is answered with 304;
+- `url_for()` links to these assets carry `?v=<hash>`. Requests for the current
+  hash are content-addressed and get `Cache-Control: public, max-age=31536000,
+  immutable`; unversioned URLs get `STATIC_MAX_AGE` and revalidate by ETag.
+"""
+# Standard library imports
+import hashlib
+import mimetypes
+import os
+# Flask imports
+from flask import json, render_template, request
+# Local imports
+from services.compression import PROFILES, available_encodings, compress, negotiate
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class StaticAsset:
+    """One prebuilt response body with its hash and precompressed variants."""
+
+    def __init__(self, body, mimetype, min_size=256):
+        self.body = body
+        self.mimetype = mimetype
+        self.hash = hashlib.sha256(body).hexdigest()[:16]
+        self.variants = {}
+        if len(body) >= min_size:
+            for encoding in available_encodings():
+                compressed = compress(body, encoding, PROFILES["best"][encoding])
+                if len(compressed) < len(body):
+                    self.variants[encoding] = compressed
+
+    def etag(self, encoding=None):
+        return f"{self.hash}-{encoding}" if encoding else self.hash
+
+    def response(self, response_class, max_age):
+        """Build the response for the current request."""
+        if_none_match = request.if_none_match
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""), list(self.variants))
+        if any(tag.split("-")[0] == self.hash for tag in if_none_match.as_set()) or "*" in if_none_match:
+            # A 304 carries the validators and caching headers the 200 would have (RFC 9110, 15.4.5).
+            response = response_class(status=304)
+        else:
+            response = response_class(self.variants.get(encoding, self.body), mimetype=self.mimetype)
+            if encoding is not None:
+                response.headers["Content-Encoding"] = encoding
+        response.set_etag(self.etag(encoding))
+        if self.variants:
+            response.vary.add("Accept-Encoding")
+        versioned = request.args.get("v") == self.hash
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if versioned else f"public, max-age={max_age}"
+        return response
+
+
+def load_static_assets(folder):
+    """Read every file under `folder` into assets keyed by their path relative to it."""
+    assets = {}
+    for root, _, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                body = f.read()
+            mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            assets[os.path.relpath(path, folder).replace(os.sep, "/")] = StaticAsset(body, mimetype)
+    return assets
+
+
+def init_static_assets(app, apifairy):
+    """Prebuild the assets and route the spec, docs and static endpoints to them. Call after all routes exist."""
+    if not app.config["STATIC_CACHE_ENABLED"]:
+        return
+    max_age = app.config["STATIC_MAX_AGE"]
+    static_assets = load_static_assets(app.static_folder) if app.static_folder else {}
+    with app.test_request_context():
+        spec_asset = StaticAsset(json.dumps(apifairy.apispec).encode("utf-8"), "application/json")
+
+    @app.url_defaults
+    def add_asset_version(endpoint, values):
+        if endpoint == "apifairy.json":
+            values.setdefault("v", spec_asset.hash)
+        elif endpoint == "static" and values.get("filename") in static_assets:
+            values.setdefault("v", static_assets[values["filename"]].hash)
+
+    # The docs page links to the spec through url_for, so it is rendered after the url default exists.
+    with app.test_request_context():
+        docs_asset = StaticAsset(render_template(f"apifairy/{apifairy.ui}.html", title=apifairy.title,
+                                                 version=apifairy.version).encode("utf-8"), "text/html")
+
+    def serve_spec():
+        return spec_asset.response(app.response_class, max_age)
+
+    def serve_docs():
+        return docs_asset.response(app.response_class, max_age)
+
+    def serve_static(filename):
+        asset = static_assets.get(filename)
+        if asset is None:
+            return app.send_static_file(filename)
+        return asset.response(app.response_class, max_age)
+
+    for endpoint, view in (("apifairy.json", serve_spec), ("apifairy.docs", serve_docs), ("static", serve_static)):
+        if endpoint in app.view_functions:
+            app.view_functions[endpoint] = view
+
+    if "favicon.ico" in static_assets:
+        app.add_url_rule("/favicon.ico", "favicon", lambda: static_assets["favicon.ico"].response(app.response_class, max_age))
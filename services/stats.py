@@ -0,0 +1,208 @@
+"""
+Aggregate character statistics.
+
+`sql_character_stats` pushes the work into the database with GROUP BY queries;
+`vectorised_character_stats` computes the same report from in-memory NumPy
+columns. Results are cached by `StatsCache` until the next write.
+`sql_facet_counts` and `vectorised_facet_counts` return the per-value counts
+shown next to filter results.
+"""
+# Standard library imports
+import threading
+import time
+# Third-party imports
+import numpy as np
+from sqlalchemy import case, func, literal, select, union_all
+# Local imports
+from models.model_tables import Character
+
+# Upper bounds (inclusive) and labels of the age buckets used by stats and facets.
+AGE_BUCKETS = [(17, "0-17"), (29, "18-29"), (44, "30-44"), (59, "45-59"), (None, "60+")]
+UNKNOWN_AGE = "unknown"
+
+
+def age_bucket_expression(column):
+    """SQL CASE expression mapping an age column onto the AGE_BUCKETS labels."""
+    whens = [(column.is_(None), UNKNOWN_AGE)]
+    whens += [(column <= upper, label) for upper, label in AGE_BUCKETS if upper is not None]
+    return case(*whens, else_=AGE_BUCKETS[-1][1])
+
+
+def age_bucket_indexes(ages):
+    """Vectorised bucket index per age (NaN ages map to the last index, `unknown`)."""
+    edges = np.array([upper for upper, _ in AGE_BUCKETS if upper is not None], dtype=np.float64)
+    indexes = np.searchsorted(edges, ages, side="left")
+    indexes[np.isnan(ages)] = len(AGE_BUCKETS)
+    return indexes
+
+
+def age_bucket_labels():
+    """Bucket labels in index order, `unknown` last."""
+    return [label for _, label in AGE_BUCKETS] + [UNKNOWN_AGE]
+
+
+def _rounded(value, digits=2):
+    return None if value is None else round(float(value), digits)
+
+
+def _house_entry(house, count, dead):
+    return {"house": house, "count": int(count), "dead": int(dead),
+            "death_rate": _rounded(dead / count if count else 0.0, 4)}
+
+
+def _ordered(entries, key):
+    return sorted(entries, key=lambda entry: (-entry["count"], entry[key] is None, entry[key] or ""))
+
+
+def sql_character_stats(session):
+    """Compute the statistics report with GROUP BY queries."""
+    dead = func.sum(case((Character.death.isnot(None), 1), else_=0))
+    totals = session.execute(select(
+        func.count(Character.id), dead, func.min(Character.age), func.max(Character.age), func.avg(Character.age)
+    )).one()
+    houses = session.execute(
+        select(Character.house, func.count(Character.id), dead).group_by(Character.house)
+    ).all()
+    roles = session.execute(select(Character.role, func.count(Character.id)).group_by(Character.role)).all()
+    bucket = age_bucket_expression(Character.age)
+    buckets = dict(session.execute(select(bucket, func.count(Character.id)).group_by(bucket)).all())
+
+    total, total_dead, age_min, age_max, age_mean = totals
+    total_dead = int(total_dead or 0)
+    return {
+        "total": int(total),
+        "alive": int(total) - total_dead,
+        "dead": total_dead,
+        "age": {
+            "min": age_min,
+            "max": age_max,
+            "mean": _rounded(age_mean),
+            "buckets": {label: int(buckets.get(label, 0)) for label in age_bucket_labels()},
+        },
+        "houses": _ordered([_house_entry(house, count, dead or 0) for house, count, dead in houses], "house"),
+        "roles": _ordered([{"role": role, "count": int(count)} for role, count in roles], "role"),
+    }
+
+
+FACET_FIELDS = ("house", "role", "animal")
+
+
+def _facet_entries(pairs):
+    entries = [{"value": value, "count": int(count)} for value, count in pairs if count]
+    return sorted(entries, key=lambda entry: (-entry["count"], entry["value"] is None, entry["value"] or ""))
+
+
+def _age_facet_entries(counts):
+    return [{"value": label, "count": int(counts.get(label, 0))} for label in age_bucket_labels()]
+
+
+def sql_facet_counts(session, query):
+    """
+    Facet counts (house, role, animal and age bucket) for the rows matched by `query`,
+    computed in one round trip as a UNION ALL of GROUP BYs over the filtered rows.
+    """
+    matched = query.with_entities(Character.house, Character.role, Character.animal, Character.age).subquery()
+    bucket = age_bucket_expression(matched.c.age)
+    parts = [
+        select(literal(field).label("facet"), matched.c[field].label("value"), func.count().label("count"))
+        .group_by(matched.c[field])
+        for field in FACET_FIELDS
+    ]
+    parts.append(select(literal("age").label("facet"), bucket.label("value"), func.count().label("count"))
+                 .group_by(bucket))
+    grouped = {field: [] for field in FACET_FIELDS + ("age",)}
+    for facet, value, count in session.execute(union_all(*parts)):
+        grouped[facet].append((value, count))
+
+    facets = {field: _facet_entries(grouped[field]) for field in FACET_FIELDS}
+    facets["age"] = _age_facet_entries(dict(grouped["age"]))
+    return facets
+
+
+def _group_counts(values, weights=None):
+    """Distinct values of an object column with their counts (and optional weighted sums)."""
+    keys = np.array(["\0" if value is None else value for value in values], dtype=object)
+    unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    labels = [None if value == "\0" else value for value in unique]
+    sums = np.bincount(inverse, weights=weights, minlength=len(unique)) if weights is not None else None
+    return labels, counts, sums
+
+
+def vectorised_character_stats(columns):
+    """
+    Compute the statistics report from columnar arrays.
+    `columns` maps "house" and "role" to object arrays and "age" and "death" to
+    float arrays that use NaN for nulls.
+    """
+    ages = columns["age"]
+    dead_mask = ~np.isnan(columns["death"])
+    total = int(len(ages))
+    known_ages = ages[~np.isnan(ages)]
+
+    house_labels, house_counts, house_dead = _group_counts(columns["house"], weights=dead_mask.astype(np.float64))
+    role_labels, role_counts, _ = _group_counts(columns["role"])
+    bucket_counts = np.bincount(age_bucket_indexes(ages), minlength=len(AGE_BUCKETS) + 1)
+    total_dead = int(dead_mask.sum())
+
+    return {
+        "total": total,
+        "alive": total - total_dead,
+        "dead": total_dead,
+        "age": {
+            "min": int(known_ages.min()) if known_ages.size else None,
+            "max": int(known_ages.max()) if known_ages.size else None,
+            "mean": _rounded(known_ages.mean()) if known_ages.size else None,
+            "buckets": {label: int(count) for label, count in zip(age_bucket_labels(), bucket_counts)},
+        },
+        "houses": _ordered([_house_entry(house, count, dead)
+                            for house, count, dead in zip(house_labels, house_counts, house_dead)], "house"),
+        "roles": _ordered([{"role": role, "count": int(count)}
+                           for role, count in zip(role_labels, role_counts)], "role"),
+    }
+
+
+def vectorised_facet_counts(columns, ids):
+    """Facet counts for the rows whose ids are listed in `ids`, using the snapshot's columns."""
+    positions = np.searchsorted(columns["id"], np.asarray(ids, dtype=np.int64))
+    facets = {}
+    for field in FACET_FIELDS:
+        if not len(positions):
+            facets[field] = []
+            continue
+        labels, counts, _ = _group_counts(columns[field][positions])
+        facets[field] = _facet_entries(zip(labels, counts))
+    bucket_counts = np.bincount(age_bucket_indexes(columns["age"][positions]), minlength=len(AGE_BUCKETS) + 1)
+    facets["age"] = _age_facet_entries(dict(zip(age_bucket_labels(), bucket_counts)))
+    return facets
+
+
+class StatsCache:
+    """
+    Caches one statistics report. Local writes invalidate it immediately; the TTL
+    bounds staleness caused by writes made in other processes.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._expires = 0.0
+        self._generation = 0
+
+    def get(self, compute):
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires:
+                return self._value
+            generation = self._generation
+        value = compute()
+        with self._lock:
+            # Do not store a report computed while a write was invalidating the cache.
+            if generation == self._generation:
+                self._value = value
+                self._expires = time.monotonic() + self.ttl
+        return value
+
+    def invalidate(self, *args, **kwargs):
+        with self._lock:
+            self._generation += 1
+            self._value = None
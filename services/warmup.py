@@ -0,0 +1,221 @@
+"""
+Worker warm-up and the cached database check behind the health endpoints.
+
+Left alone, the first requests a fresh worker serves pay for opening database
+connections, loading the bcrypt backend, building the snapshot and indexes and
+running each code path for the first time. `Warmup` does that work up front,
+on a background thread, once per process: gunicorn starts it right after
+forking a worker (see gunicorn.conf.py), other servers on the first request.
+`/readyz` answers 503 until it has finished, so a load balancer only routes
+traffic to warm workers.
+
+`DatabasePing` remembers the result of its last `SELECT 1` for
+`HEALTH_DB_PING_TTL` seconds, and concurrent checks never queue behind a slow
+ping, so frequent health checks cost next to nothing.
+"""
+# Standard library imports
+import atexit
+import base64
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def warm_database_pool(app):
+    """Open up to WARMUP_CONNECTIONS pool connections at once, so requests find them ready."""
+    from config.database import db
+    engine = db.engine
+    size = getattr(engine.pool, "size", lambda: 1)()
+    connections = []
+    try:
+        for _ in range(max(1, min(size, app.config["WARMUP_CONNECTIONS"]))):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def warm_password_hashing(app):
+    """Load the bcrypt backend (passlib picks and self-tests it on first use)."""
+    from routers.auth import bcrypt_context
+    bcrypt_context.dummy_verify()
+
+
+def warm_search_index(app):
+    from config.database import db
+    from config.sqlite import writer_engine
+    from services.search import ensure_search_index
+    ensure_search_index(writer_engine(db))
+
+
+def warm_snapshot(app):
+    from config.database import db
+    snapshot = app.extensions.get("character_snapshot")
+    if snapshot is not None:
+        snapshot.ensure_current(db.session)
+
+
+def warm_autocomplete(app):
+    from config.database import db
+    index = app.extensions.get("autocomplete_index")
+    if index is not None:
+        index.ensure_current(db.session)
+
+
+def warm_request_paths(app):
+    """
+    Run requests through the full WSGI stack: routing, hooks, auth, errors, JSON and compression.
+
+    The requests are exempt from rate limits and authenticate as the first registered user, without
+    a password check, the way /batch sub-requests reuse the batch's user. Returns {path: status}.
+    """
+    from flask import g
+    from schemas.schema import User
+    from services.ratelimit import EXEMPT_ENVIRON_KEY
+    headers = {"Accept-Encoding": "gzip, br"}
+    user = User.query.order_by(User.id).first()
+    if user is not None:
+        g.authenticated_user = user
+        headers["Authorization"] = "Basic " + base64.b64encode(f"{user.email}:".encode()).decode()
+    client = app.test_client()
+    statuses = {}
+    for path in app.config["WARMUP_PATHS"]:
+        response = client.get(path, headers=headers, environ_base={EXEMPT_ENVIRON_KEY: True})
+        statuses[path] = response.status_code
+        if response.status_code >= 400:
+            logger.warning("Warm-up request %s answered %d", path, response.status_code)
+    return statuses
+
+
+DEFAULT_STEPS = (
+    ("database_pool", warm_database_pool),
+    ("password_hashing", warm_password_hashing),
+    ("search_index", warm_search_index),
+    ("snapshot", warm_snapshot),
+    ("autocomplete", warm_autocomplete),
+    ("request_paths", warm_request_paths),
+)
+
+
+class Warmup:
+    """Runs the warm-up steps once per process on a background thread and records their timings."""
+
+    def __init__(self, app, steps=DEFAULT_STEPS, retry_interval=5.0):
+        self.app = app
+        self.steps = steps
+        self.retry_interval = retry_interval
+        self.state = "pending" if steps else "ready"
+        self.timings = {}
+        self.error = None
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def start(self):
+        """Start warming up this process, unless it already is (threads do not survive fork)."""
+        if self._pid == os.getpid() or not self.steps:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.state, self.timings, self.error = "running", {}, None
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="warmup")
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout=5.0):
+        """Stop after the current step; at exit, so the interpreter does not tear down a running step."""
+        self._stopping.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self):
+        from config.database import db
+        while True:
+            started = time.perf_counter()
+            try:
+                for name, step in self.steps:
+                    if self._stopping.is_set():
+                        return
+                    step_started = time.perf_counter()
+                    with self.app.app_context():
+                        try:
+                            step(self.app)
+                        finally:
+                            db.session.remove()
+                    self.timings[name] = round((time.perf_counter() - step_started) * 1000, 3)
+            except Exception as e:
+                self.state, self.error = "failed", f"{name}: {str(e)}"
+                logger.error(f"Warm-up step {name} failed, retrying in {self.retry_interval}s: {str(e)}")
+                if self._stopping.wait(self.retry_interval):
+                    return
+                self.state = "running"
+                continue
+            self.state, self.error = "ready", None
+            logger.info("Worker %d warmed up in %.3fs", os.getpid(), time.perf_counter() - started)
+            return
+
+    def to_dict(self):
+        return {"state": self.state, "steps_ms": dict(self.timings), "error": self.error}
+
+
+class DatabasePing:
+    """`SELECT 1` against the app's database, cached for `ttl` seconds."""
+
+    def __init__(self, app, ttl=5.0):
+        self.app = app
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._result = None  # (ok, error, checked_at)
+
+    def check(self):
+        """Return (ok, error message or None, seconds since the ping ran)."""
+        result = self._result
+        if result is None or time.monotonic() - result[2] >= self.ttl:
+            # Only one thread pings; the others keep answering with the previous result.
+            if self._lock.acquire(blocking=result is None):
+                try:
+                    result = self._result = self._ping()
+                finally:
+                    self._lock.release()
+            else:
+                result = self._result or result
+        ok, error, checked_at = result
+        return ok, error, round(time.monotonic() - checked_at, 3)
+
+    def _ping(self):
+        from config.database import db
+        try:
+            with self.app.app_context():
+                with db.engine.connect() as connection:
+                    connection.exec_driver_sql("SELECT 1")
+            return True, None, time.monotonic()
+        except Exception as e:
+            logger.error(f"Database ping failed: {str(e)}")
+            return False, str(e), time.monotonic()
+
+
+def init_warmup(app):
+    """Create the warm-up (started by gunicorn's post_fork, or by the first request) and the database ping."""
+    warmup = Warmup(app, steps=DEFAULT_STEPS if app.config["WARMUP_ENABLED"] else (),
+                    retry_interval=app.config["WARMUP_RETRY_INTERVAL"])
+    app.extensions["warmup"] = warmup
+    app.extensions["database_ping"] = DatabasePing(app, ttl=app.config["HEALTH_DB_PING_TTL"])
+
+    @app.before_request
+    def start_warmup():
+        warmup.start()
+
+    return warmup
@@ -0,0 +1,201 @@
+"""
+Single-statement character writes.
+
+Each helper issues one `INSERT`, `UPDATE` or `DELETE ... RETURNING` and
+returns the row as a dictionary (bulk upserts add one `SELECT` of the
+current rows per batch). The ORM's unit of work would need an
+identity-map lookup before an update or delete, and a reload of expired
+attributes after the commit. Together with the outbox insert from
+`record_change`, a write is two statements in one transaction.
+
+`update_character` can also return the row as it was before the update,
+which subscribers need to notice a character leaving their filter. On
+PostgreSQL this comes from the same statement (`UPDATE ... FROM` a locked
+self-join); other databases, whose `RETURNING` only sees the new row, read it
+first.
+
+Every update (including the update branch of an upsert) increments the
+row's `version` in the same statement. `update_character` can make the
+update conditional on the version a client last saw (`WHERE id = ? AND
+version = ?`): a concurrent edit makes it match no row instead of being
+silently overwritten, without holding locks between the read and the write.
+
+Upserts keyed on `id` insert explicit ids, which PostgreSQL's id sequence does
+not see; the sequence is moved past them in the same transaction so later
+creates do not collide with them.
+"""
+# Third-party imports
+from sqlalchemy import cast, delete, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import REGCLASS
+# Local imports
+from models.model_tables import Character
+from services.snapshot import CHARACTER_FIELDS
+
+characters = Character.__table__
+_columns = [characters.c[field] for field in CHARACTER_FIELDS]
+# `setval` is not transactional: concurrent upserts take turns moving the id sequence forward.
+ID_SEQUENCE_LOCK_KEY = 0x63686964
+
+
+def unique_keys():
+    """Map each unique constraint or index on the characters table to the fields it covers."""
+    keys = {characters.primary_key.name or f"{characters.name}_pkey": tuple(characters.primary_key.columns.keys())}
+    for index in characters.indexes:
+        if index.unique:
+            keys[index.name] = tuple(index.columns.keys())
+    return keys
+
+
+def check_natural_key(key_fields):
+    """Raise ValueError unless a unique index covers exactly `key_fields`, which `ON CONFLICT` needs."""
+    if set(key_fields) not in [set(fields) for fields in unique_keys().values()]:
+        raise ValueError(f"UPSERT_NATURAL_KEY={','.join(key_fields)} has no unique index on {characters.name}; "
+                         f"use one of {', '.join(','.join(fields) for fields in unique_keys().values())}")
+
+
+def conflicting_fields(error):
+    """The fields of the unique key an `IntegrityError` violated, or None when it was something else."""
+    constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None)
+    if constraint is not None:  # PostgreSQL names the constraint
+        return unique_keys().get(constraint)
+    # SQLite: "UNIQUE constraint failed: characters.name, characters.house"
+    message = str(error.orig)
+    if message.startswith("UNIQUE constraint failed: "):
+        return tuple(column.rpartition(".")[2]
+                     for column in message[len("UNIQUE constraint failed: "):].split(", "))
+    return None
+
+
+def _row(values):
+    return dict(zip(CHARACTER_FIELDS, values))
+
+
+def insert_character(session, values):
+    """Insert a character and return it, including its generated id."""
+    return _row(session.execute(insert(characters).values(**values).returning(*_columns)).one())
+
+
+def update_character(session, character_id, values, with_previous=False, expected_versions=None):
+    """
+    Update a character and increment its version; returns (new row, previous row or None).
+
+    With `expected_versions`, the update only applies while the stored version is one of them.
+    Returns (None, None) when no row was updated: use `current_version` to tell a missing
+    character from a version conflict.
+    """
+    statement = (update(characters).where(characters.c.id == character_id)
+                 .values(**values, version=characters.c.version + 1))
+    if expected_versions is not None:
+        statement = statement.where(characters.c.version.in_(expected_versions))
+    if with_previous and session.get_bind(Character).dialect.name == "postgresql":
+        old = select(characters).where(characters.c.id == character_id).with_for_update().subquery("previous")
+        old_columns = [old.c[field] for field in CHARACTER_FIELDS]
+        row = session.execute(statement.where(characters.c.id == old.c.id)
+                              .returning(*_columns, *old_columns)).one_or_none()
+        if row is None:
+            return None, None
+        return _row(row[:len(_columns)]), _row(row[len(_columns):])
+
+    previous = None
+    if with_previous:
+        previous = session.execute(select(*_columns).where(characters.c.id == character_id)).one_or_none()
+        if previous is None:
+            return None, None
+        previous = _row(previous)
+    row = session.execute(statement.returning(*_columns)).one_or_none()
+    return (None, None) if row is None else (_row(row), previous)
+
+
+def current_version(session, character_id):
+    """The stored version of a character, or None when it does not exist."""
+    return session.scalar(select(characters.c.version).where(characters.c.id == character_id))
+
+
+def delete_character(session, character_id, expected_versions=None):
+    """
+    Delete a character and return the deleted row, or None when it does not exist.
+
+    With `expected_versions`, only delete it while its stored version is one of them.
+    """
+    statement = delete(characters).where(characters.c.id == character_id)
+    if expected_versions is not None:
+        statement = statement.where(characters.c.version.in_(expected_versions))
+    row = session.execute(statement.returning(*_columns)).one_or_none()
+    return None if row is None else _row(row)
+
+
+def _dialect_insert(session):
+    dialect = session.get_bind(Character).dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"Upserts need INSERT ... ON CONFLICT, which {dialect} does not support")
+    return dialect_insert
+
+
+def _advance_id_sequence(session, top):
+    """Make sure PostgreSQL's id sequence hands out ids above `top`, never moving it back."""
+    if session.get_bind(Character).dialect.name != "postgresql":
+        return  # SQLite picks max(id) + 1
+    sequence = func.pg_get_serial_sequence(characters.name, "id")
+    session.execute(select(func.pg_advisory_xact_lock(ID_SEQUENCE_LOCK_KEY)))
+    session.execute(select(func.setval(sequence, top)).where(
+        literal(top) > func.coalesce(func.pg_sequence_last_value(cast(sequence, REGCLASS)), 0)))
+
+
+def upsert_characters(session, rows, key_fields=("id",)):
+    """
+    Insert or replace characters matched on `key_fields` (the primary key or a unique natural key).
+
+    Every row is written in full: fields it leaves out become NULL. Rows identical to the stored
+    character are skipped, both before the statement and in its `ON CONFLICT ... WHERE`, so
+    re-sending an unchanged catalogue writes nothing. Later duplicates of a key replace earlier ones.
+    Returns one (status, row, previous) per input row, with status "created", "updated" or "unchanged".
+    """
+    def key_of(row):
+        return tuple(row.get(field) for field in key_fields)
+
+    if any(None in key_of(row) for row in rows):
+        # NULLs never conflict, so such rows would be inserted again on every sync.
+        raise ValueError(f"Every character needs a value for {', '.join(key_fields)}")
+    latest = {key_of(row): row for row in rows}
+    key_columns = [characters.c[field] for field in key_fields]
+    condition = (key_columns[0].in_([key[0] for key in latest]) if len(key_columns) == 1
+                 else tuple_(*key_columns).in_(list(latest)))
+    existing = {key_of(_row(row)): _row(row) for row in session.execute(select(*_columns).where(condition))}
+
+    # The version is the database's to increment, never the client's to set.
+    value_fields = [field for field in CHARACTER_FIELDS if field != "version" and (field != "id" or "id" in key_fields)]
+    results = {}
+    pending = []
+    for key, row in latest.items():
+        values = {field: row.get(field) for field in value_fields}
+        current = existing.get(key)
+        if current is not None and all(current[field] == value for field, value in values.items()):
+            results[key] = ("unchanged", current, current)
+        else:
+            pending.append(values)
+
+    if pending:
+        dialect_insert = _dialect_insert(session)
+        statement = dialect_insert(characters).values(pending)
+        update_fields = [field for field in value_fields if field not in key_fields]
+        statement = statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={**{field: statement.excluded[field] for field in update_fields},
+                  "version": characters.c.version + 1},
+            where=or_(*[characters.c[field].is_distinct_from(statement.excluded[field]) for field in update_fields]),
+        ).returning(*_columns)
+        for row in session.execute(statement):
+            row = _row(row)
+            key = key_of(row)
+            previous = existing.get(key)
+            results[key] = ("created", row, None) if previous is None else ("updated", row, previous)
+        created = [row["id"] for status, row, _ in results.values() if status == "created"]
+        if "id" in key_fields and created:
+            _advance_id_sequence(session, max(created))
+    # Rows a concurrent writer already brought up to date are not returned by the statement.
+    return [results.get(key_of(row)) or ("unchanged", existing.get(key_of(row)), existing.get(key_of(row)))
+            for row in rows]
@@ -0,0 +1,46 @@
+"""
+Shared fixtures for tests that go through the Flask app.
+
+The app reads its configuration from the environment when it is imported, so
+the database is chosen here, before any test module imports it: a throwaway
+SQLite file, or TEST_DATABASE_URL when set. Tests never touch the database
+named in `.env`.
+"""
+import base64
+import os
+import tempfile
+import pytest
+
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL",
+                                       f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+# Keep request counts and background warm-up out of endpoint tests.
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("WARMUP_ENABLED", "false")
+
+TEST_EMAIL = "tester@example.com"
+TEST_PASSWORD = "Tester@1234"
+
+
+@pytest.fixture
+def client():
+    """Test client on freshly created tables, with one registered user."""
+    from passlib.hash import bcrypt
+    from app import app, db
+    from schemas.schema import User
+
+    with app.app_context():
+        # Only the default bind: apps built by other tests register extra binds on the shared `db`.
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+        db.session.add(User(name="tester", email=TEST_EMAIL, password=bcrypt.using(rounds=4).hash(TEST_PASSWORD)))
+        db.session.commit()
+    with app.test_client() as client:
+        yield client
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def auth_headers():
+    credentials = base64.b64encode(f"{TEST_EMAIL}:{TEST_PASSWORD}".encode()).decode()
+    return {"Authorization": f"Basic {credentials}"}
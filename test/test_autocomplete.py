@@ -0,0 +1,33 @@
+"""Tests for the autocomplete prefix index."""
+# Local Application Imports
+from services.autocomplete import AutocompleteIndex
+
+
+def character(id, name, house=None, nickname=None):
+    return {"id": id, "name": name, "house": house, "nickname": nickname}
+
+
+def test_suggest_matches_any_word_and_ranks_by_count():
+    index = AutocompleteIndex()
+    index.apply("create", character(1, "Arya Stark", "House Stark", "No One"))
+    index.apply("create", character(2, "Sansa Stark", "House Stark"))
+    index.apply("create", character(3, "Stannis Baratheon", "House Baratheon"))
+
+    assert index.suggest("STA", limit=3) == [
+        {"value": "House Stark", "field": "house", "count": 2},
+        {"value": "Arya Stark", "field": "name", "count": 1},
+        {"value": "Sansa Stark", "field": "name", "count": 1},
+    ]
+    assert index.suggest("one", fields=("nickname",)) == [{"value": "No One", "field": "nickname", "count": 1}]
+
+
+def test_updates_and_deletes_remove_old_entries():
+    index = AutocompleteIndex()
+    index.apply("create", character(1, "Arya Stark", "House Stark"))
+    index.apply("update", character(1, "Arya Stark", "Faceless Men"))
+    assert index.suggest("house") == []
+    assert index.suggest("face") == [{"value": "Faceless Men", "field": "house", "count": 1}]
+
+    index.apply("delete", character(1, "Arya Stark", "Faceless Men"))
+    assert index.suggest("a") == []
+    assert index._keys == {"name": [], "house": [], "nickname": []}
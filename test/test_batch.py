@@ -0,0 +1,113 @@
+"""Atomic batches must leave no trace when they fail; non-atomic batches keep what succeeded."""
+import pytest
+# Local Application Imports
+from models.model_tables import Character, CharacterChange
+from services.events import characters_changed
+
+
+@pytest.fixture
+def signals():
+    sent = []
+    receiver = lambda sender, **kwargs: sent.append((kwargs["operation"], kwargs["character"]["id"]))
+    characters_changed.connect(receiver, weak=False)
+    yield sent
+    characters_changed.disconnect(receiver)
+
+
+def create(name, house="Stark"):
+    return {"method": "POST", "path": "/characters/add/create-new-characters", "query": {"name": name, "house": house}}
+
+
+def stored():
+    from app import app, db
+    with app.app_context():
+        return (db.session.query(Character.name).order_by(Character.id).all(),
+                db.session.query(CharacterChange.operation).order_by(CharacterChange.seq).all())
+
+
+def run_batch(client, headers, requests, atomic):
+    response = client.post("/batch", headers=headers, json={"atomic": atomic, "requests": requests})
+    assert response.status_code == 200
+    body = response.get_json()
+    return body, [entry["status"] for entry in body["responses"]]
+
+
+def test_failed_atomic_batch_leaves_no_rows_changes_or_signals(client, auth_headers, signals):
+    body, statuses = run_batch(client, auth_headers, [
+        create("Arya"),
+        {"method": "PUT", "path": "/characters/update-character/999", "query": {"age": 19}},
+        create("Bran"),
+    ], atomic=True)
+    assert body["committed"] is False
+    assert statuses == [201, 404, 424]
+    assert stored() == ([], [])
+    assert signals == []
+
+
+def test_atomic_batch_commits_every_write_and_then_signals(client, auth_headers, signals):
+    body, statuses = run_batch(client, auth_headers, [
+        create("Arya"),
+        {"method": "PUT", "path": "/characters/update-character/1", "query": {"age": 19}},
+    ], atomic=True)
+    assert body["committed"] is True and statuses == [201, 200]
+    assert stored() == ([("Arya",)], [("create",), ("update",)])
+    assert signals == [("create", 1), ("update", 1)]
+
+
+def test_non_atomic_batch_keeps_what_succeeded(client, auth_headers, signals):
+    body, statuses = run_batch(client, auth_headers, [
+        create("Arya"),
+        create("Arya"),
+        {"method": "DELETE", "path": "/characters/delete-characters/999", "query": {"id": 999}},
+        create("Bran"),
+    ], atomic=False)
+    assert statuses == [201, 409, 404, 201]
+    assert stored() == ([("Arya",), ("Bran",)], [("create",), ("create",)])
+    assert signals == [("create", 1), ("create", 2)]
+
+
+def test_streaming_routes_are_refused(client, auth_headers):
+    _, statuses = run_batch(client, auth_headers, [{"method": "GET", "path": "/characters/subscribe"}], atomic=False)
+    assert statuses == [400]
+
+
+def test_conditional_headers_reach_each_operation(client, auth_headers):
+    run_batch(client, auth_headers, [create("Arya")], atomic=False)
+    update = lambda etag: {"method": "PUT", "path": "/characters/update-character/1", "query": {"age": 19},
+                           "headers": {"If-Match": etag}}
+    _, statuses = run_batch(client, auth_headers, [
+        update('"v9"'),
+        update('"v1"'),
+        {"method": "GET", "path": "/characters/get-characters-id/1", "headers": {"If-None-Match": '"v2"'}},
+    ], atomic=False)
+    assert statuses == [412, 200, 304]
+
+
+def test_other_headers_are_rejected(client, auth_headers):
+    response = client.post("/batch", headers=auth_headers, json={"requests": [
+        {"method": "GET", "path": "/characters/get-characters-id/1", "headers": {"Authorization": "Basic eDp5"}}]})
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    from app import app
+    from services.ratelimit import RateLimiter
+    for name, value in [("RATE_LIMIT_STORE", "memory"), ("RATE_LIMIT_EXPENSIVE", "2/60"),
+                        ("CONCURRENCY_LIMIT_DEFAULT", 1)]:
+        monkeypatch.setitem(app.config, name, value)
+    limiter = RateLimiter(app)
+    monkeypatch.setitem(app.extensions, "rate_limiter", limiter)
+    return limiter
+
+
+def test_operations_are_charged_to_their_own_budgets(client, auth_headers, limiter):
+    sort = {"method": "POST", "path": "/characters/characters-sort", "query": {"sort_by": "name"}}
+    _, statuses = run_batch(client, auth_headers, [sort, create("Arya"), sort, sort], atomic=False)
+    assert statuses == [200, 201, 200, 429]
+
+    # A default-budget operation needs a free concurrency slot like any other request.
+    assert limiter.concurrency_limiter.acquire("default:user:1", 1)
+    _, statuses = run_batch(client, auth_headers, [create("Bran")], atomic=True)
+    assert statuses == [429]
+    limiter.concurrency_limiter.release("default:user:1")
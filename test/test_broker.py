@@ -0,0 +1,63 @@
+"""The broker must deliver events only to matching subscribers, flag overflow and forget unsubscribed ones."""
+# Local Application Imports
+from services.broker import EventBroker
+
+
+def character(house, role, id=1):
+    return {"id": id, "name": "Someone", "house": house, "role": role}
+
+
+def drain(subscription):
+    events = []
+    while (event := subscription.get(timeout=0)) is not None:
+        events.append(event)
+    return events
+
+
+def test_events_reach_matching_filters_only():
+    broker = EventBroker()
+    everyone, starks, knights = broker.subscribe(), broker.subscribe(house="STARK"), broker.subscribe(role="knight")
+    stark_knights, lannisters = broker.subscribe("stark", "Knight"), broker.subscribe(house="Lannister")
+
+    broker.publish_change(operation="create", character=character("Stark", "Knight"), seq=1)
+    broker.publish_change(operation="create", character=character("Stark", "Lord", id=2), seq=2)
+
+    assert [event["seq"] for event in drain(everyone)] == [1, 2]
+    assert [event["seq"] for event in drain(starks)] == [1, 2]
+    assert [event["seq"] for event in drain(knights)] == [1]
+    assert [event["seq"] for event in drain(stark_knights)] == [1]
+    assert drain(lannisters) == []
+
+
+def test_an_update_reaches_subscribers_of_the_old_and_new_state():
+    broker = EventBroker()
+    starks, lannisters = broker.subscribe(house="Stark"), broker.subscribe(house="Lannister")
+    assert broker.needs_previous
+
+    broker.publish_change(operation="update", character=character("Lannister", None), seq=3,
+                          previous=character("Stark", None))
+    # Each subscriber gets the event once, including the one whose filter the character left.
+    assert [event["seq"] for event in drain(starks)] == [3]
+    assert [event["seq"] for event in drain(lannisters)] == [3]
+
+
+def test_a_full_queue_marks_the_subscription_overflowed():
+    broker = EventBroker(max_queue=2)
+    slow, other = broker.subscribe(), broker.subscribe(house="Stark")
+    for seq in range(1, 4):
+        broker.publish_change(operation="create", character=character("Greyjoy", None, id=seq), seq=seq)
+    assert slow.overflowed and not other.overflowed
+    assert [event["seq"] for event in drain(slow)] == [1, 2]
+
+
+def test_unsubscribe_stops_delivery():
+    broker = EventBroker()
+    first, second = broker.subscribe(house="Stark"), broker.subscribe(house="Stark")
+    broker.unsubscribe(first)
+    broker.unsubscribe(first)
+    assert len(broker) == 1
+    broker.publish_change(operation="delete", character=character("Stark", None), seq=4)
+    assert drain(first) == [] and len(drain(second)) == 1
+
+    broker.unsubscribe(second)
+    assert len(broker) == 0 and broker._subscriptions == {} and not broker.needs_previous
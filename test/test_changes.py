@@ -0,0 +1,69 @@
+"""Outbox rows must become visible in sequence order, even when writers interleave."""
+import os
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+# Local Application Imports
+from models.model_tables import CharacterChange
+from services.changes import OUTBOX_LOCK_KEY, _lock_outbox, fetch_changes, record_change
+
+# PostgreSQL is where sequence numbers can commit out of order; set this to run the test there too.
+DATABASE_URLS = ["sqlite"] + ([os.environ["TEST_POSTGRES_URL"]] if os.getenv("TEST_POSTGRES_URL") else [])
+
+
+@pytest.fixture(params=DATABASE_URLS)
+def engine(request, tmp_path):
+    url = f"sqlite:///{tmp_path / 'outbox.db'}" if request.param == "sqlite" else request.param
+    engine = create_engine(url)
+    CharacterChange.__table__.drop(engine, checkfirst=True)
+    CharacterChange.__table__.create(engine)
+    yield engine
+    CharacterChange.__table__.drop(engine)
+    engine.dispose()
+
+
+def test_a_later_sequence_number_cannot_commit_first(engine):
+    first = Session(engine)
+    first_seq = record_change(first, "create", {"id": 1})
+
+    second_seq = []
+    def second_writer():
+        with Session(engine) as second:
+            second_seq.append(record_change(second, "create", {"id": 2}))
+            second.commit()
+    writer = threading.Thread(target=second_writer)
+    writer.start()
+    time.sleep(0.3)
+
+    # The second writer must still be waiting for the first transaction.
+    with Session(engine) as reader:
+        assert fetch_changes(reader, 0, 10) == []
+    first.commit()
+    first.close()
+    writer.join(5)
+
+    with Session(engine) as reader:
+        assert [change.seq for change in fetch_changes(reader, 0, 10)] == [first_seq, second_seq[0]]
+    assert first_seq < second_seq[0]
+
+
+def test_postgresql_writers_take_the_outbox_lock():
+    executed = []
+    session = SimpleNamespace(get_bind=lambda mapper: SimpleNamespace(dialect=SimpleNamespace(name="postgresql")),
+                              execute=executed.append)
+    _lock_outbox(session)
+    [statement] = executed
+    assert "pg_advisory_xact_lock" in str(statement)
+    assert list(statement.compile().params.values()) == [OUTBOX_LOCK_KEY]
+
+
+@pytest.mark.parametrize("last_event_id, status", [("", 400), ("abc", 400), ("-1", 400), ("²", 400),
+                                                   ("9" * 5000, 400), (" 0", 200)])
+def test_the_last_event_id_header_is_validated(client, auth_headers, last_event_id, status):
+    response = client.get("/characters/changes?stream=true", headers={**auth_headers, "Last-Event-ID": last_event_id},
+                          buffered=False)
+    assert response.status_code == status
+    response.close()
@@ -0,0 +1,68 @@
+"""The compiled validation fast path must agree with marshmallow on every input."""
+import pytest
+from marshmallow import ValidationError
+from webargs.multidictproxy import MultiDictProxy
+from werkzeug.datastructures import ImmutableMultiDict
+# Local Application Imports
+from schemas.compiled import CompiledSchema, compile_schema
+from schemas.schema import (CharacterSchema, ChangesQuerySchema, FilterCharactersQuerySchema,
+                            MultiGetCharactersBodySchema, MultiGetCharactersQuerySchema, RegisterSchema,
+                            SortRequestSchema, UserSchema)
+
+QUERY_CASES = [
+    (CharacterSchema, {}),
+    (CharacterSchema, {"limit": "50", "skip": "-3"}),
+    (CharacterSchema, {"limit": "abc"}),
+    (CharacterSchema, {"limit": "--5"}),
+    (CharacterSchema, {"limit": " 7 ", "other": "x"}),
+    (CharacterSchema, {"limit": "9" * 5000}),  # more digits than int() converts
+    (FilterCharactersQuerySchema, {"name": "arya", "age_min": "10", "age_max": "40", "facets": "true"}),
+    (FilterCharactersQuerySchema, {"sort_order": "up", "facets": "maybe"}),
+    (SortRequestSchema, {"sort_by": "age", "sort_order": "desc"}),
+    (SortRequestSchema, {"sort_by": "zzz"}),
+    (ChangesQuerySchema, {"since": "5", "wait": "2.5", "stream": "1"}),
+    (ChangesQuerySchema, {"limit": "0", "wait": "nan"}),
+    (MultiGetCharactersQuerySchema, {"ids": "1,2,3", "include_house": "yes"}),
+    (MultiGetCharactersQuerySchema, {"ids": "1,x"}),
+    (MultiGetCharactersQuerySchema, {"ids": ""}),
+    (MultiGetCharactersQuerySchema, {}),
+    (UserSchema, {"name": "Arya", "age": "18", "id": "4"}),
+]
+
+JSON_CASES = [
+    (MultiGetCharactersBodySchema, {"ids": [1, 2, 3]}),
+    (MultiGetCharactersBodySchema, {"ids": [1, "2"], "include_role": True}),
+    (MultiGetCharactersBodySchema, {"ids": [True]}),
+    (MultiGetCharactersBodySchema, {"ids": ["9" * 5000]}),
+    (MultiGetCharactersBodySchema, {"ids": [1], "unexpected": 1}),
+    (MultiGetCharactersBodySchema, {"ids": list(range(1001))}),
+    (MultiGetCharactersBodySchema, []),
+]
+
+
+def load(schema, data, unknown):
+    try:
+        return "ok", schema.load(data, unknown=unknown)
+    except ValidationError as e:
+        return "error", e.messages
+
+
+@pytest.mark.parametrize("schema_class, data, unknown",
+                         [(schema, data, "exclude") for schema, data in QUERY_CASES]
+                         + [(schema, data, None) for schema, data in JSON_CASES])
+def test_fast_path_matches_marshmallow(schema_class, data, unknown):
+    schema = schema_class()
+    assert compile_schema(schema) is not None
+    if isinstance(data, dict) and unknown == "exclude":
+        data = MultiDictProxy(ImmutableMultiDict(data), schema)
+    fast = load(schema, data, unknown)
+    CompiledSchema.fast_path = False
+    try:
+        reference = load(schema, data, unknown)
+    finally:
+        CompiledSchema.fast_path = True
+    assert fast == reference
+
+
+def test_schemas_with_hooks_are_not_compiled():
+    assert compile_schema(RegisterSchema()) is None
@@ -0,0 +1,31 @@
+"""Tests for Accept-Encoding negotiation and streamed compression."""
+import zlib
+# Local Application Imports
+from services.compression import compress, compress_stream, negotiate
+
+
+def test_negotiate_honours_q_values_and_server_preference():
+    """The highest q-value wins; ties go to the first server encoding; q=0 refuses."""
+    encodings = ["zstd", "br", "gzip"]
+    assert negotiate("gzip, br", encodings) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+    assert negotiate("*", encodings) == "zstd"
+    assert negotiate("*, zstd;q=0", encodings) == "br"
+    assert negotiate("identity", encodings) is None
+    assert negotiate("", encodings) is None
+
+
+def test_gzip_stream_flushes_each_chunk():
+    """Each streamed chunk can be decoded as soon as it arrives."""
+    decompressor = zlib.decompressobj(31)
+    chunks = ["data: one\n\n", b"data: two\n\n"]
+    stream = compress_stream(iter(chunks), "gzip", 6)
+    assert decompressor.decompress(next(stream)) == b"data: one\n\n"
+    assert decompressor.decompress(next(stream)) == b"data: two\n\n"
+    decompressor.decompress(b"".join(stream))
+    assert decompressor.eof
+
+
+def test_gzip_round_trip():
+    payload = b'{"characters": []}' * 100
+    assert zlib.decompress(compress(payload, "gzip", 1), 31) == payload
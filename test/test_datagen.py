@@ -0,0 +1,11 @@
+"""The data generator must be able to write characters and users to stdout in one run."""
+import json
+# Local Application Imports
+from benchmarks.datagen import main
+
+
+def test_characters_and_users_both_go_to_stdout(capsys):
+    main(["--rows", "3", "--users", "2", "--format", "ndjson", "--bcrypt-rounds", "4"])
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [row["id"] for row in rows] == [1, 2, 3, 1, 2]
+    assert "email" in rows[-1]
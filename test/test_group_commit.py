@@ -0,0 +1,75 @@
+"""Group commit must share one transaction between concurrent writes and isolate a failing one."""
+import threading
+import pytest
+from flask import Flask
+from sqlalchemy.exc import IntegrityError
+# Local Application Imports
+from config.database import db
+from models.model_tables import Character, CharacterChange
+from services.changes import record_change
+from services.group_commit import GroupCommitWriter
+from services.writes import insert_character
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'group_commit.db'}"
+    db.init_app(app)
+    with app.app_context():
+        Character.__table__.create(db.engine)
+        CharacterChange.__table__.create(db.engine)
+    return app
+
+
+def create(name):
+    def write(session):
+        row = insert_character(session, {"name": name, "house": "Tyrell"})
+        return row, record_change(session, "create", row)
+    return write
+
+
+def submit_concurrently(writer, names):
+    outcomes = {}
+    start = threading.Barrier(len(names))
+
+    def run(name):
+        start.wait()
+        try:
+            outcomes[name] = writer.submit(create(name))
+        except Exception as e:
+            outcomes[name] = e
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_concurrent_writes_share_commits(app):
+    writer = GroupCommitWriter(app, max_batch=64, max_wait=0.05)
+    names = [f"Rose {i}" for i in range(20)]
+    outcomes = submit_concurrently(writer, names)
+
+    assert sorted(row["name"] for row, _ in outcomes.values()) == sorted(names)
+    assert sorted(seq for _, seq in outcomes.values()) == list(range(1, 21))
+    metrics = writer.metrics()
+    assert metrics["writes"] == 20
+    assert metrics["batches"] < 20
+    assert metrics["commit_latency"]["max_ms"] is not None
+    with app.app_context():
+        assert db.session.query(Character).count() == 20
+
+
+def test_failing_write_only_fails_its_own_request(app):
+    writer = GroupCommitWriter(app, max_batch=64, max_wait=0.05)
+    writer.submit(create("Margaery"))
+    outcomes = submit_concurrently(writer, ["Olenna", "Margaery", "Loras"])
+
+    assert isinstance(outcomes["Margaery"], IntegrityError)
+    assert (outcomes["Olenna"][0]["name"], outcomes["Loras"][0]["name"]) == ("Olenna", "Loras")
+    with app.app_context():
+        assert db.session.query(Character).count() == 3
+        assert db.session.query(CharacterChange).count() == 3
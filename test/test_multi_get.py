@@ -0,0 +1,47 @@
+"""Fetching many characters by id must keep request order, repeat duplicates and mark missing ids."""
+import pytest
+
+
+@pytest.fixture
+def characters(client, auth_headers):
+    for name, house in [("Arya", "Stark"), ("Cersei", "Lannister"), ("Theon", "Greyjoy")]:
+        response = client.post("/characters/add/create-new-characters", headers=auth_headers,
+                               query_string={"name": name, "house": house, "role": "Lord"})
+        assert response.status_code == 201
+    return client
+
+
+def fetch(client, headers, ids, method="GET", **flags):
+    if method == "GET":
+        return client.get("/characters/get-characters-ids", headers=headers,
+                          query_string={"ids": ",".join(map(str, ids)), **flags})
+    return client.post("/characters/get-characters-ids", headers=headers, json={"ids": ids, **flags})
+
+
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_request_order_duplicates_and_missing_ids(characters, auth_headers, method):
+    response = fetch(characters, auth_headers, [3, 99, 1, 3], method)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["total"], body["found"]) == (4, 3)
+    assert [row["id"] for row in body["data"]] == [3, 99, 1, 3]
+    assert [row.get("name") for row in body["data"]] == ["Theon", None, "Arya", "Theon"]
+    assert body["data"][1] == {"id": 99, "error": "Character not found"}
+
+
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_include_flags(characters, auth_headers, method):
+    flags = {"include_role": "true"} if method == "GET" else {"include_role": True}
+    [row] = fetch(characters, auth_headers, [2], method, **flags).get_json()["data"]
+    assert (row["name"], row["role"]) == ("Cersei", "Lord")
+
+
+@pytest.mark.parametrize("method", ["GET", "POST"])
+def test_id_count_limits(characters, auth_headers, method):
+    assert fetch(characters, auth_headers, list(range(1, 1001)), method).get_json()["found"] == 3
+    assert fetch(characters, auth_headers, list(range(1, 1002)), method).status_code == 400
+    assert fetch(characters, auth_headers, [], method).status_code == 400
+
+
+def test_requires_authentication(characters):
+    assert characters.get("/characters/get-characters-ids?ids=1").status_code == 401
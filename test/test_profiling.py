@@ -0,0 +1,44 @@
+"""Profiling must only run for requests carrying the token, and admin endpoints must be closed by default."""
+import os
+from types import SimpleNamespace
+import pytest
+from flask import Flask
+# Local Application Imports
+from routers.admin import is_admin
+from services.profiling import init_profiling
+
+
+def make_app(tmp_path, token):
+    app = Flask(__name__)
+    app.config.update(PROFILING_ENABLED=True, PROFILING_MODE="cprofile", PROFILING_SAMPLE_RATE=0,
+                      PROFILING_SAMPLE_INTERVAL=0.005, PROFILING_TOKEN=token,
+                      PROFILING_DIR=str(tmp_path / "profiles"), PROFILING_MAX_FILES=10)
+    app.route("/")(lambda: "ok")
+    init_profiling(app)
+    return app
+
+
+def test_profiling_requires_a_token(tmp_path):
+    with pytest.raises(ValueError):
+        make_app(tmp_path, None)
+
+
+def test_only_the_token_triggers_a_profile(tmp_path):
+    client = make_app(tmp_path, "secret").test_client()
+    assert "X-Profile-Id" not in client.get("/", headers={"X-Profile": "guess"}).headers
+    assert "X-Profile-Id" not in client.get("/?__profile=").headers
+    assert os.listdir(tmp_path / "profiles") == []
+
+    assert "X-Profile-Id" in client.get("/", headers={"X-Profile": "secret"}).headers
+    assert "X-Profile-Id" in client.get("/?__profile=secret").headers
+    assert len(os.listdir(tmp_path / "profiles")) == 2
+
+
+def test_admins_must_be_listed():
+    app = Flask(__name__)
+    user = SimpleNamespace(email="someone@example.com")
+    with app.app_context():
+        app.config["ADMIN_EMAILS"] = []
+        assert not is_admin(user)
+        app.config["ADMIN_EMAILS"] = ["someone@example.com"]
+        assert is_admin(user)
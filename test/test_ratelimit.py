@@ -0,0 +1,147 @@
+"""Tests for the token bucket rate limiter and concurrency caps."""
+import base64
+import pytest
+from flask import Flask
+from flask_httpauth import HTTPBasicAuth
+# Local Application Imports
+from services.ratelimit import (EXEMPT_ENVIRON_KEY, ConcurrencyLimiter, MemoryBucketStore, SQLiteBucketStore,
+                                charge_authenticated, charge_failed_authentication, init_rate_limiting, parse_limit)
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_limit():
+    """Limits are "<requests>/<seconds>"; 0 disables the budget."""
+    assert parse_limit("10/60") == (10.0, 10.0 / 60)
+    assert parse_limit("5") == (5.0, 5.0)
+    assert parse_limit("0") is None
+
+
+@pytest.mark.parametrize("store_factory", [
+    lambda clock, tmp_path: MemoryBucketStore(clock=clock),
+    lambda clock, tmp_path: SQLiteBucketStore(str(tmp_path / "buckets.db"), clock=clock),
+])
+def test_bucket_allows_burst_then_refills(store_factory, tmp_path):
+    """A bucket allows `capacity` requests at once, then reports when the next token arrives."""
+    clock = FakeClock()
+    store = store_factory(clock, tmp_path)
+    capacity, rate = parse_limit("3/6")
+
+    assert [store.consume("user:a", capacity, rate)[0] for _ in range(3)] == [True, True, True]
+    allowed, remaining, retry_after = store.consume("user:a", capacity, rate)
+    assert not allowed and retry_after == pytest.approx(2.0)
+    assert store.consume("user:b", capacity, rate)[0]
+
+    clock.now += 2.0
+    assert store.consume("user:a", capacity, rate)[0]
+    assert not store.consume("user:a", capacity, rate)[0]
+
+
+def test_concurrency_limiter():
+    """In-flight requests per key are capped until a slot is released."""
+    limiter = ConcurrencyLimiter()
+    assert limiter.acquire("expensive:user:a", 2)
+    assert limiter.acquire("expensive:user:a", 2)
+    assert not limiter.acquire("expensive:user:a", 2)
+    limiter.release("expensive:user:a")
+    assert limiter.acquire("expensive:user:a", 2)
+
+
+@pytest.mark.parametrize("store_factory", [
+    lambda clock, tmp_path: MemoryBucketStore(clock=clock, sweep_interval=10),
+    lambda clock, tmp_path: SQLiteBucketStore(str(tmp_path / "buckets.db"), clock=clock, sweep_interval=10),
+])
+def test_full_buckets_are_swept(store_factory, tmp_path):
+    """Buckets that have refilled completely are dropped; partly drained ones are kept."""
+    clock = FakeClock()
+    store = store_factory(clock, tmp_path)
+    capacity, rate = parse_limit("10/10")
+    for key in ("ip:idle", "ip:busy"):
+        store.consume(key, capacity, rate, cost=5)
+
+    clock.now += 6.0
+    store.consume("ip:busy", capacity, rate, cost=10)
+    clock.now += 6.0
+    store.consume("ip:new", capacity, rate)
+    assert stored_keys(store) == {"ip:busy", "ip:new"}
+    # Dropping a full bucket does not change what its client may do.
+    assert store.consume("ip:idle", capacity, rate, cost=10)[0]
+
+
+def stored_keys(store):
+    if isinstance(store, MemoryBucketStore):
+        return set(store._buckets)
+    return {row[0] for row in store._connection().execute("SELECT key FROM rate_limit_buckets")}
+
+
+def limited_app(**config):
+    """A small app whose /private route checks basic auth like routers/auth.py; the password is "secret"."""
+    app = Flask(__name__)
+    app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMIT_STORE="memory", RATE_LIMIT_DEFAULT="2/60",
+                      RATE_LIMIT_EXPENSIVE="0", RATE_LIMIT_AUTH="3/60", CONCURRENCY_LIMIT_DEFAULT=0,
+                      CONCURRENCY_LIMIT_EXPENSIVE=0, CONCURRENCY_LIMIT_AUTH=0, RATE_LIMIT_TRUSTED_PROXIES=0,
+                      RATE_LIMIT_EXPENSIVE_ENDPOINTS=[], RATE_LIMIT_AUTH_ENDPOINTS=[])
+    app.config.update(config)
+    auth = HTTPBasicAuth()
+    app.verified = []
+
+    @auth.verify_password
+    def verify_password(username, password):
+        app.verified.append(username)
+        if password == "secret":
+            charge_authenticated(username)
+            return username
+        charge_failed_authentication()
+        return None
+
+    app.add_url_rule("/private", "private", auth.login_required(lambda: "ok"))
+    app.add_url_rule("/public", "public", lambda: "ok")
+    init_rate_limiting(app)
+    return app
+
+
+def basic(username, password="secret"):
+    return {"Authorization": "Basic " + base64.b64encode(f"{username}:{password}".encode()).decode()}
+
+
+def test_users_behind_one_address_have_their_own_budgets():
+    client = limited_app().test_client()
+    statuses = [client.get("/private", headers=basic(name)).status_code for name in ("a", "a", "a", "b")]
+    assert statuses == [200, 200, 429, 200]
+
+
+def test_unverified_usernames_cannot_drain_a_budget_or_skip_the_address_limit():
+    app = limited_app()
+    client = app.test_client()
+    # Wrong passwords under other users' names only cost this address's "auth" tokens.
+    assert [client.get("/private", headers=basic(name, "guess")).status_code
+            for name in ("a", "b", "c", "d")] == [401, 401, 401, 429]
+    assert app.verified == ["a", "b", "c"]  # the fourth guess is refused before any password check
+    other = app.test_client()
+    assert other.get("/private", headers=basic("a"), environ_base={"REMOTE_ADDR": "10.0.0.9"}).status_code == 200
+    # Credentials on a route that never checks them are charged to the address.
+    assert [other.get("/public", headers=basic(name), environ_base={"REMOTE_ADDR": "10.0.0.9"}).status_code
+            for name in ("x", "y", "z")] == [200, 200, 429]
+
+
+@pytest.mark.parametrize("trusted, expected", [(0, [200, 200, 429]), (1, [200, 200, 200])])
+def test_trusted_proxies_identify_clients_by_forwarded_address(trusted, expected):
+    client = limited_app(RATE_LIMIT_TRUSTED_PROXIES=trusted).test_client()
+    forwarded = ["1.1.1.1, 10.0.0.1", "2.2.2.2", "3.3.3.3"]
+    assert [client.get("/public", headers={"X-Forwarded-For": address}).status_code
+            for address in forwarded] == expected
+
+
+def test_requests_the_app_makes_to_itself_are_exempt():
+    client = limited_app().test_client()
+    assert [client.get("/public", environ_base={EXEMPT_ENVIRON_KEY: True}).status_code
+            for _ in range(5)] == [200] * 5
+    assert [client.get("/public").status_code for _ in range(3)] == [200, 200, 429]
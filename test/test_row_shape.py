@@ -0,0 +1,31 @@
+"""List, filter and sort must return the same fields, `version` included, with or without the snapshot."""
+import pytest
+# Local Application Imports
+import app as app_module
+from services.snapshot import CHARACTER_FIELDS, CharacterSnapshot
+
+
+@pytest.fixture(params=["database", "snapshot"])
+def characters(request, client, auth_headers, monkeypatch):
+    for name, house in [("Arya", "Stark"), ("Cersei", "Lannister")]:
+        response = client.post("/characters/add/create-new-characters", headers=auth_headers,
+                               query_string={"name": name, "house": house})
+        assert response.status_code == 201
+    assert client.put("/characters/update-character/1", headers=auth_headers,
+                      query_string={"age": 11}).status_code == 200
+    if request.param == "snapshot":
+        monkeypatch.setattr(app_module, "character_snapshot", CharacterSnapshot(refresh_interval=0))
+    return client
+
+
+@pytest.mark.parametrize("method, path, params", [
+    ("GET", "/characters/list-characters", {}),
+    ("GET", "/characters/filter-characters", {"house": "a"}),
+    ("POST", "/characters/characters-sort", {"sort_by": "name", "sort_order": "asc"}),
+])
+def test_rows_have_every_field(characters, auth_headers, method, path, params):
+    response = characters.open(path, method=method, headers=auth_headers, query_string=params)
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert [set(row) for row in data] == [set(CHARACTER_FIELDS)] * 2
+    assert {row["id"]: row["version"] for row in data} == {1: 2, 2: 1}
@@ -0,0 +1,56 @@
+"""Tests for ranked full-text search on SQLite (FTS5)."""
+from sqlalchemy import create_engine, delete, insert, select, update
+from sqlalchemy.orm import Session
+# Local Application Imports
+from models.model_tables import Character
+from services.search import search_matches, search_terms
+
+
+def character(**values):
+    return {field: values.get(field) for field in ("id", "name", "house", "animal", "symbol", "nickname", "strength")}
+
+
+def ranked_ids(session, text_query):
+    matches = search_matches(session, text_query)
+    return list(session.scalars(select(matches.c.id).order_by(matches.c.score.desc(), matches.c.id)))
+
+
+def test_search_ranks_names_above_other_fields_and_follows_writes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Character.__table__.create(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Character.__table__), [
+            character(id=1, name="Arya Stark", house="Stark", animal="Direwolf", strength="Agility"),
+            character(id=2, name="Jon Snow", house="Stark", nickname="Wolf King", strength="Swordsmanship"),
+            character(id=3, name="Sandor Clegane", house="Clegane", symbol="Hounds", strength="Wolf-like strength"),
+        ])
+
+    with Session(engine) as session:
+        assert ranked_ids(session, "wolf") == [2, 3]
+        assert ranked_ids(session, "stark sword") == [2]
+        assert ranked_ids(session, "dire") == [1]
+        assert ranked_ids(session, '"* OR') == []
+
+        session.execute(update(Character).where(Character.id == 3).values(strength="Brute force"))
+        session.execute(delete(Character).where(Character.id == 2))
+        session.commit()
+        assert ranked_ids(session, "wolf") == []
+
+
+def test_search_terms_ignore_operators():
+    assert search_terms('Jon "Snow" OR -stark*') == ["jon", "snow", "or", "stark"]
+
+
+def test_building_the_index_leaves_the_callers_transaction_alone(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Character.__table__.create(engine)
+    with Session(engine) as session:
+        session.execute(insert(Character.__table__), [character(id=1, name="Arya Stark")])
+        # The index cannot be built while this transaction holds the write lock: search without it.
+        assert ranked_ids(session, "arya") == [1]
+        session.rollback()
+        assert session.scalars(select(Character.id)).all() == []
+        assert ranked_ids(session, "arya") == []
+        session.execute(insert(Character.__table__), [character(id=2, name="Arya Stark")])
+        session.commit()
+        assert ranked_ids(session, "arya") == [2]
@@ -0,0 +1,36 @@
+"""Tests for the shared row encoder and Accept-based format negotiation."""
+import json
+import pytest
+from flask import Flask
+# Local Application Imports
+from services.serialization import BINARY_ENCODERS, encode_rows, make_payload_response
+from services.snapshot import CharacterRow
+
+ROW = dict(id=1, name="Arya", house="Stark", animal="Wolf", symbol="Direwolf", nickname="No One",
+           role="Assassin", age=18, death=None, strength="Agility", version=3)
+
+
+def test_encode_rows_matches_to_dict():
+    row = CharacterRow.from_dict(ROW)
+    assert encode_rows([row]) == [row.to_dict()]
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, "application/json"),
+    ("*/*", "application/json"),
+    ("text/html", "application/json"),
+    ("application/msgpack", "application/msgpack"),
+    ("application/cbor", "application/cbor"),
+    ("application/cbor;q=0.5, application/json", "application/json"),
+])
+def test_make_payload_response_negotiates(accept, expected):
+    if expected != "application/json" and expected not in BINARY_ENCODERS:
+        pytest.skip(f"{expected} encoder not installed")
+    app = Flask(__name__)
+    headers = {"Accept": accept} if accept else {}
+    with app.test_request_context("/", headers=headers):
+        response = make_payload_response({"data": [ROW]})
+    assert response.mimetype == expected
+    assert "Accept" in response.vary
+    if expected == "application/json":
+        assert json.loads(response.get_data()) == {"data": [ROW]}
@@ -0,0 +1,92 @@
+"""Sharded characters must route point lookups to one shard and merge scatter-gather reads in global order."""
+import random
+import pytest
+from flask import Flask
+from sqlalchemy import event, select
+# Local Application Imports
+from config.database import db
+from models.model_tables import Character, CharacterShard
+from services.sharding import ShardRouter, sort_order
+
+HOUSES = ["Stark", "Lannister", "Targaryen", "Baratheon", "Greyjoy", None]
+
+
+def make_router(tmp_path, key):
+    router = ShardRouter([f"sqlite:///{tmp_path / f'shard{n}.db'}" for n in range(3)], key=key)
+    router.create_tables()
+    router.statements = []
+    for shard, engine in enumerate(router.engines):
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args, shard=shard: router.statements.append(shard))
+    return router
+
+
+@pytest.fixture(params=["id", "house"])
+def router(request, tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'main.db'}"
+    db.init_app(app)
+    with app.app_context():
+        CharacterShard.__table__.create(db.engine)
+        router = make_router(tmp_path, request.param)
+        rng = random.Random(7)
+        for n in range(60):
+            name = None if n % 10 == 0 else f"{rng.choice(['arya', 'Bran', 'Cersei'])} {n}"
+            router.insert_character(db.session, {"name": name, "house": rng.choice(HOUSES),
+                                                 "age": rng.choice([None, 10, 20, 30])})
+        db.session.commit()
+        yield router
+        db.session.remove()
+
+
+def rows_on(router, shard):
+    return router.run({shard: lambda session: session.scalars(select(Character)).all()})[0]
+
+
+def test_rows_are_spread_by_the_shard_key(router):
+    for shard in range(len(router)):
+        for character in rows_on(router, shard):
+            expected = character.id % 3 if router.key == "id" else router.shard_for_house(character.house)
+            assert shard == expected
+    assert sorted(character.id for shard in range(3) for character in rows_on(router, shard)) == list(range(1, 61))
+
+
+def test_point_lookups_query_one_shard(router):
+    router.statements.clear()
+    character = router.get(db.session, 42)
+    assert character.id == 42 and len(set(router.statements)) == 1
+    assert router.get(db.session, 1000) is None
+    assert sorted(router.get_many(db.session, [3, 1000, 7, 42])) == [3, 7, 42]
+
+
+@pytest.mark.parametrize("field", ["id", "name", "house", "age"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_gather_merges_pages_in_global_order(router, field, descending):
+    _, key, reverse = sort_order(field, descending)
+    everything = sorted((character for shard in range(3) for character in rows_on(router, shard)),
+                        key=key, reverse=reverse)
+    query = lambda session: session.query(Character)
+    for skip, limit in [(0, 7), (5, 10), (55, 20), (0, None)]:
+        total, rows = router.gather(query, sort_order(field, descending), skip=skip, limit=limit, count=True)
+        end = None if limit is None else skip + limit
+        assert total == 60
+        assert [row.id for row in rows] == [row.id for row in everything[skip:end]]
+
+
+def test_updates_deletes_and_moves_between_shards(router):
+    row, previous = router.update_character(db.session, 5, {"age": 99}, with_previous=True)
+    assert (row["age"], row["version"], previous["version"]) == (99, 2, 1)
+    assert router.update_character(db.session, 5, {"age": 1}, expected_versions=[1]) == (None, None)
+    assert router.current_version(db.session, 5) == 2
+
+    # A new house moves the character when houses pick the shard; the id and version carry over.
+    house = next(house for house in HOUSES if router.shard_for_house(house) != router.shard_for_house(row["house"]))
+    row, _ = router.update_character(db.session, 5, {"house": house}, expected_versions=[2])
+    db.session.commit()
+    assert (row["id"], row["house"], row["version"], row["age"]) == (5, house, 3, 99)
+    assert router.get(db.session, 5).house == house
+    assert sum(character.id == 5 for shard in range(3) for character in rows_on(router, shard)) == 1
+
+    assert router.delete_character(db.session, 5)["id"] == 5
+    db.session.commit()
+    assert router.get(db.session, 5) is None and router.delete_character(db.session, 5) is None
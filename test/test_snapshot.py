@@ -0,0 +1,120 @@
+"""Tests for the in-memory characters snapshot."""
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+# Local Application Imports
+from benchmarks.datagen import generate_characters
+from models.model_tables import Character, CharacterChange
+from services.snapshot import CharacterSnapshot, character_sort_key
+
+
+@pytest.fixture(scope='module')
+def session():
+    """In-memory SQLite database seeded with synthetic characters."""
+    engine = create_engine("sqlite://")
+    Character.__table__.create(engine)
+    CharacterChange.__table__.create(engine)
+    with Session(engine) as session:
+        session.execute(insert(Character), next(generate_characters(3000, seed=3, batch_size=3000)))
+        session.commit()
+        yield session
+
+
+def sql_filter_ids(session, name=None, house=None, role=None, age_min=None, age_max=None):
+    """Same filters as filter_characters, evaluated by the database."""
+    query = select(Character.id).order_by(Character.id)
+    if name:
+        query = query.where(Character.name.ilike(f"%{name}%"))
+    if house:
+        query = query.where(Character.house.ilike(f"%{house}%"))
+    if role:
+        query = query.where(Character.role.ilike(f"%{role}%"))
+    if age_min:
+        query = query.where(Character.age >= age_min)
+    if age_max:
+        query = query.where(Character.age <= age_max)
+    return list(session.scalars(query))
+
+
+@pytest.mark.parametrize("filters", [
+    {"house": "stark"},
+    {"house": "ar", "role": "KNI"},
+    {"name": "jon", "age_min": 20, "age_max": 40},
+    {"age_max": 17},
+    {"age_min": 60, "role": "lord"},
+    {"house": "no such house"},
+])
+def test_snapshot_filter_matches_database(session, filters):
+    """The snapshot returns the same rows as the SQL filter."""
+    snapshot = CharacterSnapshot()
+    snapshot.load(session)
+    assert [row.id for row in snapshot.filter(**filters)] == sql_filter_ids(session, **filters)
+
+
+def test_snapshot_sort_and_page(session):
+    """Sorted listings follow the sort_characters key and pagination follows id order."""
+    snapshot = CharacterSnapshot()
+    snapshot.load(session)
+
+    names = [(row.name or "").lower() for row in snapshot.sorted_rows("name")]
+    assert names == sorted(names)
+    houses = snapshot.sorted_rows("house", descending=True)
+    keys = [((row.house or "").lower(), -row.id) for row in houses]
+    assert keys == sorted(keys, key=lambda key: (key[0], key[1]), reverse=True)
+
+    total, rows = snapshot.page(10, 5)
+    assert total == 3000
+    assert [row.id for row in rows] == [11, 12, 13, 14, 15]
+
+
+@pytest.mark.parametrize("field", ["name", "house", "age"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_database_sort_key_matches_snapshot(session, field, descending):
+    """sort_characters without a snapshot orders rows (including unknown ages) like the snapshot."""
+    snapshot = CharacterSnapshot()
+    snapshot.load(session)
+    rows = session.scalars(select(Character).order_by(Character.id)).all()
+    assert any(row.age is None for row in rows)
+    expected = sorted(rows, key=lambda row: character_sort_key(field, row), reverse=descending)
+    assert [row.id for row in snapshot.sorted_rows(field, descending)] == [row.id for row in expected]
+
+
+def test_snapshot_applies_changes(session):
+    """Create, update and delete changes are reflected in every index."""
+    snapshot = CharacterSnapshot()
+    snapshot.load(session)
+    character = {"id": 5000, "name": "Zed Stark", "house": "Stark", "role": "Knight", "age": 33}
+
+    snapshot.apply(operation="create", character=character)
+    assert [row.id for row in snapshot.filter(name="zed", house="stark", age_min=33, age_max=33)] == [5000]
+
+    snapshot.apply(operation="update", character={**character, "house": "Bolton", "age": 70})
+    assert snapshot.filter(name="zed", house="stark") == []
+    assert [row.id for row in snapshot.filter(name="zed", age_min=70)] == [5000]
+    assert snapshot.sorted_rows("age")[-1].id == 5000 or snapshot.sorted_rows("age")[-1].age >= 70
+
+    snapshot.apply(operation="delete", character={**character, "house": "Bolton", "age": 70})
+    assert snapshot.filter(name="zed") == []
+    assert len(snapshot) == 3000
+
+
+def test_snapshot_catches_up_from_outbox(session):
+    """Changes recorded in the outbox after the load are replayed in order."""
+    from services.changes import record_change
+
+    snapshot = CharacterSnapshot()
+    snapshot.load(session)
+    character = {"id": 6000, "name": "Ygritte Free", "house": "Free Folk", "role": "Archer", "age": 20}
+    record_change(session, "create", character)
+    record_change(session, "update", {**character, "age": 21})
+    session.flush()
+
+    snapshot.catch_up(session)
+    assert snapshot.get(6000).age == 21
+    assert snapshot.last_seq == 2
+
+    record_change(session, "delete", {**character, "age": 21})
+    session.flush()
+    snapshot.catch_up(session)
+    assert snapshot.get(6000) is None
+    session.rollback()
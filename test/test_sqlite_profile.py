@@ -0,0 +1,109 @@
+"""The tuned SQLite profile must set its PRAGMAs and send writes to the single writer connection."""
+import threading
+import time
+import pytest
+from flask import Flask
+from sqlalchemy import event, select
+# Local Application Imports
+from config.database import db
+from config.sqlite import WRITER_BIND_KEY, WriterQueue, configure_sqlite, init_sqlite
+from models.model_tables import Character
+from services.search import search_matches
+from services.writes import insert_character
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'tuned.db'}",
+                      SQLITE_PROFILE="tuned", SQLITE_READ_POOL_SIZE=4)
+    configure_sqlite(app)
+    db.init_app(app)
+    init_sqlite(app, db)
+    with app.app_context():
+        Character.__table__.create(db.engine)
+        statements = []
+        for key, engine in db.engines.items():
+            event.listen(engine, "before_cursor_execute",
+                         lambda conn, cursor, statement, *args, key=key: statements.append((key, statement.split()[0])))
+        app.statements = statements
+        yield app
+        db.session.remove()
+
+
+def test_pragmas_and_pools(app):
+    reader, writer = db.engines[None], db.engines[WRITER_BIND_KEY]
+    with reader.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+    assert (reader.pool.size(), writer.pool.size()) == (4, 1)
+
+
+def test_writes_use_the_writer_and_reads_the_readers(app):
+    app.statements.clear()
+    db.session.scalars(select(Character)).all()
+    db.session.commit()
+    assert app.statements == [(None, "SELECT")]
+
+    app.statements.clear()
+    insert_character(db.session, {"name": "Brienne", "house": "Tarth"})
+    db.session.get(Character, 1)
+    db.session.commit()
+    assert app.statements == [(WRITER_BIND_KEY, "BEGIN"), (WRITER_BIND_KEY, "INSERT"), (WRITER_BIND_KEY, "SELECT")]
+
+    app.statements.clear()
+    db.session.add(Character(name="Podrick", house="Payne"))
+    db.session.commit()
+    assert [key for key, _ in app.statements] == [WRITER_BIND_KEY] * len(app.statements)
+
+    app.statements.clear()
+    assert db.session.scalar(select(Character.name).where(Character.id == 2)) == "Podrick"
+    assert app.statements == [(None, "SELECT")]
+
+
+def test_reading_the_dialect_does_not_take_the_writer(app):
+    insert_character(db.session, {"name": "Brienne", "house": "Tarth"})
+    db.session.commit()
+    assert db.session.get_bind().dialect.name == "sqlite"
+    assert WRITER_BIND_KEY not in db.session.info
+
+    matches = search_matches(db.session, "brienne")
+    db.session.commit()
+    app.statements.clear()
+    assert db.session.execute(select(matches.c.id)).scalars().all() == [1]
+    assert WRITER_BIND_KEY not in db.session.info
+    assert app.statements == [(None, "SELECT")]
+    db.session.commit()
+
+    db.session.connection(bind_arguments={"writer": True})
+    assert WRITER_BIND_KEY in db.session.info
+    db.session.commit()
+
+
+def test_default_profile_keeps_one_pool(tmp_path):
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'plain.db'}", SQLITE_PROFILE="default")
+    configure_sqlite(app)
+    db.init_app(app)
+    init_sqlite(app, db)
+    with app.app_context():
+        assert list(db.engines) == [None]
+        with db.engine.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+
+
+def test_writer_queue_hands_over_to_a_starving_writer():
+    queue = WriterQueue(patience=0.05)
+    queue.acquire()
+    order = []
+    waiter = threading.Thread(target=lambda: (queue.acquire(), order.append("waiter"), queue.release()))
+    waiter.start()
+    time.sleep(0.1)
+    queue.release()
+    # The waiter has waited past its patience, so the connection is its turn even if we ask again at once.
+    queue.acquire()
+    order.append("barger")
+    queue.release()
+    waiter.join()
+    assert order == ["waiter", "barger"]
@@ -0,0 +1,31 @@
+"""Tests for prebuilt static assets: hashed ETags, precompressed variants and cache headers."""
+import zlib
+from flask import Flask
+# Local Application Imports
+from services.static_assets import IMMUTABLE_CACHE_CONTROL, StaticAsset
+
+
+def test_asset_negotiates_variant_and_revalidates():
+    app = Flask(__name__)
+    asset = StaticAsset(b'{"openapi": "3.0.2"}' * 50, "application/json")
+
+    with app.test_request_context("/", headers={"Accept-Encoding": "gzip;q=1, br;q=0, zstd;q=0"}):
+        response = asset.response(app.response_class, 60)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert zlib.decompress(response.get_data(), 31) == asset.body
+    assert response.headers["ETag"] == f'"{asset.hash}-gzip"'
+    assert response.headers["Cache-Control"] == "public, max-age=60"
+
+    with app.test_request_context(f"/?v={asset.hash}", headers={"If-None-Match": f'"{asset.hash}"'}):
+        response = asset.response(app.response_class, 60)
+    assert response.status_code == 304
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["ETag"] == f'"{asset.hash}"'
+
+    with app.test_request_context("/", headers={"If-None-Match": f'"{asset.hash}-gzip"',
+                                                "Accept-Encoding": "gzip;q=1, br;q=0, zstd;q=0"}):
+        response = asset.response(app.response_class, 60)
+    assert response.status_code == 304
+    assert response.headers["ETag"] == f'"{asset.hash}-gzip"'
+    assert response.headers["Cache-Control"] == "public, max-age=60"
+    assert "Accept-Encoding" in response.vary
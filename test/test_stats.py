@@ -0,0 +1,47 @@
+"""Tests for the aggregate statistics computed in SQL and with NumPy."""
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+# Local Application Imports
+from benchmarks.datagen import generate_characters
+from models.model_tables import Character
+from services.stats import StatsCache, sql_character_stats, vectorised_character_stats
+
+
+def to_columns(rows):
+    """Build the columnar arrays expected by vectorised_character_stats."""
+    as_float = lambda values: np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    return {
+        "house": np.array([row["house"] for row in rows], dtype=object),
+        "role": np.array([row["role"] for row in rows], dtype=object),
+        "age": as_float([row["age"] for row in rows]),
+        "death": as_float([row["death"] for row in rows]),
+    }
+
+
+def test_sql_and_vectorised_stats_agree():
+    """Both implementations must return the same report for the same rows."""
+    rows = next(generate_characters(2000, seed=7, batch_size=2000))
+    engine = create_engine("sqlite://")
+    Character.__table__.create(engine)
+    with Session(engine) as session:
+        session.execute(insert(Character), rows)
+        sql_report = sql_character_stats(session)
+
+    vectorised_report = vectorised_character_stats(to_columns(rows))
+
+    assert sql_report == vectorised_report
+    assert sql_report["total"] == 2000
+    assert sum(sql_report["age"]["buckets"].values()) == 2000
+
+
+def test_stats_cache_invalidation():
+    """A write invalidates the cached report."""
+    cache = StatsCache(ttl=60)
+    calls = []
+    compute = lambda: calls.append(1) or {"total": len(calls)}
+
+    assert cache.get(compute) == {"total": 1}
+    assert cache.get(compute) == {"total": 1}
+    cache.invalidate(None, operation="create", character={})
+    assert cache.get(compute) == {"total": 2}
@@ -0,0 +1,51 @@
+"""Upserts need a unique natural key, keep PostgreSQL's id sequence ahead and report which key collided."""
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.exc import IntegrityError
+# Local Application Imports
+from services.writes import ID_SEQUENCE_LOCK_KEY, _advance_id_sequence, check_natural_key, conflicting_fields
+
+
+def test_natural_key_must_match_a_unique_index():
+    check_natural_key(("name", "house"))
+    check_natural_key(("house", "name"))
+    with pytest.raises(ValueError, match="no unique index"):
+        check_natural_key(("name",))
+
+
+def test_conflicting_fields_from_sqlite_and_postgresql_errors():
+    def error(orig):
+        return IntegrityError("INSERT ...", {}, orig)
+
+    assert conflicting_fields(error(Exception("UNIQUE constraint failed: characters.id"))) == ("id",)
+    assert conflicting_fields(error(Exception("UNIQUE constraint failed: characters.name, characters.house"))) == (
+        "name", "house")
+    postgres = SimpleNamespace(diag=SimpleNamespace(constraint_name="characters_pkey"))
+    assert conflicting_fields(error(postgres)) == ("id",)
+    postgres.diag.constraint_name = "uq_characters_name_house"
+    assert conflicting_fields(error(postgres)) == ("name", "house")
+    assert conflicting_fields(error(Exception("NOT NULL constraint failed: characters.name"))) is None
+
+
+def test_postgresql_id_sequence_is_moved_past_explicit_ids():
+    executed = []
+    session = SimpleNamespace(get_bind=lambda mapper: SimpleNamespace(dialect=SimpleNamespace(name="postgresql")),
+                              execute=executed.append)
+    _advance_id_sequence(session, 42)
+    lock, setval = executed
+    assert list(lock.compile().params.values()) == [ID_SEQUENCE_LOCK_KEY]
+    sql = str(setval)
+    assert "setval" in sql and "pg_sequence_last_value" in sql
+    assert 42 in setval.compile().params.values()
+
+
+def test_collisions_name_the_key(client, auth_headers):
+    upsert = lambda character: client.put("/characters/upsert?key=id", headers=auth_headers, json=character)
+    assert upsert({"id": 5, "name": "Arya", "house": "Stark"}).status_code == 201
+    response = upsert({"id": 6, "name": "Arya", "house": "Stark"})
+    assert response.status_code == 409
+    assert response.get_json()["error"] == "A character with this name and house already exists"
+    # The next create gets an id past the explicit one.
+    created = client.post("/characters/add/create-new-characters", headers=auth_headers,
+                          query_string={"name": "Bran", "house": "Stark"})
+    assert created.status_code == 201 and created.get_json()["id"] == 6
@@ -0,0 +1,61 @@
+"""Warm-up must gate readiness, retry failed steps, and the database ping must be cached."""
+import time
+from flask import Flask
+# Local Application Imports
+from config.database import db
+from services.warmup import DatabasePing, Warmup
+
+
+def wait_until_ready(warmup, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not warmup.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return warmup.ready
+
+
+def test_warmup_runs_steps_once_and_retries_failures():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    calls = []
+
+    def flaky(app):
+        calls.append("flaky")
+        if calls.count("flaky") == 1:
+            raise RuntimeError("database not up yet")
+
+    warmup = Warmup(app, steps=(("first", lambda app: calls.append("first")), ("flaky", flaky)), retry_interval=0.01)
+    assert warmup.state == "pending" and not warmup.ready
+    warmup.start()
+    warmup.start()
+    assert wait_until_ready(warmup)
+    assert calls == ["first", "flaky", "first", "flaky"]
+    assert set(warmup.to_dict()["steps_ms"]) == {"first", "flaky"}
+
+    assert Warmup(app, steps=()).ready
+
+
+def test_database_ping_is_cached():
+    app = Flask(__name__)
+    ping = DatabasePing(app, ttl=60)
+    pings = []
+    ping._ping = lambda: pings.append(1) or (True, None, time.monotonic())
+
+    assert ping.check()[:2] == (True, None)
+    for _ in range(100):
+        ping.check()
+    assert len(pings) == 1
+
+    ping.ttl = 0
+    ping.check()
+    assert len(pings) == 2
+
+
+def test_warmup_requests_run_as_the_first_user(client, monkeypatch):
+    from app import app
+    from services.warmup import warm_request_paths
+
+    monkeypatch.setitem(app.config, "WARMUP_PATHS", ["/characters/list-characters", "/healthz"])
+    with app.app_context():
+        assert warm_request_paths(app) == {"/characters/list-characters": 200, "/healthz": 200}
+    assert client.get("/characters/list-characters").status_code == 401
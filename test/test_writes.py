@@ -0,0 +1,104 @@
+"""Character writes must be one RETURNING statement plus the outbox insert, with no reload after commit."""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+# Local Application Imports
+from models.model_tables import Character, CharacterChange
+from services.changes import record_change
+from services.writes import current_version, delete_character, insert_character, update_character, upsert_characters
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Character.__table__.create(engine)
+    CharacterChange.__table__.create(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda connection, cursor, statement, *args: statements.append(statement))
+    with Session(engine, expire_on_commit=False) as session:
+        session.statements = statements
+        yield session
+
+
+def write(session, operation, row):
+    seq = record_change(session, operation, row)
+    session.commit()
+    return seq
+
+
+def test_create_update_delete_statement_counts(session):
+    session.statements.clear()
+    created = insert_character(session, {"name": "Arya Stark", "house": "Stark", "age": 18})
+    assert write(session, "create", created) == 1
+    assert created == {"id": 1, "name": "Arya Stark", "house": "Stark", "animal": None, "symbol": None,
+                       "nickname": None, "role": None, "age": 18, "death": None, "strength": None, "version": 1}
+    assert [statement.split()[0] for statement in session.statements] == ["INSERT", "INSERT"]
+
+    session.statements.clear()
+    updated, previous = update_character(session, 1, {"house": "Faceless Men"})
+    assert write(session, "update", updated) == 2
+    assert (updated["house"], updated["version"], previous) == ("Faceless Men", 2, None)
+    assert [statement.split()[0] for statement in session.statements] == ["UPDATE", "INSERT"]
+
+    session.statements.clear()
+    deleted = delete_character(session, 1)
+    assert write(session, "delete", deleted) == 3
+    assert deleted == updated
+    assert [statement.split()[0] for statement in session.statements] == ["DELETE", "INSERT"]
+
+
+def test_update_with_previous_and_missing_rows(session):
+    created = insert_character(session, {"name": "Jon Snow", "house": "Stark"})
+    updated, previous = update_character(session, created["id"], {"house": "Night's Watch"}, with_previous=True)
+    assert (previous["house"], updated["house"]) == ("Stark", "Night's Watch")
+
+    session.statements.clear()
+    assert update_character(session, 999, {"house": "Nobody"}) == (None, None)
+    assert delete_character(session, 999) is None
+    assert len(session.statements) == 2
+
+
+def test_conditional_update_detects_concurrent_writes(session):
+    created = insert_character(session, {"name": "Sansa Stark", "house": "Stark"})
+    session.commit()
+
+    session.statements.clear()
+    updated, _ = update_character(session, created["id"], {"role": "Lady"}, expected_versions=[1])
+    assert (updated["role"], updated["version"]) == ("Lady", 2)
+    assert [statement.split()[0] for statement in session.statements] == ["UPDATE"]
+
+    # A second editor still holding version 1 loses instead of overwriting the first edit.
+    assert update_character(session, created["id"], {"role": "Queen"}, expected_versions=[1]) == (None, None)
+    assert current_version(session, created["id"]) == 2
+    assert current_version(session, 999) is None
+    assert update_character(session, created["id"], {"role": "Queen"}, expected_versions=[]) == (None, None)
+
+    updated, previous = update_character(session, created["id"], {"role": "Queen"}, with_previous=True,
+                                         expected_versions=[1, 2])
+    assert (previous["version"], updated["version"], updated["role"]) == (2, 3, "Queen")
+
+
+def test_upsert_skips_unchanged_rows(session):
+    catalogue = [{"name": f"Knight {i}", "house": "Tarly", "age": 20 + i} for i in range(3)]
+    results = upsert_characters(session, catalogue, ("name", "house"))
+    assert [status for status, _, _ in results] == ["created"] * 3
+    session.commit()
+
+    session.statements.clear()
+    results = upsert_characters(session, catalogue, ("name", "house"))
+    assert [status for status, _, _ in results] == ["unchanged"] * 3
+    assert [statement.split()[0] for statement in session.statements] == ["SELECT"]
+
+    catalogue[1] = {**catalogue[1], "role": "Squire"}
+    results = upsert_characters(session, catalogue, ("name", "house"))
+    assert [status for status, _, _ in results] == ["unchanged", "updated", "unchanged"]
+    status, row, previous = results[1]
+    assert (row["id"], row["role"], previous["role"]) == (2, "Squire", None)
+    assert (row["version"], previous["version"]) == (2, 1)
+
+    by_id = upsert_characters(session, [{"id": 2, "name": "Knight 1", "house": "Tarly"}, {"id": 9, "name": "New"}])
+    assert [(status, row["id"], row["age"]) for status, row, _ in by_id] == [("updated", 2, None), ("created", 9, None)]
+
+    with pytest.raises(ValueError):
+        upsert_characters(session, [{"name": "Houseless"}], ("name", "house"))